@@ -0,0 +1,3 @@
+"""
+Benchmarks of the pandas CSV EXD-API plugin on generated files.
+"""
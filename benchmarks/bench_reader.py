@@ -0,0 +1,232 @@
+"""
+Time the EXD-API requests of the plugin on generated CSV files and write the results as JSON.
+
+Requests go through the in-process ExternalDataReader like in the tests, so no gRPC server is needed.
+Each shape runs in a fresh worker process, so the caches of the plugin start empty and the peak RSS is the
+one of the shape. The workers read the plugin configuration from the environment like the server does,
+so configurations are compared by running the suite with different ODS_EXD_API_PANDASCSV_* variables.
+
+    python -m benchmarks.bench_reader --rows 1000000 --output results.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import grpc
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+from ods_exd_api_box.simple.file_simple import FileSimpleRegistry
+
+from benchmarks.generator import SHAPES, GeneratedFile, generate
+from external_file_data import FILE_PATTERNS, ExternalFile, ExternalFileData
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+# Rows requested by each windowed GetValues.
+WINDOW_ROWS = 1000
+# Windowed GetValues per repetition, spread over the file.
+WINDOWS = 20
+
+
+def run_case(
+    generated: GeneratedFile, repeat: int = 3, window_rows: int = WINDOW_ROWS, windows: int = WINDOWS
+) -> dict[str, Any]:
+    """
+    Time the requests of a client importing a file, in the current process.
+    Each repetition opens the file again, the first one finds the caches of the process empty.
+    :param generated: File to read.
+    :param repeat: Number of repetitions.
+    :param window_rows: Rows requested by each windowed GetValues.
+    :param windows: Windowed GetValues per repetition.
+    :return: Latencies in seconds per operation, throughput in MB of the file per second and peak RSS.
+    """
+    FileSimpleRegistry.register(ExternalFileData.create)
+    FileHandlerRegistry.register(file_type_name="PANDASCSV", factory=ExternalFile.create, file_patterns=FILE_PATTERNS)
+    service = ExternalDataReader()
+    context = MockServicerContext()
+    identifier = exd_api.Identifier(url=generated.path.absolute().as_uri(), parameters=generated.parameters_json)
+    rng = np.random.default_rng(0)
+    baseline_rss_mb = _peak_rss_mb()
+    timings: dict[str, list[float]] = defaultdict(list)
+
+    for _ in range(repeat):
+        if generated.reject:
+            start = time.perf_counter()
+            try:
+                handle = service.Open(identifier, context)
+                try:
+                    service.GetStructure(exd_api.StructureRequest(handle=handle), context)
+                finally:
+                    service.Close(handle, context)
+            except grpc.RpcError:
+                timings["reject"].append(time.perf_counter() - start)
+                continue
+            raise AssertionError(f"File {generated.path} was not rejected.")
+
+        start = time.perf_counter()
+        handle = service.Open(identifier, context)
+        timings["open"].append(time.perf_counter() - start)
+        try:
+            start = time.perf_counter()
+            structure = service.GetStructure(exd_api.StructureRequest(handle=handle), context)
+            timings["structure"].append(time.perf_counter() - start)
+            group = structure.groups[0]
+            channel_ids = [channel.id for channel in group.channels]
+
+            start = time.perf_counter()
+            service.GetValues(
+                exd_api.ValuesRequest(
+                    handle=handle, group_id=0, channel_ids=channel_ids, start=0, limit=group.number_of_rows
+                ),
+                context,
+            )
+            timings["values_full"].append(time.perf_counter() - start)
+
+            for offset in rng.integers(0, max(group.number_of_rows - window_rows, 0) + 1, windows):
+                start = time.perf_counter()
+                service.GetValues(
+                    exd_api.ValuesRequest(
+                        handle=handle, group_id=0, channel_ids=channel_ids, start=int(offset), limit=window_rows
+                    ),
+                    context,
+                )
+                timings["values_window"].append(time.perf_counter() - start)
+        finally:
+            service.Close(handle, context)
+
+    file_mb = generated.path.stat().st_size / (1024 * 1024)
+    return {
+        "shape": generated.shape,
+        "file": generated.path.name,
+        "file_mb": round(file_mb, 3),
+        "parameters": generated.parameters,
+        "number_of_rows": generated.number_of_rows,
+        "number_of_columns": generated.number_of_columns,
+        "baseline_rss_mb": baseline_rss_mb,
+        "peak_rss_mb": _peak_rss_mb(),
+        "operations": {name: _summary(seconds, file_mb) for name, seconds in timings.items()},
+    }
+
+
+def run(
+    files: list[GeneratedFile], repeat: int = 3, window_rows: int = WINDOW_ROWS, windows: int = WINDOWS
+) -> dict[str, Any]:
+    """
+    Run the cases of the files one after the other, each in a fresh worker process.
+    :param files: Files to read.
+    :param repeat: Number of repetitions per file.
+    :param window_rows: Rows requested by each windowed GetValues.
+    :param windows: Windowed GetValues per repetition.
+    :return: Results of all cases with a description of the environment and the plugin configuration.
+    """
+    context = multiprocessing.get_context("spawn")
+    cases = []
+    for generated in files:
+        logging.getLogger(__name__).info("Benchmarking %s", generated.path.name)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            cases.append(executor.submit(run_case, generated, repeat, window_rows, windows).result())
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": asdict(ExternalFileData.config),
+        "settings": {"repeat": repeat, "window_rows": window_rows, "windows": windows},
+        "cases": cases,
+    }
+
+
+def _summary(seconds: list[float], file_mb: float) -> dict[str, Any]:
+    """Latencies of an operation, the first call found the caches empty."""
+    return {
+        "count": len(seconds),
+        "first_s": seconds[0],
+        "min_s": min(seconds),
+        "median_s": statistics.median(seconds),
+        "max_s": max(seconds),
+        "first_mb_per_s": file_mb / seconds[0] if seconds[0] > 0 else None,
+        "median_mb_per_s": file_mb / statistics.median(seconds) if statistics.median(seconds) > 0 else None,
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment() -> dict[str, Any]:
+    """
+    Describe the machine and the versions of the libraries, so results can be compared.
+    :return: Versions of Python, pandas, numpy and pyarrow, the platform and the number of CPUs.
+    """
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+
+        pyarrow_version: str | None = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow_version,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point, writes the results as JSON.
+    :param argv: Command line arguments, defaults to sys.argv.
+    :return: Exit code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="rows of the generated files")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated values")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES), help="shapes to run")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per shape")
+    parser.add_argument("--window-rows", type=int, default=WINDOW_ROWS, help="rows of each windowed GetValues")
+    parser.add_argument("--windows", type=int, default=WINDOWS, help="windowed GetValues per repetition")
+    parser.add_argument("--data-dir", type=Path, default=None, help="keep the generated files in this directory")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    # the workers keep the default level, the plugin logging every request would be part of the timings
+    logging.basicConfig(level=logging.INFO)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or Path(temp_dir)
+        files = [generate(shape, data_dir, args.rows, args.seed) for shape in args.shapes]
+        results = run(files, args.repeat, args.window_rows, args.windows)
+    results["settings"].update(rows=args.rows, seed=args.seed)
+
+    text = json.dumps(results, indent=2, default=str)
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+"""
+Time the cold start of the plugin server, from starting its process to the first answered GetStructure.
+
+Each run starts a fresh server process on a free port and connects over gRPC, retrying until it answers.
+The default commands compare server.py, binding before pandas is imported, with external_file_data.py.
+Other commands, like the Docker image, are given as template with the placeholder {port}; the data directory
+must be visible to the server under the same path.
+
+    python -m benchmarks.cold_start --repeat 5 --output cold_start.json
+    python -m benchmarks.cold_start --command "docker run --rm -p {port}:50051 -v $PWD/data:$PWD/data image"
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import grpc
+from ods_exd_api_box import exd_api, exd_grpc
+
+# pylint: disable=no-member
+
+ROOT_DIR = Path(__file__).parent.parent
+COMMANDS = {
+    "server.py": f"{shlex.quote(sys.executable)} server.py",
+    "external_file_data.py": f"{shlex.quote(sys.executable)} external_file_data.py",
+}
+# Seconds to wait for the first GetStructure of a run.
+TIMEOUT_S = 60.0
+# Retry the connection this often while the server starts, the default backoff of gRPC starts at one second.
+RECONNECT_MS = 10
+
+
+def measure(command: str, file_path: Path, parameters: str = "", timeout: float = TIMEOUT_S) -> dict[str, float]:
+    """
+    Start a server process and time its first requests.
+    :param command: Command line starting the server, {port} is replaced by a free port,
+                    that is also passed as ODS_EXD_API_PORT.
+    :param file_path: File requested by Open and GetStructure.
+    :param parameters: Parameters of the Open request.
+    :param timeout: Seconds to wait for the first GetStructure.
+    :return: Seconds from starting the process until the port accepts connections, until the first
+             GetStructure is answered and of a second GetStructure of the same file.
+    :raises grpc.FutureTimeoutError: If the server does not accept connections within the timeout.
+    """
+    port = free_port()
+    env = {**os.environ, "ODS_EXD_API_PORT": str(port)}
+    options = [
+        ("grpc.initial_reconnect_backoff_ms", RECONNECT_MS),
+        ("grpc.min_reconnect_backoff_ms", RECONNECT_MS),
+        ("grpc.max_reconnect_backoff_ms", RECONNECT_MS),
+    ]
+    start = time.perf_counter()
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        shlex.split(command.format(port=port)),
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with grpc.insecure_channel(f"localhost:{port}", options=options) as channel:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            connected = time.perf_counter() - start
+            stub = exd_grpc.ExternalDataReaderStub(channel)
+            identifier = exd_api.Identifier(url=file_path.absolute().as_uri(), parameters=parameters)
+            handle = stub.Open(identifier, timeout=timeout)
+            stub.GetStructure(exd_api.StructureRequest(handle=handle), timeout=timeout)
+            first_structure = time.perf_counter() - start
+            stub.Close(handle)
+
+            second = time.perf_counter()
+            handle = stub.Open(identifier, timeout=timeout)
+            stub.GetStructure(exd_api.StructureRequest(handle=handle), timeout=timeout)
+            second_structure = time.perf_counter() - second
+            stub.Close(handle)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return {"connect_s": connected, "first_structure_s": first_structure, "second_structure_s": second_structure}
+
+
+def run(commands: dict[str, str], file_path: Path, parameters: str = "", repeat: int = 3) -> dict[str, Any]:
+    """
+    Measure the commands alternately, so changing load of the machine affects all of them alike.
+    :param commands: Command line templates by name.
+    :param file_path: File requested by Open and GetStructure.
+    :param parameters: Parameters of the Open request.
+    :param repeat: Number of runs per command.
+    :return: Timings per command with a description of the environment.
+    """
+    timings: dict[str, dict[str, list[float]]] = {name: {} for name in commands}
+    for _ in range(repeat):
+        for name, command in commands.items():
+            logging.getLogger(__name__).info("Starting %s", name)
+            for key, seconds in measure(command, file_path, parameters).items():
+                timings[name].setdefault(key, []).append(seconds)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"file": str(file_path), "parameters": parameters, "repeat": repeat},
+        "commands": {
+            name: {
+                "command": commands[name],
+                **{key: _summary(seconds) for key, seconds in values.items()},
+            }
+            for name, values in timings.items()
+        },
+    }
+
+
+def _summary(seconds: list[float]) -> dict[str, float]:
+    return {"min_s": min(seconds), "median_s": statistics.median(seconds), "max_s": max(seconds)}
+
+
+def free_port() -> int:
+    """
+    Find a port of localhost no process listens on.
+    :return: Port number.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return int(sock.getsockname()[1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point, writes the results as JSON.
+    :param argv: Command line arguments, defaults to sys.argv.
+    :return: Exit code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--command", action="append", default=None, help="command template, may be repeated")
+    parser.add_argument("--file", type=Path, default=ROOT_DIR / "data" / "example.csv", help="file to request")
+    parser.add_argument("--parameters", default="", help="parameters of the Open request")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per command")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    commands = COMMANDS if args.command is None else {command: command for command in args.command}
+    results = run(commands, args.file, args.parameters, args.repeat)
+
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
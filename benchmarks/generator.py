@@ -0,0 +1,118 @@
+"""
+Deterministic generator of CSV files with the shapes the plugin meets in practice.
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+# Columns of the wide shape.
+WIDE_COLUMNS = 200
+# Rows of the wide shape are the requested rows divided by this factor, so the files are of similar size.
+WIDE_ROW_DIVISOR = 40
+
+
+@dataclass(frozen=True)
+class GeneratedFile:
+    """CSV file written by generate()."""
+
+    shape: str
+    path: Path
+    # parameters of the EXD-API Open request, passed to pd.read_csv
+    parameters: dict[str, Any]
+    number_of_rows: int
+    number_of_columns: int
+    # True if the plugin is expected to reject the file
+    reject: bool = False
+
+    @property
+    def parameters_json(self) -> str:
+        return json.dumps(self.parameters)
+
+
+@dataclass(frozen=True)
+class _Shape:
+    build: Callable[[np.random.Generator, int], pd.DataFrame]
+    parameters: dict[str, Any]
+    to_csv: dict[str, Any]
+    reject: bool = False
+
+
+def _long(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "index": np.arange(rows, dtype=np.int64),
+            "time": np.arange(rows) * 0.001,
+            "speed": rng.normal(50.0, 10.0, rows).round(6),
+            "torque": rng.normal(200.0, 25.0, rows).round(6),
+            "gear": rng.integers(0, 7, rows),
+        }
+    )
+
+
+def _wide(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    rows = max(rows // WIDE_ROW_DIVISOR, 1)
+    values = rng.normal(0.0, 1.0, (rows, WIDE_COLUMNS)).round(6)
+    return pd.DataFrame(values, columns=[f"channel_{index}" for index in range(WIDE_COLUMNS)])
+
+
+def _mixed(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    start = np.datetime64("2024-01-01T00:00:00", "ms")
+    return pd.DataFrame(
+        {
+            "counter": np.arange(rows, dtype=np.int64),
+            "timestamp": np.datetime_as_string(start + np.arange(rows) * np.timedelta64(10, "ms"), unit="ms"),
+            "temperature": rng.normal(20.0, 5.0, rows).round(3),
+            "status": rng.integers(0, 4, rows),
+        }
+    )
+
+
+def _quoted(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    labels = np.array(["idle, waiting", 'run "fast"', "stop, now", "plain"])
+    return pd.DataFrame(
+        {
+            "index": np.arange(rows, dtype=np.int64),
+            "label": labels[rng.integers(0, len(labels), rows)],
+            "value": rng.normal(0.0, 1.0, rows).round(6),
+        }
+    )
+
+
+def _text(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    words = np.array(["alpha", "beta", "gamma", "delta"])
+    return pd.DataFrame({"name": words[rng.integers(0, len(words), rows)], "comment": "not measured"})
+
+
+SHAPES: dict[str, _Shape] = {
+    "long": _Shape(_long, {}, {}),
+    "wide": _Shape(_wide, {}, {}),
+    "mixed": _Shape(_mixed, {}, {}),
+    "quoted": _Shape(_quoted, {}, {"quoting": csv.QUOTE_NONNUMERIC}),
+    "semicolon": _Shape(_long, {"sep": ";", "decimal": ","}, {"sep": ";", "decimal": ","}),
+    "no_header": _Shape(_long, {"header": None}, {"header": False}),
+    "text": _Shape(_text, {}, {}, reject=True),
+}
+
+
+def generate(shape: str, directory: Path, rows: int, seed: int = 0) -> GeneratedFile:
+    """
+    Write a CSV file of a shape. The same shape, rows and seed always result in the same content.
+    :param shape: Name of one of SHAPES.
+    :param directory: Directory to write the file to, named <shape>_<rows>_<seed>.csv.
+    :param rows: Number of rows, the wide shape has fewer rows with many columns.
+    :param seed: Seed of the random values.
+    :return: Description of the written file.
+    :raises KeyError: If the shape is unknown.
+    """
+    definition = SHAPES[shape]
+    df = definition.build(np.random.default_rng(seed), rows)
+    path = directory / f"{shape}_{rows}_{seed}.csv"
+    directory.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, lineterminator="\n", **definition.to_csv)
+    return GeneratedFile(shape, path, definition.parameters, len(df), len(df.columns), definition.reject)
@@ -0,0 +1,318 @@
+"""
+Drive concurrent EXD-API clients over gRPC against a locally started plugin server and write the results as JSON.
+
+Each client opens a generated file, requests its structure and some windows of values and closes it again,
+as long as the level runs. Levels with growing numbers of clients run one after the other against the same
+server, so the memory growth of a level includes files loaded by earlier ones. The server is started as
+subprocess with server.py by default, its thread pool size set by --max-workers like ODS_EXD_API_MAX_WORKERS.
+In-process servers share the interpreter with the clients, their latencies include waiting for the clients.
+
+    python -m benchmarks.load_test --clients 1 4 16 64 --duration 20 --max-workers 8 --output load.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent import futures
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import grpc
+import numpy as np
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api, exd_grpc
+from ods_exd_api_box.simple.file_simple import FileSimpleRegistry
+
+from benchmarks.bench_reader import environment
+from benchmarks.cold_start import RECONNECT_MS, ROOT_DIR, free_port
+from benchmarks.generator import SHAPES, GeneratedFile, generate
+from external_file_data import FILE_PATTERNS, FILE_TYPE_NAME, ExternalFile, ExternalFileData
+
+# pylint: disable=no-member
+
+CHANNEL_OPTIONS = [
+    ("grpc.initial_reconnect_backoff_ms", RECONNECT_MS),
+    ("grpc.min_reconnect_backoff_ms", RECONNECT_MS),
+    ("grpc.max_reconnect_backoff_ms", RECONNECT_MS),
+    ("grpc.max_receive_message_length", 512 * 1024 * 1024),
+]
+# Seconds to wait for a started server to accept connections.
+START_TIMEOUT_S = 60.0
+# Percentiles reported per operation.
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Session:
+    """Requests of a client between Open and Close."""
+
+    # GetValues per opened file
+    windows: int = 5
+    # rows requested by each GetValues
+    window_rows: int = 1000
+    # seconds a request may take before it counts as error
+    timeout: float = 60.0
+
+
+@dataclass
+class _Server:
+    port: int
+    # process whose memory is reported
+    pid: int
+
+
+@contextmanager
+def serve_subprocess(max_workers: int | None = None, script: str = "server.py") -> Iterator[_Server]:
+    """
+    Run the plugin server as subprocess on a free port until the context is left.
+    :param max_workers: Threads of the gRPC server, defaults to the one of ods_exd_api_box.
+    :param script: Entry point of the plugin, relative to the repository.
+    :raises grpc.FutureTimeoutError: If the server does not accept connections in time.
+    """
+    port = free_port()
+    env = {**os.environ, "ODS_EXD_API_PORT": str(port)}
+    if max_workers is not None:
+        env["ODS_EXD_API_MAX_WORKERS"] = str(max_workers)
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, script], cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with grpc.insecure_channel(f"localhost:{port}", options=CHANNEL_OPTIONS) as channel:
+            grpc.channel_ready_future(channel).result(timeout=START_TIMEOUT_S)
+        yield _Server(port, process.pid)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+@contextmanager
+def serve_in_process(max_workers: int | None = None) -> Iterator[_Server]:
+    """
+    Run the plugin server in the current process on a free port until the context is left.
+    :param max_workers: Threads of the gRPC server, defaults to the one of ods_exd_api_box.
+    """
+    FileSimpleRegistry.register(ExternalFileData.create)
+    FileHandlerRegistry.register(
+        file_type_name=FILE_TYPE_NAME, factory=ExternalFile.create, file_patterns=FILE_PATTERNS
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers or 2 * multiprocessing.cpu_count()))
+    exd_grpc.add_ExternalDataReaderServicer_to_server(ExternalDataReader(), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    try:
+        yield _Server(port, os.getpid())
+    finally:
+        server.stop(None)
+
+
+def run_level(
+    port: int, files: list[GeneratedFile], clients: int, duration: float, session: Session, seed: int = 0
+) -> dict[str, Any]:
+    """
+    Run concurrent clients against a server, each with its own channel.
+    :param port: Port of the server on localhost.
+    :param files: Files opened by the clients, picked at random.
+    :param clients: Number of concurrent clients.
+    :param duration: Seconds the clients start new sessions.
+    :param session: Requests of a session.
+    :param seed: Seed of the picked files and windows.
+    :return: Sessions, requests, errors and latency percentiles per operation.
+    """
+    start = time.perf_counter()
+    deadline = start + duration
+    with futures.ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(
+            executor.map(
+                lambda client: _client(port, files, deadline, session, np.random.default_rng([seed, client])),
+                range(clients),
+            )
+        )
+    elapsed = time.perf_counter() - start
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    for client_latencies, client_errors, _ in results:
+        for operation, seconds in client_latencies.items():
+            latencies[operation].extend(seconds)
+        errors.update(client_errors)
+    sessions = sum(client_sessions for _, _, client_sessions in results)
+    requests = sum(len(seconds) for seconds in latencies.values())
+    return {
+        "clients": clients,
+        "duration_s": elapsed,
+        "sessions": sessions,
+        "requests": requests,
+        "sessions_per_s": sessions / elapsed,
+        "requests_per_s": requests / elapsed,
+        "errors": dict(errors),
+        "operations": {operation: _percentiles(seconds) for operation, seconds in latencies.items()},
+    }
+
+
+def run(
+    files: list[GeneratedFile],
+    levels: list[int],
+    duration: float,
+    session: Session,
+    max_workers: int | None = None,
+    in_process: bool = False,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Start a server and run the levels of concurrent clients against it one after the other.
+    :param files: Files opened by the clients.
+    :param levels: Numbers of concurrent clients.
+    :param duration: Seconds per level.
+    :param session: Requests of a session.
+    :param max_workers: Threads of the gRPC server.
+    :param in_process: Run the server in the current process instead of a subprocess.
+    :param seed: Seed of the picked files and windows.
+    :return: Results of all levels with the memory of the server and a description of the environment.
+    """
+    serve = serve_in_process if in_process else serve_subprocess
+    results = []
+    with serve(max_workers) as server:
+        for clients in levels:
+            logging.getLogger(__name__).info("Running %d clients for %.1f s", clients, duration)
+            rss_before = _rss_mb(server.pid)
+            result = run_level(server.port, files, clients, duration, session, seed)
+            rss_after = _rss_mb(server.pid)
+            result.update(
+                rss_before_mb=rss_before,
+                rss_after_mb=rss_after,
+                rss_growth_mb=None if rss_before is None or rss_after is None else round(rss_after - rss_before, 1),
+            )
+            results.append(result)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": asdict(ExternalFileData.config),
+        "settings": {
+            "server": "in-process" if in_process else "subprocess",
+            "max_workers": max_workers,
+            "duration_s": duration,
+            "files": [generated.path.name for generated in files],
+            **asdict(session),
+        },
+        "levels": results,
+    }
+
+
+def _client(
+    port: int, files: list[GeneratedFile], deadline: float, session: Session, rng: np.random.Generator
+) -> tuple[dict[str, list[float]], Counter[str], int]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    sessions = 0
+
+    def timed(operation: str, call, request):
+        start = time.perf_counter()
+        response = call(request, timeout=session.timeout)
+        latencies[operation].append(time.perf_counter() - start)
+        return response
+
+    with grpc.insecure_channel(f"localhost:{port}", options=CHANNEL_OPTIONS) as channel:
+        stub = exd_grpc.ExternalDataReaderStub(channel)
+        while time.perf_counter() < deadline:
+            generated = files[rng.integers(len(files))]
+            identifier = exd_api.Identifier(
+                url=generated.path.absolute().as_uri(), parameters=generated.parameters_json
+            )
+            handle = None
+            try:
+                handle = timed("open", stub.Open, identifier)
+                structure = timed("structure", stub.GetStructure, exd_api.StructureRequest(handle=handle))
+                group = structure.groups[0]
+                channel_ids = [channel.id for channel in group.channels]
+                rows = min(session.window_rows, group.number_of_rows)
+                for offset in rng.integers(0, group.number_of_rows - rows + 1, session.windows):
+                    request = exd_api.ValuesRequest(
+                        handle=handle, group_id=0, channel_ids=channel_ids, start=int(offset), limit=rows
+                    )
+                    timed("values", stub.GetValues, request)
+                timed("close", stub.Close, handle)
+                handle = None
+                sessions += 1
+            except grpc.RpcError as e:
+                errors[e.code().name] += 1  # pylint: disable=no-member
+                if handle is not None:
+                    try:
+                        stub.Close(handle, timeout=session.timeout)
+                    except grpc.RpcError:
+                        pass
+    return latencies, errors, sessions
+
+
+def _percentiles(seconds: list[float]) -> dict[str, Any]:
+    values = np.percentile(seconds, PERCENTILES)
+    return {
+        "count": len(seconds),
+        **{f"p{percentile}_s": float(value) for percentile, value in zip(PERCENTILES, values)},
+        "max_s": max(seconds),
+    }
+
+
+def _rss_mb(pid: int) -> float | None:
+    """Resident memory of a process, None if /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point, writes the results as JSON.
+    :param argv: Command line arguments, defaults to sys.argv.
+    :return: Exit code.
+    """
+    shapes = [shape for shape, definition in SHAPES.items() if not definition.reject]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16], help="concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--max-workers", type=int, default=None, help="threads of the gRPC server")
+    parser.add_argument("--in-process", action="store_true", help="run the server in this process")
+    parser.add_argument("--rows", type=int, default=100000, help="rows of the generated files")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated values and requests")
+    parser.add_argument("--shapes", nargs="+", choices=shapes, default=["long", "wide", "mixed"], help="files")
+    parser.add_argument("--windows", type=int, default=Session.windows, help="GetValues per opened file")
+    parser.add_argument("--window-rows", type=int, default=Session.window_rows, help="rows of each GetValues")
+    parser.add_argument("--data-dir", type=Path, default=None, help="keep the generated files in this directory")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    session = Session(windows=args.windows, window_rows=args.window_rows)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or Path(temp_dir)
+        files = [generate(shape, data_dir, args.rows, args.seed) for shape in args.shapes]
+        results = run(files, args.clients, args.duration, session, args.max_workers, args.in_process, args.seed)
+    results["settings"].update(rows=args.rows, seed=args.seed)
+
+    text = json.dumps(results, indent=2, default=str)
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
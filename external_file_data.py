@@ -2,12 +2,71 @@
 ExternalFileData class to read data from an external file using pandas.
 """
 
+import importlib.util
+import io
 import logging
-from typing import override
+import os
+import threading
+import time
+from typing import Any, Callable, cast, override
 
 import pandas as pd
 
+from ods_exd_api_box import NotMyFileError, exd_api
+from ods_exd_api_box.simple.file_simple import FileSimple, FileSimpleCache, FileSimpleRegistry
 from ods_exd_api_box.simple.file_simple_interface import FileSimpleInterface
+from ods_exd_api_box.utils.attribute_helper import AttributeHelper
+from pandascsv import (
+    ColumnBuffers,
+    ColumnStatistics,
+    CompactFrame,
+    DirectoryWatcher,
+    DiskCache,
+    FileKey,
+    FrameRegistry,
+    HandleReaper,
+    LazyFrame,
+    Metrics,
+    MetricsServer,
+    PluginConfig,
+    Pyramid,
+    RejectionCache,
+    RowIndex,
+    SharedFrame,
+    SharedStore,
+    StreamFrame,
+    TailReader,
+    choose_engine,
+    deduplicate_columns,
+    flag_missing,
+    pyarrow_available,
+    python_fallback_reason,
+    read_parallel,
+)
+
+# Name of the file type the plugin is registered for.
+FILE_TYPE_NAME = "PANDASCSV"
+
+# Compressed files are decompressed by pd.read_csv based on the extension.
+FILE_PATTERNS = ["*.csv", "*.csv.gz", "*.csv.bz2", "*.csv.xz"]
+if importlib.util.find_spec("zstandard") is not None:
+    # pd.read_csv needs the optional zstandard package for zstd compressed files
+    FILE_PATTERNS.append("*.csv.zst")
+
+# Largest stride of the row index built to count rows and to spread samples if no windowed index is configured.
+STRUCTURE_INDEX_STRIDE = 1 << 16
+
+# Parameter of the plugin, not passed to pd.read_csv: open a decimated preview with at most this many rows.
+PREVIEW_PARAMETER = "preview_rows"
+
+# Seconds after a client request during which new files are not prepared in the background.
+REQUEST_QUIET_S = 1.0
+
+# Rows parsed by prime_parser() before the first request.
+PRIME_SAMPLE = b"index,time,value,label\n0,0.0,1.5,a\n1,0.001,2.5,b\n2,0.002,,c\n"
+
+# Set on threads preparing new files, their requests are not client traffic.
+_BACKGROUND = threading.local()
 
 
 class ExternalFileData(FileSimpleInterface):
@@ -15,6 +74,23 @@ class ExternalFileData(FileSimpleInterface):
     Concrete implementation for reading CSV files.
     """
 
+    config: PluginConfig = PluginConfig.from_env()
+    # parsed files shared by all handles of the process
+    frames: FrameRegistry = FrameRegistry(config.shared_max_mb * 1024 * 1024)
+    # files rejected by not_my_file(), answered without parsing them until they change
+    rejections: RejectionCache = RejectionCache(config.cache_dir, config.rejected_max_entries)
+    # drops the parsed data of handles clients left open
+    reaper: HandleReaper = HandleReaper(
+        config.idle_ttl_s,
+        config.high_watermark_mb * 1024 * 1024,
+        lambda: ExternalFileData.frames.nbytes(),
+        trim=lambda target_bytes: ExternalFileData.frames.trim(target_bytes),
+    )
+    # time.monotonic() of the last request of a client
+    last_request: float = 0.0
+    # phase timings and counters, served by start_metrics()
+    metrics: Metrics = Metrics()
+
     @classmethod
     @override
     def create(cls, file_path: str, parameters: dict) -> FileSimpleInterface:
@@ -26,31 +102,443 @@ class ExternalFileData(FileSimpleInterface):
         Initialize the ExternalFileData class.
         :param file_path: Path to the external file.
         :param parameters: Parameters for reading the file (e.g., delimiter, header). Check pd.read_csv for details.
+            `preview_rows` opens a decimated preview of the file instead, see data().
+        :raises ValueError: If `preview_rows` is not a positive integer.
         """
         self.file_path: str = file_path
-        self.parameters: dict = parameters
-        self.df: pd.DataFrame | None = None
+        self.parameters: dict = dict(parameters)
+        preview_rows = self.parameters.pop(PREVIEW_PARAMETER, None)
+        self.preview_rows: int | None = None if preview_rows is None else int(preview_rows)
+        if self.preview_rows is not None and self.preview_rows <= 0:
+            raise ValueError(f"{PREVIEW_PARAMETER} must be positive, got {preview_rows}.")
+        self.bucket_rows: int = 1
+        self.source_rows: int = 0
+        self.df: pd.DataFrame | CompactFrame | LazyFrame | SharedFrame | StreamFrame | None = None
+        self.frame_key: FileKey | None = None
+        self.statistics: ColumnStatistics | None = None
+        self.statistics_key: FileKey | None = None
+        self.buffers: ColumnBuffers | None = None
+        # leading rows parsed by not_my_file(), until the file is loaded
+        self.sample: pd.DataFrame | None = None
+        self.parse_error: pd.errors.ParserError | NotMyFileError | None = None
+        self.tail: TailReader | None = None
+        # concurrent requests on the handle wait for the first one to load the file
+        self._lock = threading.RLock()
+        self.last_used = time.monotonic()
         self.log = logging.getLogger(__name__)
+        self.reaper.register(self)
 
     @override
     def close(self) -> None:
         """
         Close the file and release resources.
         """
-        if self.df is not None:
-            self.log.info("Closing file: %s", self.file_path)
-            del self.df
-            self.df = None
+        with self._lock:
+            if self.df is not None:
+                self.log.info("Closing file: %s", self.file_path)
+                self._release()
+            self.sample = None
+
+    def unload(self) -> bool:
+        """
+        Drop the parsed data of an unused handle. The handle stays open and loads the data again on next use.
+        :return: True if data was dropped, False if there was none or a request is in progress.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self.df is None or self.parse_error is not None:
+                return False
+            self.log.info("Dropping parsed data of unused file: %s", self.file_path)
+            self._release()
+            return True
+        finally:
+            self._lock.release()
+
+    def _touch(self) -> None:
+        self.last_used = time.monotonic()
+        if not getattr(_BACKGROUND, "active", False):
+            ExternalFileData.last_request = self.last_used
+
+    def _release(self) -> None:
+        if self.frame_key is not None:
+            self.frames.release(self.frame_key)
+            self.frame_key = None
+        if self.statistics_key is not None:
+            self.frames.release(self.statistics_key)
+            self.statistics_key = None
+        self.statistics = None
+        self.buffers = None
+        self.sample = None
+        self.tail = None
+        del self.df
+        self.df = None
 
     @override
     def not_my_file(self) -> bool:
         """
         Check if the file should be read with this plugin.
+        Only the first `config.probe_rows` rows are parsed, unless the file was already read or is cached.
+        Rejected files are remembered, so they are not parsed again until they change.
         :return: True if the file should not be read with this plugin, False otherwise.
         """
+        with self._lock:
+            self._touch()
+            if self.df is None:
+                reason = self.rejections.rejected(self._rejection_key())
+                if reason is not None:
+                    self.log.info("Not My File: File %s was rejected before: %s", self.file_path, reason)
+                    return True
+
+            try:
+                reason = self._rejection_reason()
+            except ImportError as e:
+                # e.g. zstd compressed files without the zstandard package, not remembered as the file is not at fault
+                self.log.warning("Not My File: Missing package to read file %s: %s", self.file_path, e)
+                return True
+            if reason is not None:
+                self.rejections.reject(self._rejection_key(), reason)
+                return True
+            return False
+
+    @override
+    def data(self) -> pd.DataFrame:
+        """
+        Read the data from the file and return it as a pandas DataFrame.
+        The data is shared read-only with all other handles of the same file and parameters.
+        With `config.lazy_columns` a LazyFrame is returned for files larger than the probe,
+        which provides the DataFrame members used by FileSimple and parses columns on demand.
+        With `config.stream_max_rows` a StreamFrame is returned for files larger than a chunk.
+        With `config.shared_store_dir` a SharedFrame is returned for files parsed as a whole, mapping the columns
+        one process of the host published in shared memory.
+        With `config.compact_dtypes` a CompactFrame is returned if columns could be narrowed and were not shared.
+        With `config.incremental` the file is owned by the handle and rows appended to it are parsed on each call.
+        With the `preview_rows` parameter the finest level of the shared decimation pyramid of the file with at
+        most that many rows is returned. Each row is a bucket of `bucket_rows` rows of the file and holds
+        the first, smallest, largest and last value of each numeric column.
+        :return: DataFrame containing the data from the file.
+        :raises NotMyFileError: If the file could not be parsed with the given parameters.
+        """
+        with self._lock:
+            self._touch()
+            if self.df is None or self.tail is not None:
+                self.parse_error = None
+                try:
+                    if self.preview_rows is not None:
+                        # one pyramid per file, shared by previews of all sizes
+                        frame_key = self._derived_key("pyramid")
+                        pyramid = cast(Pyramid, self.frames.acquire(frame_key, self._load_pyramid))
+                        self.frame_key = frame_key
+                        self.bucket_rows, self.df = pyramid.level(self.preview_rows)
+                        self.source_rows = pyramid.number_of_rows
+                    elif self.tail is not None:
+                        self.df = self.tail.refresh()
+                    elif self.config.incremental and TailReader.supports(self.parameters, self.file_path):
+                        self.tail = TailReader(self.file_path, self._read_csv)
+                        self.df = self.tail.refresh()
+                    else:
+                        frame_key = FileKey.of(self.file_path, self.parameters)
+                        self.df = self.frames.acquire(frame_key, self._load)
+                        self.frame_key = frame_key
+                except (pd.errors.ParserError, NotMyFileError) as e:
+                    # NotMyFileError of frames parsing the file in parts, e.g. a ragged row of a streamed file
+                    self.log.info("Not My File: Error reading file %s: %s", self.file_path, e)
+                    self.parse_error = e
+                    self.tail = None
+                    self.df = pd.DataFrame()
+                    self.rejections.reject(self._rejection_key(), str(e))
+            if self.df is None:
+                self.df = pd.DataFrame()
+            if self.parse_error is not None:
+                raise NotMyFileError(str(self.parse_error))
+            # the stand-ins only mimic the DataFrame members FileSimple relies on
+            return cast(pd.DataFrame, self.df)
+
+    @override
+    def group_attributes(self) -> dict[str, Any]:
+        """
+        Describe the decimation of a preview, so clients can map buckets back to rows of the file.
+        :return: Rows per bucket and rows of the file for previews, no attributes otherwise.
+        """
+        if self.preview_rows is None:
+            return {}
+        self.data()
+        return {"preview_bucket_rows": self.bucket_rows, "preview_source_rows": self.source_rows}
+
+    def column_attributes(self) -> list[dict[str, Any]]:
+        """
+        Return attributes of the channels, the column statistics if `config.column_statistics` is set.
+        Statistics are shared by all handles of the file and kept in the disk cache next to its parsed copy.
+        :return: List of attributes per column (empty list for no attributes).
+        """
+        if not self.config.column_statistics or self.preview_rows is not None:
+            return []
+        frame = self.data()
+        with self._lock:
+            if self.tail is not None:
+                # the file grows, so the statistics of the rows read so far are not shared
+                return ColumnStatistics.compute(frame).columns
+            if self.statistics is None:
+                statistics_key = self._derived_key("statistics")
+                self.statistics = cast(ColumnStatistics, self.frames.acquire(statistics_key, self._load_statistics))
+                self.statistics_key = statistics_key
+            return self.statistics.columns
+
+    def column_buffers(self) -> ColumnBuffers | None:
+        """
+        Return the columns of the handle as contiguous buffers for GetValues, each converted on its first request.
+        Frames parsing rows on demand and files followed incrementally are not buffered.
+        :return: Buffers of the current frame, None if it is not buffered.
+        """
+        frame = self.data()
+        with self._lock:
+            if self.tail is not None or isinstance(frame, (LazyFrame, StreamFrame)):
+                return None
+            if self.buffers is None or self.buffers.frame is not frame:
+                self.buffers = ColumnBuffers(frame)
+            return self.buffers
+
+    def _derived_key(self, name: str) -> FileKey:
+        """Key of data derived from the parsed file, registered next to it."""
+        return FileKey.of(self.file_path, {**self.parameters, "__derived__": name})
+
+    def _load_statistics(self) -> ColumnStatistics:
+        """
+        Load the cached column statistics of the file or compute them from the frame of the handle.
+        :return: Statistics of the file.
+        """
+        cache = self._disk_cache()
+        if cache is not None:
+            columns = cache.load_statistics(self.file_path, self.parameters)
+            if columns is not None:
+                return ColumnStatistics(columns)
+        self.log.info("Computing column statistics of file %s", self.file_path)
+        with self.metrics.time("statistics"):
+            statistics = ColumnStatistics.compute(self.df)
+        if cache is not None:
+            cache.store_statistics(self.file_path, self.parameters, statistics.columns)
+        return statistics
+
+    def _load(self) -> pd.DataFrame | CompactFrame | LazyFrame | SharedFrame | StreamFrame:
+        """
+        Load the content of the file, preferring a cached copy over parsing the file.
+        :return: DataFrame or one of its stand-ins containing the data from the file.
+        """
+        with self.metrics.time("load"):
+            try:
+                return self._load_frame()
+            finally:
+                self.sample = None
+
+    def _load_frame(self) -> pd.DataFrame | CompactFrame | LazyFrame | SharedFrame | StreamFrame:
+        cache = self._disk_cache()
+        if cache is not None:
+            with self.metrics.time("cache_load"):
+                cached = cache.load(self.file_path, self.parameters)
+            self.metrics.add("cache_requests_total", cache="disk", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+        if self.config.stream_max_rows > 0 and StreamFrame.supports(self.parameters):
+            self.log.info("Streaming file: %s", self.file_path)
+            return StreamFrame.scan(self._read_csv, self.config.stream_max_rows, self.config.stream_spill_dir)
+
+        if self.config.lazy_columns and LazyFrame.supports(self.parameters):
+            sample = self._probe()
+            if self.df is not None:
+                # the probe covered the whole file
+                return self.df
+            self.log.info("Reading columns of file on demand: %s", self.file_path)
+            if not RowIndex.supports(self.parameters, self.file_path):
+                return LazyFrame(self._read_csv, sample, self.parameters)
+
+            # the scan provides the number of rows and spread samples without parsing the file
+            windowed = self.config.row_index_stride > 0
+            block_rows = max(self.config.probe_rows // max(self.config.sample_blocks, 1), 1)
+            # each sample block is parsed from the indexed row before it, so the stride is not larger than a block
+            stride = self.config.row_index_stride if windowed else min(STRUCTURE_INDEX_STRIDE, block_rows)
+            with self.metrics.time("index"):
+                row_index = RowIndex.build(self.file_path, self.parameters, stride)
+            frame = LazyFrame(self._read_csv, sample, self.parameters, row_index, windowed)
+            frame.widen_dtypes(self.config.sample_blocks, block_rows)
+            return frame
+
+        store = self._shared_store()
+        if store is not None:
+            # other processes of the host map the published columns instead of parsing the file
+            shared = store.acquire(FileKey.of(self.file_path, self.parameters), lambda: self._read_and_cache(cache))
+            mapped = isinstance(shared, SharedFrame) and not shared.published
+            self.metrics.add("cache_requests_total", cache="shared", result="hit" if mapped else "miss")
+            if isinstance(shared, SharedFrame):
+                return shared
+            df = shared
+        else:
+            df = self._read_and_cache(cache)
+        if self.config.compact_dtypes:
+            with self.metrics.time("compact"):
+                return CompactFrame.compact(df, self.config.compact_floats)
+        return df
+
+    def _read_and_cache(self, cache: DiskCache | None) -> pd.DataFrame:
+        """
+        Parse the whole file and store a binary copy in the disk cache.
+        :param cache: Disk cache to store the copy in, None if there is none.
+        :return: DataFrame containing the data from the file.
+        """
+        df = self._read_file()
+        if cache is not None:
+            with self.metrics.time("cache_store"):
+                cache.store(self.file_path, self.parameters, df)
+        return df
+
+    def _load_pyramid(self) -> Pyramid:
+        """
+        Decimate the shared frame of the file, which is loaded if no other handle uses it.
+        :return: Decimation pyramid of the file.
+        """
+        frame_key = FileKey.of(self.file_path, self.parameters)
+        frame = self.frames.acquire(frame_key, self._load)
+        try:
+            self.log.info("Building preview pyramid of file %s", self.file_path)
+            return Pyramid.build(frame)
+        finally:
+            self.frames.release(frame_key)
+
+    def _disk_cache(self) -> DiskCache | None:
+        if self.config.cache_dir is None:
+            return None
+        return DiskCache(self.config.cache_dir, self.config.cache_max_mb * 1024 * 1024)
+
+    def _shared_store(self) -> SharedStore | None:
+        if self.config.shared_store_dir is None or not SharedStore.supported():
+            return None
+        return SharedStore(self.config.shared_store_dir, self.config.shared_store_max_mb * 1024 * 1024)
+
+    def _read_file(self) -> pd.DataFrame:
+        """
+        Parse the whole file with the engine chosen for its size and parameters.
+        Large files read with the C engine are parsed in chunks on `config.parse_workers` threads.
+        Columns the pyarrow engine does not parse to numbers are parsed again with the C engine,
+        so the dtypes do not depend on the engine.
+        :return: DataFrame containing the data from the file.
+        """
+        file_size = os.path.getsize(self.file_path)
+        pyarrow_min_bytes = self.config.pyarrow_min_mb * 1024 * 1024
+        engine = choose_engine(self.parameters, file_size, self.config.engine, pyarrow_min_bytes)
+        reason = python_fallback_reason(self.parameters)
+        if engine == "python" and reason is not None:
+            self.log.warning("Reading file %s with the slow python engine, %s", self.file_path, reason)
+        else:
+            self.log.info("Reading file %s with the %s engine", self.file_path, engine)
+        self.metrics.add("parsed_file_bytes_total", file_size, engine=engine)
+        if engine == "c" and self._parallel(file_size):
+            sample = self._read_csv(nrows=self.config.probe_rows)
+            with self.metrics.time("index"):
+                row_index = RowIndex.build(self.file_path, self.parameters, STRUCTURE_INDEX_STRIDE)
+            return read_parallel(self._read_csv, row_index, sample.columns, self.config.parse_workers)
+        if engine != "pyarrow":
+            return self._read_csv(engine=engine)
+
+        try:
+            df = self._read_csv(engine="pyarrow")
+        except ValueError as e:
+            self.log.warning("The pyarrow engine could not read file %s, using the C engine: %s", self.file_path, e)
+            return self._read_csv(engine="c")
+        if self.parameters.get("names") is None:
+            df.columns = deduplicate_columns(df.columns.tolist())
+        # pyarrow parses dates and times the C engine keeps as strings
+        positions = [position for position, dtype in enumerate(df.dtypes) if dtype.kind not in "biuf"]
+        if positions:
+            with self.metrics.time("convert"):
+                text = self._read_csv(engine="c", usecols=positions)
+                for column, position in enumerate(positions):
+                    df.isetitem(position, text.iloc[:, column])
+        return df
+
+    def _parallel(self, file_size: int) -> bool:
+        """Check if the file is large enough and read with parameters allowing to parse chunks of rows on their own."""
+        return (
+            self.config.parse_workers > 1
+            and file_size >= self.config.parallel_min_mb * 1024 * 1024
+            and LazyFrame.supports(self.parameters)
+            and RowIndex.supports(self.parameters, self.file_path)
+        )
+
+    def _read_csv(self, source=None, **overrides) -> pd.DataFrame:
+        """
+        Parse the file with the given parameters.
+        :param source: Buffer to parse instead of the file, e.g. a part of the file.
+        :param overrides: Parameters replacing the ones given on construction.
+        :return: DataFrame containing the parsed data.
+        """
+        parameters = {**self.parameters, **overrides}
+        if parameters.get("engine") is None and python_fallback_reason(parameters) is not None:
+            # pd.read_csv warns about falling back to the python engine unless it is chosen explicitly
+            parameters["engine"] = "python"
+        with self.metrics.time("read_csv", engine=str(parameters.get("engine") or "c")):
+            df = pd.read_csv(self.file_path if source is None else source, **parameters)
+        if isinstance(df, pd.DataFrame):
+            self.metrics.add("parsed_rows_total", len(df))
+        return df
+
+    def _probe(self) -> pd.DataFrame:
+        """
+        Parse the leading rows of the file with the given parameters.
+        If the probe already covers the whole file, it is kept as result of data(),
+        unless the file may grow or a preview is requested.
+        :return: DataFrame containing the leading rows of the file.
+        """
+        if "skipfooter" in self.parameters:
+            # pandas does not allow nrows together with skipfooter
+            return self.data()
+        if self.sample is not None:
+            return self.sample
+
+        requested_rows = self.parameters.get("nrows")
+        probe_rows = self.config.probe_rows
+        nrows = probe_rows if requested_rows is None else min(probe_rows, requested_rows)
+        self.log.debug("Probing first %d rows of file: %s", nrows, self.file_path)
+        sample = self._read_csv(nrows=nrows)
+        keep = not self.config.incremental and self.preview_rows is None
+        if keep and (sample.shape[0] < nrows or nrows == requested_rows):
+            self.df = sample
+        elif keep:
+            # loading the file after not_my_file() reuses the probe
+            self.sample = sample
+        return sample
+
+    def _rejection_key(self) -> FileKey:
+        """Key of the decision of not_my_file(), which also depends on the configuration, e.g. the probe rows."""
+        return FileKey.of(self.file_path, {**self.parameters, "__config__": repr(self.config)})
+
+    def _rejection_reason(self) -> str | None:
+        """
+        Check the file, parsing only the probe unless the file was already read or is cached.
+        :return: Why the file should not be read with this plugin, None if it should.
+        :raises ImportError: If a package needed to read the file is not installed.
+        """
+        cache = self._disk_cache()
+        if self.df is None and cache is not None and cache.contains(self.file_path, self.parameters):
+            # loading the cached copy is cheaper than parsing the probe
+            try:
+                self.data()
+            except NotMyFileError as e:
+                return str(e)
+        if self.df is not None:
+            if self.parse_error is not None:
+                return str(self.parse_error)
+            return "no numeric columns" if self._not_my_data(self.df) else None
+
+        try:
+            sample = self._probe()
+        except (pd.errors.ParserError, NotMyFileError) as e:
+            self.log.info("Not My File: Error probing file %s: %s", self.file_path, e)
+            return str(e)
+        return "no numeric columns" if self._not_my_data(sample) else None
+
+    def _not_my_data(self, df: pd.DataFrame | CompactFrame | LazyFrame | SharedFrame | StreamFrame) -> bool:
         # If the CSV file contains only a single column or all columns have datatype string,
         # we assume that it is not meant to be parsed with this plugin.
-        df = self.data()
         if df.empty or len(df.columns) == 1 or all(df.dtypes == "object"):
             self.log.info(
                 "File %s is not a valid CSV file for this plugin with parameters '%s'.",
@@ -60,27 +548,209 @@ class ExternalFileData(FileSimpleInterface):
             return True
         return False
 
+
+class ExternalFile(FileSimple):
+    """
+    FileSimple adding the channel attributes of ExternalFileData, like column statistics, to the structure.
+    Requests are timed and profiled with ExternalFileData.metrics.
+    """
+
+    def __init__(self, file_path: str, parameters: str = ""):
+        super().__init__(file_path, parameters)
+        self.file_path = file_path
+
+    @classmethod
+    def prepare(cls, file_path: str, parameters: str = "") -> exd_api.StructureResult:
+        """
+        Extract the structure of a file like GetStructure and close the file again,
+        so the caches hold the parsed file and its statistics or the rejection of the file.
+        ExternalFileData must be registered with FileSimpleRegistry.
+        :param file_path: Path of the file.
+        :param parameters: Parameters formatted like the parameters of an EXD-API Open request.
+        :return: Structure of the file.
+        :raises NotMyFileError: If the file is not meant for this plugin.
+        """
+        file = cls(file_path, parameters)
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            return structure
+        finally:
+            file.close()
+
     @override
-    def data(self) -> pd.DataFrame:
+    def fill_structure(self, structure: exd_api.StructureResult) -> None:
+        metrics = ExternalFileData.metrics
+        with metrics.profile(self.file_path), metrics.time("structure"):
+            self._fill_structure(structure)
+
+    @override
+    def get_values(self, request: exd_api.ValuesRequest) -> exd_api.ValuesResult:
+        metrics = ExternalFileData.metrics
+        with metrics.profile(self.file_path), metrics.time("values"):
+            result = self._get_values(request)
+        metrics.add("served_values_total", sum(_number_of_values(channel) for channel in result.channels))
+        return result
+
+    def _get_values(self, request: exd_api.ValuesRequest) -> exd_api.ValuesResult:
         """
-        Read the data from the file and return it as a pandas DataFrame.
-        :return: DataFrame containing the data from the file.
+        Serve numeric channels from the column buffers of ExternalFileData, others like FileSimple does.
+        Missing float values are flagged on both paths, so responses do not depend on the configuration.
         """
-        if self.df is None:
-            self.log.info("Reading file: %s", self.file_path)
-            try:
-                self.df = pd.read_csv(self.file_path, **self.parameters)
-            except pd.errors.ParserError as e:
-                self.log.info("Not My File: Error reading file %s: %s", self.file_path, e)
-                self.df = pd.DataFrame()
-        if self.df is None:
-            self.df = pd.DataFrame()
-        return self.df
+        file = cast(FileSimpleCache | None, self.file)
+        file_data = None if file is None else file._external_data_pandas()  # pylint: disable=protected-access
+        buffers = file_data.column_buffers() if isinstance(file_data, ExternalFileData) else None
+        if file is None or buffers is None or request.group_id != 0:
+            result = super().get_values(request)
+            for channel in result.channels:
+                flag_missing(channel)
+            return result
+
+        number_of_rows = file.number_of_rows()
+        if request.start >= number_of_rows:
+            raise ValueError(f"Channel start index {request.start} out of range!")
+        stop = min(request.start + request.limit, number_of_rows)
+        channels: dict[int, exd_api.ValuesResult.ChannelValues] = {}
+        for channel_index in request.channel_ids:
+            if channel_index >= file.number_of_columns():
+                raise ValueError(f"Invalid channel id {channel_index}!")
+            data_type = file.column_datatype(channel_index)
+            buffer = buffers.column(channel_index, data_type)
+            if buffer is not None:
+                channel = exd_api.ValuesResult.ChannelValues(id=channel_index)
+                channel.values.data_type = data_type
+                buffer.fill(channel, data_type, request.start, stop)
+                channels[channel_index] = channel
+
+        others = [channel_index for channel_index in request.channel_ids if channel_index not in channels]
+        if others:
+            others_request = exd_api.ValuesRequest()
+            others_request.CopyFrom(request)
+            others_request.ClearField("channel_ids")
+            others_request.channel_ids.extend(others)
+            for channel in super().get_values(others_request).channels:
+                flag_missing(channel)
+                channels[channel.id] = channel
+        result = exd_api.ValuesResult(id=request.group_id)
+        result.channels.extend(channels[channel_index] for channel_index in request.channel_ids)
+        return result
+
+    def _fill_structure(self, structure: exd_api.StructureResult) -> None:
+        super().fill_structure(structure)
+        file = cast(FileSimpleCache, self.file)
+        file_data = file._external_data_pandas()  # pylint: disable=protected-access
+        if isinstance(file_data, ExternalFileData):
+            for channel, attributes in zip(structure.groups[-1].channels, file_data.column_attributes()):
+                AttributeHelper.add(channel.attributes, attributes)
+
+
+def start_watcher(config: PluginConfig) -> DirectoryWatcher | None:
+    """
+    Prepare files showing up below `config.watch_dirs` in the background, before the importer requests them.
+    :param config: Configuration of the plugin.
+    :return: Running watcher, None if no directories are configured.
+    """
+    roots = [root for root in config.watch_dirs.split(os.pathsep) if root]
+    if not roots:
+        return None
+    if config.cache_dir is None and config.shared_max_mb <= 0:
+        logging.getLogger(__name__).warning("No cache directory or shared memory configured to keep new files in")
+    watcher = DirectoryWatcher(
+        roots,
+        FILE_PATTERNS,
+        _prepare_in_background,
+        workers=config.watch_workers,
+        queue_size=config.watch_queue_size,
+        settle=config.watch_settle_s,
+        polling=config.watch_polling,
+        busy=lambda: time.monotonic() - ExternalFileData.last_request < REQUEST_QUIET_S,
+    )
+    watcher.start()
+    return watcher
+
+
+def start_metrics(config: PluginConfig) -> MetricsServer | None:
+    """
+    Serve the metrics of the plugin and the profiler on a local HTTP endpoint.
+    :param config: Configuration of the plugin.
+    :return: Running server, None if `config.metrics_port` is 0.
+    """
+    if config.metrics_port <= 0:
+        return None
+    metrics = ExternalFileData.metrics
+    metrics.register(
+        "frame_bytes",
+        "gauge",
+        "Memory of the parsed files of the process, shared by the handles using them.",
+        lambda: [
+            ({"path": key.path, "handles": str(references)}, nbytes)
+            for key, nbytes, references in ExternalFileData.frames.usage()
+        ],
+    )
+    for name, counts, description in (
+        ("frame_requests_total", ExternalFileData.frames.counts, "Handles served by a parsed file of the process."),
+        ("rejection_requests_total", ExternalFileData.rejections.counts, "Checks answered by rejected files."),
+    ):
+        metrics.register(
+            name,
+            "counter",
+            description,
+            _per_result(counts),
+        )
+    server = MetricsServer(metrics, config.metrics_host, config.metrics_port)
+    server.start()
+    return server
+
+
+def _per_result(counts: Callable[[], dict[str, int]]) -> Callable[[], list[tuple[dict[str, str], float]]]:
+    """Read counts like hits and misses as values labeled by their result."""
+    return lambda: [({"result": result}, value) for result, value in counts().items()]
+
+
+def prime_parser(config: PluginConfig) -> None:
+    """
+    Parse a few rows with each engine the plugin may use for whole files, so the first request does not pay
+    for the modules pandas and pyarrow import on their first call.
+    :param config: Configuration of the plugin.
+    """
+    engines = ["c"]
+    if config.engine in ("auto", "pyarrow") and pyarrow_available():
+        engines.append("pyarrow")
+    for engine in engines:
+        with ExternalFileData.metrics.time("prime", engine=engine):
+            pd.read_csv(io.BytesIO(PRIME_SAMPLE), engine=engine)
+
+
+def start(config: PluginConfig) -> None:
+    """
+    Register ExternalFileData and start the background services of the plugin, before files are served.
+    :param config: Configuration of the plugin.
+    """
+    FileSimpleRegistry.register(ExternalFileData.create)
+    start_watcher(config)
+    start_metrics(config)
+    if config.prime_parser:
+        prime_parser(config)
+
+
+def _number_of_values(channel: exd_api.ValuesResult.ChannelValues) -> int:
+    values = channel.values
+    array = values.WhichOneof(values.DESCRIPTOR.oneofs[0].name)
+    return 0 if array is None else len(getattr(values, array).values)
+
+
+def _prepare_in_background(file_path: str) -> None:
+    _BACKGROUND.active = True
+    try:
+        ExternalFile.prepare(file_path)
+    except NotMyFileError:
+        logging.getLogger(__name__).info("New file %s is not meant for this plugin", file_path)
 
 
 if __name__ == "__main__":
-    from ods_exd_api_box.simple import serve_plugin_simple
+    from ods_exd_api_box import serve_plugin
 
-    serve_plugin_simple(
-        file_type_name="PANDASCSV", file_type_factory=ExternalFileData.create, file_type_file_patterns=["*.csv"]
+    start(ExternalFileData.config)
+    serve_plugin(
+        file_type_name=FILE_TYPE_NAME, file_type_factory=ExternalFile.create, file_type_file_patterns=FILE_PATTERNS
     )
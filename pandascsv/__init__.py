@@ -0,0 +1,55 @@
+"""
+Helpers of the pandas CSV EXD-API plugin.
+"""
+
+from .column_buffers import ColumnBuffer, ColumnBuffers, flag_missing
+from .column_statistics import ColumnStatistics
+from .compact_frame import CompactFrame
+from .compression import GzipIndex, compression_method
+from .config import PluginConfig
+from .directory_watcher import DirectoryWatcher
+from .disk_cache import DiskCache
+from .engine import choose_engine, deduplicate_columns, pyarrow_available, python_fallback_reason
+from .file_key import FileKey
+from .frame_registry import FrameRegistry
+from .handle_reaper import HandleReaper
+from .lazy_frame import LazyFrame
+from .metrics import Metrics, MetricsServer
+from .parallel_reader import read_parallel
+from .pyramid import Pyramid
+from .rejection_cache import RejectionCache
+from .row_index import RowIndex
+from .shared_store import SharedFrame, SharedStore
+from .stream_frame import StreamFrame
+from .tail_reader import TailReader
+
+__all__ = [
+    "PluginConfig",
+    "ColumnBuffer",
+    "ColumnBuffers",
+    "ColumnStatistics",
+    "CompactFrame",
+    "DirectoryWatcher",
+    "DiskCache",
+    "FileKey",
+    "FrameRegistry",
+    "GzipIndex",
+    "HandleReaper",
+    "LazyFrame",
+    "Metrics",
+    "MetricsServer",
+    "Pyramid",
+    "RejectionCache",
+    "RowIndex",
+    "SharedFrame",
+    "SharedStore",
+    "StreamFrame",
+    "TailReader",
+    "choose_engine",
+    "deduplicate_columns",
+    "pyarrow_available",
+    "compression_method",
+    "python_fallback_reason",
+    "read_parallel",
+    "flag_missing",
+]
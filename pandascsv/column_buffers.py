@@ -0,0 +1,190 @@
+"""
+Columns of a parsed file as contiguous arrays, copied into GetValues responses in bulk.
+"""
+
+import logging
+import threading
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import exd_api, ods
+
+from .compact_frame import CompactFrame
+
+# pylint: disable=no-member
+
+# ODS flags of a defined value: AO_VF_VALID | AO_VF_VISIBLE | AO_VF_UNMODIFIED | AO_VF_DEFINED.
+VALID_FLAGS = 15
+
+# Array of the values and its element type for each ODS data type served from buffers.
+ARRAYS: dict[int, tuple[str, np.dtype]] = {
+    ods.DataTypeEnum.DT_SHORT: ("long_array", np.dtype("<i4")),
+    ods.DataTypeEnum.DT_LONG: ("long_array", np.dtype("<i4")),
+    ods.DataTypeEnum.DT_LONGLONG: ("longlong_array", np.dtype("<i8")),
+    ods.DataTypeEnum.DT_FLOAT: ("float_array", np.dtype("<f4")),
+    ods.DataTypeEnum.DT_DOUBLE: ("double_array", np.dtype("<f8")),
+}
+
+
+class ColumnBuffer:
+    """
+    Values of a column in one contiguous array and the rows holding a value.
+
+    Values are kept in the element type of the ODS array. Float arrays are written into the response as packed
+    bytes and integer arrays as packed varints, without a Python object per value. Missing values are reported
+    by the flags of the channel, float columns keep NaN in their values, other columns 0.
+    """
+
+    def __init__(self, values: np.ndarray, valid: np.ndarray | None = None):
+        """
+        Initialize the ColumnBuffer class. Use ColumnBuffer.of to convert a column.
+        :param values: Contiguous values of all rows.
+        :param valid: False for rows without value, None if all rows hold one.
+        """
+        self.values = values
+        self.valid = valid
+
+    @classmethod
+    def of(cls, column: pd.Series, dtype: np.dtype) -> "ColumnBuffer":
+        """
+        Convert a column. Contiguous numpy columns of the element type are used as they are, without copying them.
+        :param column: Values of the column.
+        :param dtype: Element type of the ODS array.
+        :return: Buffer of the column.
+        """
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in "iuf":
+            values = column.to_numpy()
+            missing = np.isnan(values) if values.dtype.kind == "f" else None
+            valid = None if missing is None or not missing.any() else ~missing
+            return cls(np.ascontiguousarray(values, dtype=dtype), valid)
+        missing = column.isna().to_numpy()
+        values = column.to_numpy(dtype=dtype, na_value=np.nan if dtype.kind == "f" else 0)
+        return cls(values, ~missing if missing.any() else None)
+
+    def fill(self, channel: exd_api.ValuesResult.ChannelValues, data_type: int, start: int, stop: int) -> None:
+        """
+        Copy a window of rows into the values of a channel of the response.
+        :param channel: Channel of the response, its data type is set by the caller.
+        :param data_type: ODS data type of the channel, one of ARRAYS.
+        :param start: First row.
+        :param stop: Row after the last one.
+        """
+        field, dtype = ARRAYS[data_type]
+        window = self.values[start:stop].astype(dtype, copy=False)
+        array = getattr(channel.values, field)
+        if len(window):
+            _merge_packed(array, window.tobytes() if dtype.kind == "f" else _varints(window))
+        if self.valid is not None:
+            valid = self.valid[start:stop]
+            if not valid.all():
+                _merge_packed(channel.flags, (valid.view(np.uint8) * VALID_FLAGS).tobytes())
+
+    def nbytes(self) -> int:
+        """
+        Memory owned by the buffer, columns used without copy are not counted.
+        :return: Size in bytes.
+        """
+        owned = 0 if self.values.base is not None else self.values.nbytes
+        return owned + (0 if self.valid is None else self.valid.nbytes)
+
+
+class ColumnBuffers:
+    """
+    Buffers of the columns of a parsed file, each converted on its first request and kept with the frame.
+    """
+
+    def __init__(self, frame: Any):
+        """
+        Initialize the ColumnBuffers class.
+        :param frame: Parsed file, a DataFrame or one of the frames providing iloc[:, index].
+        """
+        self.frame = frame
+        self._buffers: dict[int, ColumnBuffer] = {}
+        self._lock = threading.Lock()
+
+    def column(self, index: int, data_type: int) -> ColumnBuffer | None:
+        """
+        Return the buffer of a column.
+        :param index: Zero based position of the column.
+        :param data_type: ODS data type of the column.
+        :return: Buffer of the column, None if its data type is not served from buffers.
+        """
+        if data_type not in ARRAYS:
+            return None
+        with self._lock:
+            buffer = self._buffers.get(index)
+            if buffer is None:
+                # narrowed values of compact frames are widened once, into the element type of the ODS array
+                frame = self.frame
+                column = frame.column(index) if isinstance(frame, CompactFrame) else frame.iloc[:, index]
+                buffer = ColumnBuffer.of(column, ARRAYS[data_type][1])
+                self._buffers[index] = buffer
+                logging.getLogger(__name__).debug("Buffered column %d in %d bytes", index, buffer.nbytes())
+            return buffer
+
+    def nbytes(self) -> int:
+        """
+        Memory owned by the buffers.
+        :return: Size in bytes.
+        """
+        with self._lock:
+            return sum(buffer.nbytes() for buffer in self._buffers.values())
+
+
+def flag_missing(channel: exd_api.ValuesResult.ChannelValues) -> None:
+    """
+    Report the NaN values of a float channel not served from buffers by its flags, like ColumnBuffer.fill does.
+    :param channel: Channel of the response, filled like FileSimple does.
+    """
+    data_type = channel.values.data_type
+    if data_type not in ARRAYS or ARRAYS[data_type][1].kind != "f" or len(channel.flags.values):
+        return
+    field, dtype = ARRAYS[data_type]
+    missing = np.isnan(np.asarray(getattr(channel.values, field).values, dtype=dtype))
+    if missing.any():
+        _merge_packed(channel.flags, ((~missing).view(np.uint8) * VALID_FLAGS).tobytes())
+
+
+def _merge_packed(array: Any, payload: bytes) -> None:
+    """Append packed elements to the repeated field `values` of an ODS array without a Python object each."""
+    number = array.DESCRIPTOR.fields_by_name["values"].number
+    array.MergeFromString(_varint((number << 3) | 2) + _varint(len(payload)) + payload)
+
+
+def _varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _varints(values: np.ndarray) -> bytes:
+    """
+    Varints of integers as protobuf encodes int32 and int64 fields, negative ones sign extended to 64 bits.
+    The groups of 7 bits are computed column by column, up to the longest value of the window.
+    """
+    unsigned = values.astype(np.int64, copy=False).view(np.uint64)
+    lengths = np.ones(len(unsigned), dtype=np.uint8)
+    rest = unsigned >> np.uint64(7)
+    while True:
+        more = rest != 0
+        if not more.any():
+            break
+        lengths += more
+        rest >>= np.uint64(7)
+    width = int(lengths.max())
+    groups = np.empty((len(unsigned), width), dtype=np.uint8)
+    rest = unsigned.copy()
+    for position in range(width):
+        group = (rest & np.uint64(0x7F)).astype(np.uint8)
+        if position < width - 1:
+            # continuation bit of all but the last group of each value
+            group |= (lengths > position + 1).view(np.uint8) << 7
+        groups[:, position] = group
+        rest >>= np.uint64(7)
+    if int(lengths.min()) == width:
+        return bytes(groups.tobytes())
+    return bytes(groups[np.arange(width) < lengths[:, None]].tobytes())
@@ -0,0 +1,110 @@
+"""
+Minimum, maximum, average and null count of the columns of a parsed file.
+"""
+
+import logging
+import sys
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+# Rows read at once from frames parsing rows on demand.
+WINDOW_ROWS = 1 << 20
+
+
+class ColumnStatistics:
+    """
+    Statistics of each column of a parsed file, as attributes of the channels of the structure.
+
+    Every column gets a `null_count`. Numeric columns with at least one value also get `minimum`,
+    `maximum` and `average`, ignoring NaN. All columns are reduced together in blocks of WINDOW_ROWS rows.
+    Frames parsing rows on demand provide the blocks by parsing the file once, without keeping the columns.
+    """
+
+    def __init__(self, columns: list[dict[str, Any]]):
+        """
+        Initialize the ColumnStatistics class. Use ColumnStatistics.compute to reduce a parsed file.
+        :param columns: Attributes of each column.
+        """
+        self.columns = columns
+
+    @classmethod
+    def compute(cls, frame: Any) -> "ColumnStatistics":
+        """
+        Reduce all columns of a parsed file.
+        :param frame: Parsed file, a DataFrame or one of the frames providing iloc[:, index].iloc[start:stop].
+            Frames providing blocks(rows) are reduced from these blocks instead.
+        :return: Statistics of the file.
+        """
+        reducers = [_Reducer(dtype.kind in "biuf") for dtype in frame.dtypes]
+        number_of_rows = 0
+        for block in _blocks(frame):
+            number_of_rows += len(block[0]) if block else 0
+            for reducer, series in zip(reducers, block):
+                if reducer.numeric and not pd.api.types.is_numeric_dtype(series.dtype):
+                    # values found after the sampled rows of a frame parsing rows on demand
+                    series = pd.to_numeric(series, errors="coerce")
+                reducer.add(np.asarray(series.to_numpy()))
+        columns = [reducer.attributes() for reducer in reducers]
+        logging.getLogger(__name__).debug("Computed statistics of %d columns of %d rows", len(columns), number_of_rows)
+        return cls(columns)
+
+    def nbytes(self) -> int:
+        """
+        Estimated memory used by the statistics.
+        :return: Size in bytes.
+        """
+        return sum(sys.getsizeof(attributes) for attributes in self.columns)
+
+    def release(self) -> None:
+        """Nothing to drop."""
+
+
+def _blocks(frame: Any) -> Iterator[list[pd.Series]]:
+    """Yield the columns of consecutive blocks of rows of a frame."""
+    blocks = getattr(frame, "blocks", None)
+    if blocks is not None:
+        for df in blocks(WINDOW_ROWS):
+            yield [df.iloc[:, position] for position in range(df.shape[1])]
+        return
+    number_of_rows = int(frame.shape[0])
+    for start in range(0, number_of_rows, WINDOW_ROWS):
+        stop = min(start + WINDOW_ROWS, number_of_rows)
+        yield [frame.iloc[:, position].iloc[start:stop] for position in range(len(frame.columns))]
+
+
+class _Reducer:
+    """Running statistics of one column."""
+
+    def __init__(self, numeric: bool):
+        self.numeric = numeric
+        self.null_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Any = None
+        self.maximum: Any = None
+
+    def add(self, values: np.ndarray) -> None:
+        if not self.numeric:
+            self.null_count += int(pd.isna(values).sum())
+            return
+        if values.dtype.kind == "f":
+            nulls = np.isnan(values)
+            self.null_count += int(nulls.sum())
+            values = values[~nulls]
+        if len(values) == 0:
+            return
+        if values.dtype.kind == "b":
+            values = values.astype(np.uint8)
+        low, high = values.min().item(), values.max().item()
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.total += float(values.sum(dtype=np.float64))
+        self.count += len(values)
+
+    def attributes(self) -> dict[str, Any]:
+        attributes: dict[str, Any] = {"null_count": self.null_count}
+        if self.count:
+            attributes.update(minimum=self.minimum, maximum=self.maximum, average=self.total / self.count)
+        return attributes
@@ -0,0 +1,183 @@
+"""
+Read-only DataFrame stand-in keeping numeric columns in the narrowest lossless dtype.
+"""
+
+import logging
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+class CompactFrame:
+    """
+    Parsed file with integer columns narrowed to the smallest width holding all values
+    and optionally float columns stored as float32 where this is exact.
+
+    The original dtypes are reported, so the ODS data types do not change. Slices taken through
+    iloc[:, index].iloc[start:stop] are widened back to the original dtype, only for the rows returned.
+    Only the members FileSimple relies on are provided: columns, dtypes, shape, empty and iloc[:, index].
+    """
+
+    def __init__(self, df: pd.DataFrame, dtypes: pd.Series):
+        """
+        Initialize the CompactFrame class. Use CompactFrame.compact to narrow a DataFrame.
+        :param df: DataFrame with narrowed columns.
+        :param dtypes: Original dtypes of the columns.
+        """
+        self._df = df
+        self._dtypes = dtypes
+
+    @classmethod
+    def compact(cls, df: pd.DataFrame, floats: bool = False) -> "pd.DataFrame | CompactFrame":
+        """
+        Narrow the numeric columns of a DataFrame without changing any value.
+        :param df: Parsed file.
+        :param floats: Also store float64 columns as float32 if all values survive the round trip.
+        :return: CompactFrame if at least one column was narrowed, the DataFrame itself otherwise.
+        """
+        columns = {}
+        narrowed = 0
+        for position in range(df.shape[1]):
+            values = df.iloc[:, position].array
+            if isinstance(values, pd.arrays.NumpyExtensionArray):
+                compact = _narrow(values.to_numpy(), floats)
+                if compact.dtype != values.to_numpy().dtype:
+                    narrowed += 1
+                    values = compact
+            columns[position] = values
+        if not narrowed:
+            return df
+
+        compact_df = pd.DataFrame(columns, copy=False)
+        compact_df.columns = df.columns
+        compact_df.index = df.index
+        before = int(df.memory_usage(index=False, deep=False).sum())
+        after = int(compact_df.memory_usage(index=False, deep=False).sum())
+        logging.getLogger(__name__).debug("Narrowed %d columns from %d to %d bytes", narrowed, before, after)
+        return cls(compact_df, df.dtypes)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._df.columns
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return self._dtypes
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        rows, columns = self._df.shape
+        return int(rows), int(columns)
+
+    @property
+    def empty(self) -> bool:
+        return bool(self._df.empty)
+
+    @property
+    def iloc(self) -> "_CompactILoc":
+        return _CompactILoc(self)
+
+    def column(self, index: int) -> pd.Series:
+        """
+        Return a column in its narrowed dtype.
+        :param index: Zero based position of the column.
+        :return: Series containing all values of the column.
+        """
+        return self._df.iloc[:, index]
+
+    def nbytes(self) -> int:
+        """
+        Memory used by the narrowed columns.
+        :return: Size in bytes.
+        """
+        return int(self._df.memory_usage(index=True, deep=False).sum())
+
+    def release(self) -> None:
+        """Nothing to drop, the columns are the frame itself."""
+
+
+class _CompactILoc:
+    """Positional indexer of CompactFrame supporting iloc[:, column_index]."""
+
+    def __init__(self, frame: CompactFrame):
+        self._frame = frame
+
+    def __getitem__(self, key: Any) -> "CompactColumn":
+        if (
+            isinstance(key, tuple)
+            and len(key) == 2
+            and key[0] == slice(None)
+            and isinstance(key[1], (int, np.integer))
+        ):
+            if not -len(self._frame.columns) <= key[1] < len(self._frame.columns):
+                raise IndexError(f"Column index {key[1]} out of range!")
+            return CompactColumn(self._frame, int(key[1]))
+        raise NotImplementedError(f"CompactFrame only supports iloc[:, column_index], got {key!r}.")
+
+
+class CompactColumn:
+    """
+    Column of a CompactFrame.
+    Rows taken with iloc are widened to the original dtype. Checks like is_monotonic_increasing run on the
+    narrowed values, all other members are served by the widened column.
+    """
+
+    def __init__(self, frame: CompactFrame, index: int):
+        self._frame = frame
+        self._index = index
+
+    @property
+    def iloc(self) -> "_CompactColumnILoc":
+        return _CompactColumnILoc(self)
+
+    @property
+    def is_monotonic_increasing(self) -> bool:
+        return bool(self._frame.column(self._index).is_monotonic_increasing)
+
+    @property
+    def is_unique(self) -> bool:
+        return bool(self._frame.column(self._index).is_unique)
+
+    def __len__(self) -> int:
+        return self._frame.shape[0]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.widen(self._frame.column(self._index)), name)
+
+    def widen(self, values: pd.Series) -> pd.Series:
+        """Convert values of the column back to its original dtype."""
+        dtype = self._frame.dtypes.iloc[self._index]
+        return values if values.dtype == dtype else values.astype(dtype)
+
+
+class _CompactColumnILoc:
+    """Positional indexer of CompactColumn."""
+
+    def __init__(self, column: CompactColumn):
+        self._column = column
+
+    def __getitem__(self, key: Any) -> Any:
+        values = self._column._frame.column(self._column._index).iloc[key]
+        if isinstance(values, pd.Series):
+            return self._column.widen(values)
+        return self._column.widen(pd.Series([values])).iloc[0]
+
+
+def _narrow(values: np.ndarray, floats: bool) -> np.ndarray:
+    """Values in the narrowest dtype representing all of them exactly, the values themselves if there is none."""
+    if len(values) == 0:
+        return values
+    if values.dtype.kind in "iu":
+        low, high = values.min(), values.max()
+        for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max and np.dtype(dtype).itemsize < values.dtype.itemsize:
+                return values.astype(dtype)
+        return values
+    if floats and values.dtype == np.float64:
+        with np.errstate(over="ignore"):
+            narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return narrowed
+    return values
@@ -0,0 +1,129 @@
+"""
+Compressed CSV files: compression detection and random access into gzip files.
+"""
+
+import bisect
+import logging
+import zlib
+from typing import Any, Iterator, NamedTuple
+
+# File name extensions pd.read_csv infers the compression from.
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".zip": "zip", ".xz": "xz", ".zst": "zstd", ".tar": "tar"}
+
+# Uncompressed bytes between two checkpoints of a GzipIndex.
+CHECKPOINT_SPACING = 16 * 1024 * 1024
+READ_SIZE = 256 * 1024
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+
+
+def compression_method(file_path: str, parameters: dict[str, Any]) -> str | None:
+    """
+    Determine the compression pd.read_csv applies to a file.
+    :param file_path: Path of the CSV file.
+    :param parameters: Parameters passed to pd.read_csv.
+    :return: Compression method like 'gzip', None for uncompressed files.
+    """
+    compression = parameters.get("compression", "infer")
+    if isinstance(compression, dict):
+        compression = compression.get("method")
+    if compression == "infer":
+        name = file_path.lower()
+        return next((method for extension, method in EXTENSIONS.items() if name.endswith(extension)), None)
+    return None if compression is None else str(compression)
+
+
+class _Checkpoint(NamedTuple):
+    uncompressed: int
+    compressed: int
+    decompressor: Any
+
+
+class GzipIndex:
+    """
+    Checkpoints of the decompressor state of a gzip file.
+
+    While the file is decompressed once, a copy of the decompressor is kept every `spacing` uncompressed bytes.
+    Reading a byte range later continues from the closest checkpoint before it instead of from the start.
+    Each checkpoint holds the 32 KByte deflate window, so the index stays small compared to the file.
+    """
+
+    def __init__(self, file_path: str, spacing: int | None = None):
+        """
+        Initialize the GzipIndex class. The checkpoints are recorded by decompress().
+        :param file_path: Path of the gzip file.
+        :param spacing: Uncompressed bytes between two checkpoints. Defaults to CHECKPOINT_SPACING.
+        """
+        self.file_path = file_path
+        self.spacing = CHECKPOINT_SPACING if spacing is None else spacing
+        self.checkpoints: list[_Checkpoint] = []
+        self.size = 0
+
+    def decompress(self) -> Iterator[bytes]:
+        """
+        Decompress the whole file and record the checkpoints.
+        :return: Iterator over the uncompressed content.
+        """
+        inflater = _Inflater(zlib.decompressobj(_GZIP_WBITS))
+        self.checkpoints = [_Checkpoint(0, 0, inflater.decompressor.copy())]
+        position = 0
+        compressed = 0
+        with open(self.file_path, "rb") as file:
+            while block := file.read(READ_SIZE):
+                compressed += len(block)
+                for data in inflater.feed(block):
+                    position += len(data)
+                    yield data
+                if position - self.checkpoints[-1].uncompressed >= self.spacing:
+                    self.checkpoints.append(_Checkpoint(position, compressed, inflater.decompressor.copy()))
+        self.size = position
+        logging.getLogger(__name__).debug(
+            "Indexed %d bytes of gzip file %s with %d checkpoints", position, self.file_path, len(self.checkpoints)
+        )
+
+    def read(self, begin: int, end: int) -> bytes:
+        """
+        Read a range of uncompressed bytes, starting at the closest checkpoint.
+        :param begin: First uncompressed byte to read.
+        :param end: Uncompressed byte after the last one to read.
+        :return: Uncompressed bytes.
+        """
+        starts = [checkpoint.uncompressed for checkpoint in self.checkpoints]
+        checkpoint = self.checkpoints[bisect.bisect_right(starts, begin) - 1]
+        inflater = _Inflater(checkpoint.decompressor.copy())
+        position = checkpoint.uncompressed
+        parts = []
+        with open(self.file_path, "rb") as file:
+            file.seek(checkpoint.compressed)
+            while position < end and (block := file.read(READ_SIZE)):
+                for data in inflater.feed(block):
+                    low, high = max(begin - position, 0), min(end - position, len(data))
+                    if high > low:
+                        parts.append(data[low:high])
+                    position += len(data)
+        return b"".join(parts)
+
+
+class _Inflater:
+    """Decompressor continuing with the next member of concatenated gzip files."""
+
+    def __init__(self, decompressor: Any):
+        self.decompressor = decompressor
+        self._member_start = False
+
+    def feed(self, block: bytes) -> list[bytes]:
+        outputs = []
+        data = block
+        while data:
+            if self._member_start:
+                # trailing zeros are padding, not another member
+                data = data.lstrip(b"\0")
+                if not data:
+                    break
+                self._member_start = False
+            outputs.append(self.decompressor.decompress(data))
+            if not self.decompressor.eof:
+                break
+            data = self.decompressor.unused_data
+            self.decompressor = zlib.decompressobj(_GZIP_WBITS)
+            self._member_start = True
+        return outputs
@@ -0,0 +1,128 @@
+"""
+Plugin configuration read from environment variables.
+"""
+
+import logging
+import os
+import types
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Union, get_args, get_origin, get_type_hints
+
+from ods_exd_api_box.utils.env_argument_parser import str2bool
+
+from .engine import ENGINES
+
+ENV_PREFIX = "ODS_EXD_API_PANDASCSV_"
+# Allowed values of fields, other values of the environment variables are ignored.
+CHOICES = {"engine": ENGINES}
+# Smallest allowed values of fields, smaller values of the environment variables are ignored.
+MINIMUMS = {"probe_rows": 1, "sample_blocks": 0}
+
+
+@dataclass(frozen=True)
+class PluginConfig:
+    """
+    Settings of the pandas CSV plugin.
+    Each field can be set by an environment variable named ODS_EXD_API_PANDASCSV_<FIELD_NAME>.
+    """
+
+    # Number of rows parsed by not_my_file() to decide if the file is meant for this plugin.
+    probe_rows: int = 1000
+    # Parse columns on demand instead of reading the whole file at once.
+    lazy_columns: bool = False
+    # Directory for binary copies of parsed files. None disables the cache.
+    cache_dir: Path | None = None
+    # Size limit of the cache directory in MBytes.
+    cache_max_mb: int = 1024
+    # Files rejected by not_my_file() remembered until they change, in cache_dir if set. 0 disables it.
+    rejected_max_entries: int = 10000
+    # Engine parsing whole files: auto, c, pyarrow or python. auto uses pyarrow for large files if installed.
+    engine: str = "auto"
+    # Minimal file size in MBytes for parsing with the multithreaded pyarrow engine in auto mode.
+    pyarrow_min_mb: int = 32
+    # Threads parsing chunks of a file with the C engine in parallel. 1 parses files with a single read_csv call.
+    parse_workers: int = 1
+    # Minimal file size in MBytes for parsing in parallel.
+    parallel_min_mb: int = 64
+    # Parse only rows appended to a file since the last request instead of serving the content read first.
+    incremental: bool = False
+    # Rows parsed at once when streaming files larger than the memory. 0 loads files as a whole.
+    stream_max_rows: int = 0
+    # Directory for scratch files holding numeric columns of streamed files. None disables spilling.
+    stream_spill_dir: Path | None = None
+    # Store integer columns of parsed files in the smallest lossless width, reported dtypes stay the same.
+    compact_dtypes: bool = False
+    # With compact_dtypes also store float columns as float32 where all values are exact.
+    compact_floats: bool = False
+    # Attach minimum, maximum, average and null count to the channels of the structure.
+    column_statistics: bool = False
+    # Number of blocks spread over the file added to the probe to infer the dtypes of lazy columns. 0 disables it.
+    sample_blocks: int = 8
+    # Rows between two entries of the byte offset index used to read row windows. 0 disables the index.
+    row_index_stride: int = 0
+    # Memory budget in MBytes for keeping parsed files no handle uses anymore.
+    shared_max_mb: int = 0
+    # Directory in shared memory, e.g. /dev/shm/pandascsv, sharing parsed files between processes. None disables it.
+    shared_store_dir: Path | None = None
+    # Size limit of the shared memory directory in MBytes.
+    shared_store_max_mb: int = 1024
+    # Seconds after which the parsed data of unused handles is dropped, it is loaded again on next use. 0 disables it.
+    idle_ttl_s: int = 0
+    # Memory in MBytes of parsed files above which least recently used handles are unloaded. 0 disables it.
+    high_watermark_mb: int = 0
+    # Directories, separated by os.pathsep, whose new files are prepared in the background. Empty disables it.
+    watch_dirs: str = ""
+    # Scan the watched directories instead of using inotify, e.g. for network shares.
+    watch_polling: bool = False
+    # Threads preparing new files.
+    watch_workers: int = 1
+    # New files waiting for a thread, further files wait until there is room.
+    watch_queue_size: int = 64
+    # Seconds the size and modification time of a new file must be unchanged before it is prepared.
+    watch_settle_s: float = 2.0
+    # Port of the HTTP endpoint serving metrics and the profiler. 0 disables it.
+    metrics_port: int = 0
+    # Address of the metrics endpoint, the default keeps it local.
+    metrics_host: str = "127.0.0.1"
+    # Parse a few rows on startup, so the first request does not pay for the lazy imports of the parser.
+    prime_parser: bool = True
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] | None = None) -> "PluginConfig":
+        """
+        Create the configuration from environment variables.
+        :param environ: Mapping to read the variables from. Defaults to os.environ.
+        :return: Configuration with defaults for all unset variables.
+        """
+        environ = os.environ if environ is None else environ
+        type_hints = get_type_hints(cls)
+        values: dict[str, Any] = {}
+        for field in fields(cls):
+            env_var = f"{ENV_PREFIX}{field.name.upper()}"
+            env_val = environ.get(env_var)
+            if env_val is None:
+                continue
+            try:
+                value = _convert(env_val, type_hints[field.name])
+                if field.name in CHOICES and value not in CHOICES[field.name]:
+                    raise ValueError(f"expected one of {', '.join(CHOICES[field.name])}")
+                if field.name in MINIMUMS and value < MINIMUMS[field.name]:
+                    raise ValueError(f"expected at least {MINIMUMS[field.name]}")
+                values[field.name] = value
+            except ValueError as e:
+                logging.warning("Ignore environment variable %s. Could not convert '%s': %s", env_var, env_val, e)
+        return cls(**values)
+
+
+def _convert(value: str, field_type: Any) -> Any:
+    if get_origin(field_type) in (Union, types.UnionType):
+        if value.strip() == "":
+            return None
+        field_type = next(arg for arg in get_args(field_type) if arg is not type(None))
+    if field_type is bool:
+        return str2bool(value)
+    if field_type is Path:
+        return Path(value)
+    return field_type(value)
@@ -0,0 +1,305 @@
+"""
+Watch data directories and prepare new CSV files in the background before they are requested.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import queue
+import select
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Protocol
+
+# Seconds a worker defers a file while the plugin serves requests, before it is prepared anyway.
+MAX_DEFER = 30.0
+# Prepared files remembered, so an unchanged file is not queued twice.
+DONE_ENTRIES = 4096
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")
+
+
+class _Backend(Protocol):
+    def poll(self, timeout: float) -> list[str]:
+        """Wait up to `timeout` seconds and return paths that were created or written."""
+
+    def close(self) -> None:
+        """Release the resources of the backend."""
+
+
+class DirectoryWatcher:
+    """
+    Queues new or changed files below data directories for preparation by a bounded pool of worker threads.
+
+    Files are detected by inotify on Linux and by scanning the directories every `poll_interval` seconds
+    elsewhere or if `polling` is set, e.g. for network shares. A file is queued once its size and modification
+    time did not change for `settle` seconds, so files still being copied are not read. If the queue is full,
+    stable files wait for a free slot instead of being dropped. Workers defer files while `busy` returns True,
+    at most MAX_DEFER seconds, so a burst of new files does not compete with requests being served.
+    """
+
+    def __init__(
+        self,
+        roots: list[str],
+        patterns: list[str],
+        prepare: Callable[[str], None],
+        workers: int = 1,
+        queue_size: int = 64,
+        settle: float = 2.0,
+        polling: bool = False,
+        poll_interval: float = 5.0,
+        busy: Callable[[], bool] | None = None,
+    ):
+        """
+        Initialize the DirectoryWatcher class. Files present before start() are not queued.
+        :param roots: Directories to watch including their subdirectories.
+        :param patterns: File name patterns like '*.csv'.
+        :param prepare: Callable preparing a file, called on a worker thread.
+        :param workers: Number of worker threads.
+        :param queue_size: Maximal number of files waiting for a worker.
+        :param settle: Seconds the size and modification time of a file must be unchanged before it is queued.
+        :param polling: Scan the directories instead of using inotify.
+        :param poll_interval: Seconds between two scans of the directories.
+        :param busy: Callable returning True while workers should defer files.
+        """
+        self.roots = roots
+        self.patterns = patterns
+        self.settle = settle
+        self.polling = polling
+        self.poll_interval = poll_interval
+        self.prepared = 0
+        self._prepare = prepare
+        self._workers = workers
+        self._busy = busy or (lambda: False)
+        self._queue: queue.Queue[str] = queue.Queue(maxsize=queue_size)
+        self._candidates: dict[str, tuple[int, int, float]] = {}
+        self._done: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._backend: _Backend | None = None
+        self.log = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        """Start watching and the worker threads."""
+        self._stop.clear()
+        self._backend = self._create_backend()
+        self._threads = [threading.Thread(target=self._watch, name="pandascsv-watch", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, name=f"pandascsv-watch-worker-{index}", daemon=True)
+            for index in range(self._workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop watching. Files being prepared are finished, queued files are dropped."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _create_backend(self) -> _Backend:
+        if not self.polling:
+            try:
+                backend = _Inotify(self.roots)
+                self.log.info("Watching %s with inotify", self.roots)
+                return backend
+            except OSError as e:
+                self.log.info("inotify is not available, scanning directories instead: %s", e)
+        self.log.info("Watching %s by scanning every %.1f s", self.roots, self.poll_interval)
+        return _Polling(self.roots, self.patterns, self.poll_interval, self._stop)
+
+    def _watch(self) -> None:
+        backend = self._backend
+        assert backend is not None
+        tick = max(min(self.settle / 2, self.poll_interval), 0.01)
+        while not self._stop.is_set():
+            try:
+                for path in backend.poll(tick):
+                    self._candidate(path)
+                self._enqueue_stable()
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Watching %s failed", self.roots)
+                self._stop.wait(tick)
+
+    def _candidate(self, path: str) -> None:
+        if not any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in self.patterns):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._candidates.pop(path, None)
+            return
+        self._candidates[path] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def _enqueue_stable(self) -> None:
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in list(self._candidates.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._candidates[path]
+                continue
+            version = (stat.st_size, stat.st_mtime_ns)
+            if version != (size, mtime_ns):
+                self._candidates[path] = (*version, now)
+                continue
+            if now - since < self.settle:
+                continue
+            if self._done.get(path) == version:
+                del self._candidates[path]
+                continue
+            try:
+                self._queue.put_nowait(path)
+            except queue.Full:
+                # backpressure: the file stays a candidate until a worker is free
+                self.log.debug("Queue of new files is full, %d files waiting", len(self._candidates))
+                return
+            del self._candidates[path]
+            self._done[path] = version
+            self._done.move_to_end(path)
+            if len(self._done) > DONE_ENTRIES:
+                self._done.popitem(last=False)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                path = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + MAX_DEFER
+            while self._busy() and time.monotonic() < deadline and not self._stop.is_set():
+                self._stop.wait(0.1)
+            try:
+                start = time.perf_counter()
+                self._prepare(path)
+                self.prepared += 1
+                self.log.info("Prepared new file %s in %.2f s", path, time.perf_counter() - start)
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Could not prepare new file %s", path)
+            finally:
+                self._queue.task_done()
+
+
+class _Inotify:
+    """Linux inotify watches of directory trees, accessed through libc."""
+
+    def __init__(self, roots: list[str]):
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("libc has no inotify")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._roots = roots
+        self._watches: dict[int, str] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def poll(self, timeout: float) -> list[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0"))
+            offset += _EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                # events were lost, treat all files as new, prepared ones are skipped if unchanged
+                for root in self._roots:
+                    paths += _files(root)
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(descriptor, None)
+                continue
+            directory = self._watches.get(descriptor)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                # files of a directory moved or created below a root are new as well
+                self._add_tree(path)
+                paths += _files(path)
+            else:
+                paths.append(path)
+        return paths
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _add_tree(self, root: str) -> None:
+        for directory, _, _ in os.walk(root):
+            descriptor = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+            )
+            if descriptor < 0:
+                logging.getLogger(__name__).warning(
+                    "Could not watch directory %s: %s", directory, os.strerror(ctypes.get_errno())
+                )
+                continue
+            self._watches[descriptor] = directory
+
+
+class _Polling:
+    """Periodic scan of directory trees for new or changed files."""
+
+    def __init__(self, roots: list[str], patterns: list[str], interval: float, stop: threading.Event):
+        self._roots = roots
+        self._patterns = patterns
+        self._interval = interval
+        self._stop = stop
+        self._seen = self._scan()
+        self._next = time.monotonic() + interval
+
+    def poll(self, timeout: float) -> list[str]:
+        if self._stop.wait(min(timeout, max(self._next - time.monotonic(), 0))):
+            return []
+        if time.monotonic() < self._next:
+            return []
+        self._next = time.monotonic() + self._interval
+        seen = self._scan()
+        changed = [path for path, version in seen.items() if self._seen.get(path) != version]
+        self._seen = seen
+        return changed
+
+    def close(self) -> None:
+        self._seen = {}
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        seen = {}
+        for root in self._roots:
+            for path in _files(root):
+                if not any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in self._patterns):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seen[path] = (stat.st_size, stat.st_mtime_ns)
+        return seen
+
+
+def _files(root: str) -> list[str]:
+    return [os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names]
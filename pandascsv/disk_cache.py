@@ -0,0 +1,206 @@
+"""
+Persistent binary columnar copies of parsed CSV files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .file_key import FileKey
+
+META_FILE = "meta.json"
+STATISTICS_FILE = "statistics.json"
+
+
+class DiskCache:
+    """
+    Directory holding binary copies of parsed CSV files.
+
+    Each entry is a directory with one .npy file per column and a meta.json describing the columns.
+    The column statistics of a file are kept in a statistics.json of the entry.
+    Entries are keyed by file path, size, modification time and parameters, so a changed source file
+    never hits an outdated entry. Columns are loaded memory mapped instead of being parsed again.
+    The least recently used entries are evicted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """
+        Initialize the DiskCache class.
+        :param cache_dir: Directory to store the cache entries in. Created if missing.
+        :param max_bytes: Upper limit for the total size of all entries.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.log = logging.getLogger(__name__)
+
+    def contains(self, file_path: str, parameters: dict[str, Any]) -> bool:
+        """
+        Check if there is a cached copy of the current file without loading it.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file is read with.
+        :return: True if there is an entry for the file, False otherwise.
+        """
+        return (self.cache_dir / self._entry_name(file_path, parameters) / META_FILE).is_file()
+
+    def load(self, file_path: str, parameters: dict[str, Any]) -> pd.DataFrame | None:
+        """
+        Load the cached copy of a file.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file is read with.
+        :return: Read-only DataFrame backed by memory mapped columns, None if there is no valid entry.
+        """
+        entry_dir = self.cache_dir / self._entry_name(file_path, parameters)
+        try:
+            with open(entry_dir / META_FILE, encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            columns = {
+                name: np.asarray(np.load(entry_dir / f"{index}.npy", mmap_mode="r", allow_pickle=False))
+                for index, name in enumerate(meta["columns"])
+            }
+            # mark as recently used
+            os.utime(entry_dir)
+        except (OSError, ValueError, KeyError) as e:
+            self.log.debug("No cache entry for file %s: %s", file_path, e)
+            return None
+
+        self.log.info("Loaded cached copy of file: %s", file_path)
+        return pd.DataFrame(columns, columns=meta["columns"], copy=False)
+
+    def store(self, file_path: str, parameters: dict[str, Any], df: pd.DataFrame) -> bool:
+        """
+        Store a binary copy of a parsed file and evict least recently used entries beyond the size limit.
+        Only DataFrames with a default index, string or integer column names and non-object dtypes are stored.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file was read with.
+        :param df: Parsed content of the file.
+        :return: True if the copy was stored, False otherwise.
+        """
+        if not self.storable(df):
+            self.log.debug("File %s can not be stored in the cache.", file_path)
+            return False
+
+        entry_name = self._entry_name(file_path, parameters)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            for index, column in enumerate(df.columns):
+                np.save(temp_dir / f"{index}.npy", df[column].to_numpy(), allow_pickle=False)
+            with open(temp_dir / META_FILE, "w", encoding="utf-8") as meta_file:
+                json.dump({"file_path": os.path.abspath(file_path), "columns": df.columns.tolist()}, meta_file)
+            self._remove_outdated(entry_name)
+            entry_dir = self.cache_dir / entry_name
+            if entry_dir.exists():
+                # statistics stored before the file itself are moved into the new entry
+                if (entry_dir / STATISTICS_FILE).is_file():
+                    os.replace(entry_dir / STATISTICS_FILE, temp_dir / STATISTICS_FILE)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(temp_dir, entry_dir)
+        except OSError as e:
+            self.log.warning("Could not store cached copy of file %s: %s", file_path, e)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+
+        self.log.info("Stored cached copy of file: %s", file_path)
+        self._evict()
+        return True
+
+    def load_statistics(self, file_path: str, parameters: dict[str, Any]) -> list[dict[str, Any]] | None:
+        """
+        Load the cached column statistics of a file.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file is read with.
+        :return: Attributes of each column, None if there are no statistics for the current file.
+        """
+        try:
+            entry_dir = self.cache_dir / self._entry_name(file_path, parameters)
+            with open(entry_dir / STATISTICS_FILE, encoding="utf-8") as statistics_file:
+                statistics: list[dict[str, Any]] = json.load(statistics_file)
+            return statistics
+        except (OSError, ValueError) as e:
+            self.log.debug("No cached statistics for file %s: %s", file_path, e)
+            return None
+
+    def store_statistics(self, file_path: str, parameters: dict[str, Any], statistics: list[dict[str, Any]]) -> bool:
+        """
+        Store the column statistics of a file in its entry, which is created if the file itself is not cached.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file was read with.
+        :param statistics: Attributes of each column.
+        :return: True if the statistics were stored, False otherwise.
+        """
+        entry_dir = self.cache_dir / self._entry_name(file_path, parameters)
+        temp_path = None
+        try:
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=entry_dir, prefix=".tmp-", delete=False) as temp_file:
+                temp_path = temp_file.name
+                json.dump(statistics, temp_file)
+            os.replace(temp_path, entry_dir / STATISTICS_FILE)
+        except (OSError, TypeError, ValueError) as e:
+            self.log.warning("Could not store statistics of file %s: %s", file_path, e)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        self.log.debug("Stored statistics of file: %s", file_path)
+        return True
+
+    def _entry_name(self, file_path: str, parameters: dict[str, Any]) -> str:
+        # the path and version parts allow to drop outdated entries of the same file, whatever their parameters
+        key = FileKey.of(file_path, parameters)
+        return "-".join(_hash(part) for part in (key.path, json.dumps([key.size, key.mtime_ns]), key.parameters))
+
+    @staticmethod
+    def storable(df: pd.DataFrame) -> bool:
+        """
+        Check if the columns of a DataFrame can be stored as .npy files and loaded as the same DataFrame.
+        :param df: Parsed content of a file.
+        :return: True for a default index, string or integer column names and non-object dtypes.
+        """
+        return (
+            isinstance(df.index, pd.RangeIndex)
+            and df.index.start == 0
+            and df.index.step == 1
+            and all(isinstance(name, (str, int)) for name in df.columns)
+            and all(isinstance(dtype, np.dtype) and dtype != np.object_ for dtype in df.dtypes)
+        )
+
+    def _remove_outdated(self, entry_name: str) -> None:
+        """Remove the entries of older versions of a file, entries of other parameters of the same version stay."""
+        path_hash, version_hash, _ = entry_name.split("-")
+        for entry_dir in self.cache_dir.glob(f"{path_hash}-*"):
+            if not entry_dir.name.startswith(f"{path_hash}-{version_hash}-"):
+                self.log.debug("Removing outdated cache entry: %s", entry_dir)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def _evict(self) -> None:
+        entries = []
+        total_size = 0
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.name.startswith(".") or not entry_dir.is_dir():
+                continue
+            try:
+                size = sum(entry_file.stat().st_size for entry_file in entry_dir.iterdir())
+                entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            except OSError:
+                # removed by another process meanwhile
+                continue
+            total_size += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            self.log.info("Evicting cache entry %s (%d bytes)", entry_dir, size)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
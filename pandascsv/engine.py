@@ -0,0 +1,109 @@
+"""
+Choice of the pd.read_csv engine used to parse a file.
+"""
+
+import functools
+import importlib.util
+import sys
+from typing import Any
+
+ENGINES = ("auto", "c", "pyarrow", "python")
+
+# read_csv parameters the pyarrow engine handles like the C engine. Files read with other parameters use the C engine.
+PYARROW_PARAMETERS = (
+    "sep",
+    "delimiter",
+    "header",
+    "names",
+    "encoding",
+    "quotechar",
+    "decimal",
+    "na_values",
+    "keep_default_na",
+    "true_values",
+    "false_values",
+)
+
+
+@functools.cache
+def pyarrow_available() -> bool:
+    """
+    Check if pyarrow is installed, without importing it.
+    :return: True if the pyarrow engine can be used, False otherwise.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def python_fallback_reason(parameters: dict[str, Any]) -> str | None:
+    """
+    Check if the parameters need the slow python engine, which pd.read_csv silently falls back to.
+    Follows the rules of pd.read_csv for the C engine.
+    :param parameters: Parameters passed to pd.read_csv.
+    :return: Reason why the C engine can not be used, None if it can.
+    """
+    if parameters.get("skipfooter"):
+        return "skipfooter is not supported by the C engine"
+    sep = parameters.get("sep", parameters.get("delimiter", ","))
+    if sep is None:
+        if not parameters.get("delim_whitespace"):
+            return "sep=None needs separator sniffing"
+    elif len(sep) > 1:
+        if sep != r"\s+":
+            return f"separator '{sep}' is interpreted as regular expression"
+    elif len(sep.encode(sys.getfilesystemencoding() or "utf-8", errors="replace")) > 1:
+        return f"separator '{sep}' is longer than one byte"
+    quotechar = parameters.get("quotechar")
+    if isinstance(quotechar, str) and len(quotechar) == 1 and ord(quotechar) > 127:
+        return f"quotechar '{quotechar}' is longer than one byte"
+    return None
+
+
+def choose_engine(parameters: dict[str, Any], file_size: int, engine: str = "auto", pyarrow_min_bytes: int = 0) -> str:
+    """
+    Choose the engine to parse a file with.
+    An engine given in the parameters is always used. The pyarrow engine is only used if it is installed
+    and supports all parameters, otherwise the C engine is used unless the parameters need the python engine.
+    :param parameters: Parameters passed to pd.read_csv.
+    :param file_size: Size of the file in bytes.
+    :param engine: Configured engine, 'auto' uses pyarrow for files of at least `pyarrow_min_bytes`.
+    :param pyarrow_min_bytes: Minimal file size to parse with the multithreaded pyarrow engine in 'auto' mode.
+    :return: Name of the engine.
+    """
+    if parameters.get("engine") is not None:
+        return str(parameters["engine"])
+    if python_fallback_reason(parameters) is not None or engine == "python":
+        return "python"
+    wants_pyarrow = engine == "pyarrow" or (engine == "auto" and file_size >= pyarrow_min_bytes)
+    if wants_pyarrow and pyarrow_available() and _pyarrow_supports(parameters):
+        return "pyarrow"
+    return "c"
+
+
+def deduplicate_columns(columns: list[Any]) -> list[Any]:
+    """
+    Rename duplicate column names of the header like the C engine does, the pyarrow engine keeps them.
+    Repeated names get the suffix .1, .2 and so on, skipping names the header already contains.
+    :param columns: Column names as read from the header.
+    :return: Unique column names.
+    """
+    names = list(columns)
+    counts: dict[Any, int] = {}
+    for position, name in enumerate(names):
+        count = counts.get(name, 0)
+        unique = name
+        while count > 0:
+            counts[name] = count + 1
+            unique = f"{name}.{count}"
+            count = count + 1 if unique in names else counts.get(unique, 0)
+        names[position] = unique
+        counts[unique] = count + 1
+    return names
+
+
+def _pyarrow_supports(parameters: dict[str, Any]) -> bool:
+    if any(name not in PYARROW_PARAMETERS for name, value in parameters.items() if value is not None):
+        return False
+    if isinstance(parameters.get("na_values"), dict):
+        return False
+    # pyarrow skips `header` rows instead of using the last one as header
+    return parameters.get("header", "infer") in ("infer", 0, None)
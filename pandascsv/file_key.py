@@ -0,0 +1,31 @@
+"""
+Identity of a CSV file read with a set of parameters.
+"""
+
+import json
+import os
+from typing import Any, NamedTuple
+
+
+class FileKey(NamedTuple):
+    """
+    Identifies the content of a file as parsed with a set of parameters.
+    A changed size or modification time results in a different key.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    parameters: str
+
+    @classmethod
+    def of(cls, file_path: str, parameters: dict[str, Any]) -> "FileKey":
+        """
+        Create the key of a file from its current state on disk.
+        :param file_path: Path of the file.
+        :param parameters: Parameters the file is read with.
+        :return: Key of the file.
+        """
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        return cls(abs_path, stat.st_size, stat.st_mtime_ns, json.dumps(parameters, sort_keys=True, default=str))
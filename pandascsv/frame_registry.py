@@ -0,0 +1,188 @@
+"""
+Process wide registry sharing parsed files between handles.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, TypeAlias
+
+import pandas as pd
+
+from .column_statistics import ColumnStatistics
+from .compact_frame import CompactFrame
+from .file_key import FileKey
+from .lazy_frame import LazyFrame
+from .pyramid import Pyramid
+from .shared_store import SharedFrame
+from .stream_frame import StreamFrame
+
+Frame: TypeAlias = pd.DataFrame | CompactFrame | LazyFrame | StreamFrame | SharedFrame | Pyramid | ColumnStatistics
+
+
+@dataclass
+class _Entry:
+    frame: Frame
+    ref_count: int = 0
+
+
+class FrameRegistry:
+    """
+    Shares parsed files between all handles of the process.
+
+    Handles acquire the frame of a file by its FileKey and release it on close. Frames are loaded once
+    and handed out read-only to every handle. Frames no longer referenced are kept for reuse as long as
+    the total size of all frames stays within `max_bytes`, least recently used ones are dropped first.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the FrameRegistry class.
+        :param max_bytes: Memory budget for all frames. Referenced frames are never dropped.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[FileKey, _Entry] = OrderedDict()
+        self._loading: dict[FileKey, Future[Frame]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.log = logging.getLogger(__name__)
+
+    def acquire(self, key: FileKey, load: Callable[[], Frame]) -> Frame:
+        """
+        Get the frame of a file and increment its reference count.
+        Concurrent calls for the same key wait for the first one, so the file is loaded exactly once.
+        :param key: Key of the file.
+        :param load: Callable loading the frame if it is not registered yet.
+        :return: Shared, read-only frame of the file.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.ref_count += 1
+                self.hits += 1
+                self._entries.move_to_end(key)
+                self.log.debug("Sharing frame of file %s (references: %d)", key.path, entry.ref_count)
+                return entry.frame
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = Future()
+                loading = True
+                self.misses += 1
+            else:
+                loading = False
+                self.hits += 1
+
+        if not loading:
+            self.log.debug("Waiting for frame of file %s loaded by another handle", key.path)
+            return self._register(key, pending.result())
+
+        try:
+            frame = load()
+            if isinstance(frame, pd.DataFrame):
+                frame = _read_only(frame)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+
+        frame = self._register(key, frame, loaded=True)
+        pending.set_result(frame)
+        return frame
+
+    def release(self, key: FileKey) -> None:
+        """
+        Decrement the reference count of a frame. Unreferenced frames are dropped if the budget is exceeded.
+        :param key: Key of the file.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.ref_count -= 1
+            self.log.debug("Released frame of file %s (references: %d)", key.path, entry.ref_count)
+            self._evict()
+
+    def nbytes(self) -> int:
+        """
+        Memory used by all registered frames.
+        :return: Size in bytes.
+        """
+        with self._lock:
+            return sum(_frame_nbytes(entry.frame) for entry in self._entries.values())
+
+    def trim(self, target_bytes: int) -> int:
+        """
+        Drop unreferenced frames, least recently used first, until all frames fit into `target_bytes`.
+        :param target_bytes: Memory to shrink the frames to, frames referenced by handles are kept.
+        :return: Bytes of the frames still referenced, which only releasing their handles can lower.
+        """
+        with self._lock:
+            self._evict(target_bytes)
+            return sum(_frame_nbytes(entry.frame) for entry in self._entries.values() if entry.ref_count > 0)
+
+    def usage(self) -> list[tuple[FileKey, int, int]]:
+        """
+        Memory and references of each registered frame.
+        :return: Key, size in bytes and number of handles using it, per frame.
+        """
+        with self._lock:
+            return [(key, _frame_nbytes(entry.frame), entry.ref_count) for key, entry in self._entries.items()]
+
+    def counts(self) -> dict[str, int]:
+        """
+        Acquisitions served by a registered or loading frame and acquisitions that loaded the file.
+        :return: Dictionary with the number of hits and misses.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _register(self, key: FileKey, frame: Frame, loaded: bool = False) -> Frame:
+        with self._lock:
+            if loaded:
+                del self._loading[key]
+            # the frame may already have been dropped again if it was released meanwhile
+            entry = self._entries.setdefault(key, _Entry(frame))
+            entry.ref_count += 1
+            self._entries.move_to_end(key)
+            self._evict()
+            return entry.frame
+
+    def _evict(self, max_bytes: int | None = None) -> None:
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = sum(_frame_nbytes(entry.frame) for entry in self._entries.values())
+        for key, entry in list(self._entries.items()):
+            if total <= max_bytes:
+                break
+            if entry.ref_count > 0:
+                continue
+            size = _frame_nbytes(entry.frame)
+            self.log.info("Dropping frame of file %s (%d bytes)", key.path, size)
+            if not isinstance(entry.frame, pd.DataFrame):
+                entry.frame.release()
+            del self._entries[key]
+            total -= size
+
+
+def _frame_nbytes(frame: Frame) -> int:
+    if not isinstance(frame, pd.DataFrame):
+        return int(frame.nbytes())
+    return int(frame.memory_usage(index=True, deep=False).sum())
+
+
+def _read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """Rebuild a DataFrame from read-only views of its columns without copying the data."""
+    columns = {}
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position].array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            values = values.to_numpy().view()
+            values.flags.writeable = False
+        columns[position] = values
+    rv = pd.DataFrame(columns, copy=False)
+    rv.columns = df.columns
+    rv.index = df.index
+    return rv
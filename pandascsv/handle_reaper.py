@@ -0,0 +1,133 @@
+"""
+Background reclaiming of parsed data held by handles that are not used anymore.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from typing import Callable, Protocol
+
+# Seconds between two checks of the background thread.
+CHECK_INTERVAL = 10.0
+
+
+class Reapable(Protocol):
+    """Handle whose parsed data can be dropped and loaded again on next use."""
+
+    # time.monotonic() of the last request
+    last_used: float
+
+    def unload(self) -> bool:
+        """Drop the parsed data unless a request is in progress, return True if something was dropped."""
+
+
+class HandleReaper:
+    """
+    Drops the parsed data of handles clients left open, e.g. after a crash or timeout.
+
+    Handles unused for `idle_ttl` seconds are unloaded. If the memory reported by `memory` exceeds
+    `high_watermark` bytes, data no handle uses is dropped by `trim` first. Then further handles are unloaded,
+    least recently used first, until the memory is below or only data no handle holds is left.
+    Unloaded handles stay open and load their data again when they are used. Handles are tracked by weak
+    references, so closed and collected handles drop out on their own.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float,
+        high_watermark: int,
+        memory: Callable[[], int],
+        interval: float = CHECK_INTERVAL,
+        trim: Callable[[int], int] | None = None,
+    ):
+        """
+        Initialize the HandleReaper class. The background thread is started by the first registered handle.
+        :param idle_ttl: Seconds a handle may be unused before its data is dropped. 0 disables the check.
+        :param high_watermark: Bytes of parsed data above which least recently used handles are unloaded.
+            0 disables the check.
+        :param memory: Callable returning the bytes of parsed data held by the process.
+        :param interval: Seconds between two checks.
+        :param trim: Callable dropping data no handle uses down to the given bytes and returning the bytes
+            still held by handles. None if unloading a handle frees its data right away.
+        """
+        self.idle_ttl = idle_ttl
+        self.high_watermark = high_watermark
+        self.interval = interval
+        self._memory = memory
+        self._trim = trim
+        self._handles: weakref.WeakSet[Reapable] = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.log = logging.getLogger(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_ttl > 0 or self.high_watermark > 0
+
+    def register(self, handle: Reapable) -> None:
+        """
+        Track a handle and start the background thread if it is not running yet.
+        :param handle: Open handle.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._handles.add(handle)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="pandascsv-reaper", daemon=True)
+                self._thread.start()
+
+    def reap(self, now: float | None = None) -> int:
+        """
+        Unload idle handles and, above the high watermark, least recently used ones.
+        :param now: time.monotonic() to compare the last use against, defaults to the current time.
+        :return: Number of unloaded handles.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            handles = sorted(self._handles, key=lambda handle: handle.last_used)
+        before = self._memory()
+        reclaimable = self._reclaim()
+        unloaded = 0
+        for handle in handles:
+            idle = self.idle_ttl > 0 and now - handle.last_used >= self.idle_ttl
+            pressure = reclaimable and self.high_watermark > 0 and self._memory() > self.high_watermark
+            if not idle and not pressure:
+                continue
+            if handle.unload():
+                unloaded += 1
+                if pressure:
+                    reclaimable = self._reclaim()
+        after = self._memory()
+        if unloaded or after < before:
+            self.log.info(
+                "Dropped parsed data of %d unused handles, reclaimed %d bytes (%d bytes in use)",
+                unloaded,
+                max(before - after, 0),
+                after,
+            )
+        return unloaded
+
+    def _reclaim(self) -> bool:
+        """Drop data no handle uses above the high watermark, return False if unloading handles can not free more."""
+        if self._trim is None or self.high_watermark <= 0:
+            return True
+        return self._trim(self.high_watermark) > 0
+
+    def stop(self) -> None:
+        """Stop the background thread, the next registered handle starts it again."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.reap()
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Reaping unused handles failed")
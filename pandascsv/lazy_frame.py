@@ -0,0 +1,343 @@
+"""
+Read-only DataFrame stand-in that parses the columns of a CSV file on demand.
+"""
+
+import io
+import logging
+import threading
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import NotMyFileError
+
+from .row_index import RowIndex, block_parameters
+
+# read_csv parameters that refer to other columns or change the shape of the result,
+# so a single column can not be parsed on its own.
+UNSUPPORTED_PARAMETERS = ("usecols", "index_col", "parse_dates", "skipfooter", "iterator", "chunksize")
+
+
+class LazyFrame:
+    """
+    Column-projected view on a CSV file.
+
+    Column names and dtypes are taken from a sample of the leading rows. Each column is parsed on first
+    access using `usecols` and kept afterwards, so memory scales with the columns actually used.
+    With a RowIndex, slices of columns not parsed yet are read from the file directly and not kept.
+    Only the members FileSimple relies on are provided: columns, dtypes, shape, empty and iloc[:, index].
+    """
+
+    def __init__(
+        self,
+        read_csv: Callable[..., pd.DataFrame],
+        sample: pd.DataFrame,
+        parameters: dict[str, Any] | None = None,
+        row_index: RowIndex | None = None,
+        windowed: bool = True,
+    ):
+        """
+        Initialize the LazyFrame class.
+        :param read_csv: Callable parsing the file, additional keyword arguments are passed to pd.read_csv.
+            The source to parse can be replaced by passing it as first positional argument.
+        :param sample: DataFrame containing the leading rows of the file.
+        :param parameters: Parameters read_csv applies to the file.
+        :param row_index: Optional index of the rows, providing the number of rows.
+        :param windowed: Use the row index to read slices of columns not parsed yet.
+        """
+        self._read_csv = read_csv
+        self._sample = sample
+        self._parameters = parameters or {}
+        self._row_index = row_index
+        self._windowed = windowed and row_index is not None
+        self._columns: dict[int, pd.Series] = {}
+        self._number_of_rows: int | None = None
+        self._lock = threading.Lock()
+        self._column_locks: dict[int, threading.Lock] = {}
+        self.log = logging.getLogger(__name__)
+
+    @staticmethod
+    def supports(parameters: dict[str, Any]) -> bool:
+        """
+        Check if files read with the given parameters can be parsed column by column.
+        :param parameters: Parameters passed to pd.read_csv.
+        :return: True if columns can be parsed on their own, False otherwise.
+        """
+        return not any(parameters.get(name) is not None for name in UNSUPPORTED_PARAMETERS)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._sample.columns
+
+    @property
+    def dtypes(self) -> pd.Series:
+        """
+        Sampled dtypes of the columns, parsed columns and windows are converted to them.
+        """
+        return pd.Series(list(self._sample.dtypes), index=self.columns, dtype=object)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self.number_of_rows(), len(self.columns))
+
+    @property
+    def empty(self) -> bool:
+        # the sample is a prefix of the file, so the file is empty if and only if the sample is
+        return bool(self._sample.empty)
+
+    @property
+    def iloc(self) -> "_LazyILoc":
+        return _LazyILoc(self)
+
+    def number_of_rows(self) -> int:
+        """
+        Number of data rows, taken from the row index or determined by parsing the first column.
+        :return: Number of rows in the file.
+        """
+        if self._number_of_rows is None:
+            if self._row_index is not None:
+                self._number_of_rows = self._row_index.number_of_rows
+            else:
+                self._number_of_rows = int(self.column(0).shape[0])
+        return self._number_of_rows
+
+    def column(self, index: int) -> pd.Series:
+        """
+        Return a column, parsing it from the file on first access.
+        :param index: Zero based position of the column.
+        :return: Series containing all values of the column.
+        :raises NotMyFileError: If the column can not be parsed or converted to the sampled dtype without changing it.
+        """
+        series = self._columns.get(index)
+        if series is None:
+            with self._lock:
+                column_lock = self._column_locks.setdefault(index, threading.Lock())
+            # concurrent requests of the same column wait for the first one to parse it
+            with column_lock:
+                series = self._columns.get(index)
+                if series is None:
+                    series = self._load_column(index)
+                    self._columns[index] = series
+        return series
+
+    def window(self, index: int, start: int, stop: int) -> pd.Series:
+        """
+        Return rows start to stop (exclusive) of a column.
+        Parsed columns are sliced, otherwise only the rows around the window are parsed using the row index.
+        :param index: Zero based position of the column.
+        :param start: First row to return.
+        :param stop: Row after the last row to return.
+        :return: Series containing the values of the window.
+        :raises NotMyFileError: If the values can not be converted to the sampled dtype without changing them.
+        """
+        start, stop, _ = slice(start, stop).indices(self.number_of_rows())
+        if index in self._columns or self._row_index is None or not self._windowed or start >= stop:
+            return self.column(index).iloc[start:stop]
+
+        name = self.columns[index]
+        buffer, first_row = self._row_index.read(start, stop)
+        overrides = block_parameters(self.columns, stop - first_row)
+        overrides["usecols"] = [index]
+        dtype = self._sample.dtypes.iloc[index]
+        user_dtype = self._parameters.get("dtype")
+        if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            if user_dtype is None or isinstance(user_dtype, dict):
+                # strings of the window are kept as they are, even if they look like numbers
+                overrides["dtype"] = {**(user_dtype or {}), name: dtype}
+        try:
+            series = self._read_csv(io.BytesIO(buffer), **overrides).iloc[start - first_row :, 0]
+        except (ValueError, pd.errors.ParserError) as e:
+            self.log.debug("Could not read rows %d to %d of column '%s' by index: %s", start, stop, name, e)
+            return self.column(index).iloc[start:stop]
+        series.index = pd.RangeIndex(start, start + len(series))
+        # numbers keep the dtype reported in the structure, even if the window alone is inferred differently
+        return self._conform(index, series.rename(name))
+
+    def widen_dtypes(self, blocks: int, rows: int) -> None:
+        """
+        Extend the sample by blocks of rows spread evenly over the file, so the sampled dtypes also
+        reflect values beyond the leading rows. Dtypes are widened like pd.concat does:
+        integers mixed with floats become floats, numbers mixed with strings become objects.
+        :param blocks: Number of blocks to read.
+        :param rows: Number of rows per block.
+        :raises NotMyFileError: If a block can not be parsed with the given parameters.
+        """
+        if self._row_index is None or blocks <= 0:
+            return
+        number_of_rows = self._row_index.number_of_rows
+        starts = {int(start) for start in np.linspace(0, max(number_of_rows - rows, 0), blocks)}
+        parts = [self._sample]
+        # blocks do not overlap the leading rows or each other, so the sample keeps the order of the file
+        covered = len(self._sample)
+        for start in sorted(starts):
+            stop = min(start + rows, number_of_rows)
+            start = max(start, covered)
+            if start >= stop:
+                continue
+            covered = stop
+            buffer, first_row = self._row_index.read(start, stop)
+            try:
+                block = self._read_csv(io.BytesIO(buffer), **block_parameters(self.columns, stop - first_row))
+            except pd.errors.ParserError as e:
+                raise NotMyFileError(str(e)) from e
+            parts.append(block.iloc[start - first_row :])
+        sample = pd.concat(parts, ignore_index=True)
+        for name, before, after in zip(self.columns, self._sample.dtypes, sample.dtypes):
+            if before != after:
+                self.log.debug("Widened dtype of column '%s' from %s to %s", name, before, after)
+        self._sample = sample
+
+    def blocks(self, rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Parse the file once in blocks of rows with all columns, without keeping them.
+        :param rows: Number of rows per block.
+        :return: Iterator over the blocks in the order of the file.
+        :raises NotMyFileError: If a block can not be parsed with the given parameters.
+        """
+        try:
+            with self._read_csv(chunksize=rows) as reader:
+                yield from reader
+        except pd.errors.ParserError as e:
+            raise NotMyFileError(str(e)) from e
+
+    def is_monotonic(self) -> tuple[bool, bool]:
+        """
+        Check if the first column is increasing without parsing it.
+        Unless the column was parsed already, only the sampled rows are checked, which are in the order of the file.
+        :return: Tuple of monotonic increasing and strictly increasing.
+        """
+        if len(self.columns) == 0:
+            return False, False
+        series = self._columns.get(0)
+        if series is None:
+            series = self._sample.iloc[:, 0]
+        monotonic = bool(series.is_monotonic_increasing)
+        return monotonic, monotonic and bool(series.is_unique)
+
+    def nbytes(self) -> int:
+        """
+        Memory used by the sample and the parsed columns.
+        :return: Size in bytes.
+        """
+        columns_nbytes = sum(int(series.memory_usage(index=False, deep=False)) for series in self._columns.values())
+        return int(self._sample.memory_usage(index=False, deep=False).sum()) + columns_nbytes
+
+    def release(self) -> None:
+        """Drop all parsed columns."""
+        self._columns.clear()
+
+    def _load_column(self, index: int) -> pd.Series:
+        if index < 0 or index >= len(self.columns):
+            raise IndexError(f"Column index {index} out of range!")
+        self.log.debug("Parsing column %d ('%s')", index, self.columns[index])
+        try:
+            series = self._read_csv(usecols=[index]).iloc[:, 0]
+        except pd.errors.ParserError as e:
+            raise NotMyFileError(str(e)) from e
+
+        series = self._conform(index, series)
+        series.name = self.columns[index]
+        return series
+
+    def _conform(self, index: int, series: pd.Series) -> pd.Series:
+        """
+        Convert values of a column to the sampled dtype, which the structure of the file already reported.
+        :raises NotMyFileError: If values after the sampled rows can not be converted without changing them,
+            e.g. floats or missing values in an integer column.
+        """
+        dtype = self._sample.dtypes.iloc[index]
+        if series.dtype == dtype:
+            return series
+        converted = _lossless(series, dtype)
+        if converted is None:
+            raise NotMyFileError(
+                f"Column '{self.columns[index]}' has {series.dtype} values after the sampled rows, "
+                f"which suggested {dtype}."
+            )
+        self.log.debug("Converted values of column '%s' from %s to %s", self.columns[index], series.dtype, dtype)
+        return converted
+
+
+def _lossless(series: pd.Series, dtype: Any) -> pd.Series | None:
+    """Convert numeric values to a numeric dtype, None if a value would be changed or is missing."""
+    if not (isinstance(dtype, np.dtype) and isinstance(series.dtype, np.dtype)):
+        return None
+    if dtype.kind not in "iuf" or series.dtype.kind not in "iuf":
+        return None
+    if dtype.kind == "f":
+        # integers become floats like pd.concat widens them
+        return series.astype(dtype)
+    values = series.to_numpy()
+    with np.errstate(invalid="ignore"):
+        converted = values.astype(dtype)
+    if not np.array_equal(converted, values):
+        return None
+    return pd.Series(converted, index=series.index, name=series.name)
+
+
+class _LazyILoc:
+    """Positional indexer of LazyFrame supporting iloc[:, column_index]."""
+
+    def __init__(self, frame: LazyFrame):
+        self._frame = frame
+
+    def __getitem__(self, key: Any) -> "pd.Series | LazyColumn":
+        if (
+            isinstance(key, tuple)
+            and len(key) == 2
+            and key[0] == slice(None)
+            and isinstance(key[1], (int, np.integer))
+        ):
+            if not self._frame._windowed:
+                return self._frame.column(int(key[1]))
+            return LazyColumn(self._frame, int(key[1]))
+        raise NotImplementedError(f"LazyFrame only supports iloc[:, column_index], got {key!r}.")
+
+
+class LazyColumn:
+    """
+    Column of a LazyFrame reading windows through its row index.
+    Slices taken with iloc are read through LazyFrame.window. Whether the first column is increasing is taken
+    from the sample. All other members are served by the parsed column.
+    """
+
+    def __init__(self, frame: LazyFrame, index: int):
+        self._frame = frame
+        self._index = index
+
+    @property
+    def iloc(self) -> "_LazyColumnILoc":
+        return _LazyColumnILoc(self._frame, self._index)
+
+    @property
+    def is_monotonic_increasing(self) -> bool:
+        if self._index == 0:
+            return self._frame.is_monotonic()[0]
+        return bool(self._frame.column(self._index).is_monotonic_increasing)
+
+    @property
+    def is_unique(self) -> bool:
+        if self._index == 0 and self._frame.is_monotonic()[0]:
+            return self._frame.is_monotonic()[1]
+        return bool(self._frame.column(self._index).is_unique)
+
+    def __len__(self) -> int:
+        return self._frame.number_of_rows()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._frame.column(self._index), name)
+
+
+class _LazyColumnILoc:
+    """Positional indexer of LazyColumn."""
+
+    def __init__(self, frame: LazyFrame, index: int):
+        self._frame = frame
+        self._index = index
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, slice) and key.step in (None, 1):
+            start = 0 if key.start is None else key.start
+            stop = self._frame.number_of_rows() if key.stop is None else key.stop
+            return self._frame.window(self._index, start, stop)
+        return self._frame.column(self._index).iloc[key]
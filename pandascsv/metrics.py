@@ -0,0 +1,277 @@
+"""
+Phase timings, counters and gauges of the plugin, served in the Prometheus text format.
+"""
+
+import fnmatch
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+from urllib.parse import parse_qs, urlparse
+
+# Seconds between two samples of the profiler.
+SAMPLE_INTERVAL = 0.001
+
+Labels = tuple[tuple[str, str], ...]
+# value of a gauge or counter read on render(), either a single value or values per label set
+Reading = float | list[tuple[dict[str, str], float]]
+
+
+class Metrics:
+    """
+    Process wide phase timings, counters and gauges.
+
+    Phases are timed with `with metrics.time("read_csv"):` and reported as Prometheus summary with their
+    count and total seconds, plus the slowest call. Counters are increased with add(). Values kept elsewhere,
+    like the bytes of the shared frames, are registered as callables read on render(), so they cost nothing
+    between two scrapes. A sampling profiler can be armed for the next request of a file, see profile_next().
+    """
+
+    def __init__(self, prefix: str = "pandascsv"):
+        """
+        Initialize the Metrics class.
+        :param prefix: Prefix of all metric names.
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._phases: dict[Labels, list[float]] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._readings: dict[str, tuple[str, str, Callable[[], Reading]]] = {}
+        self._profile_pattern: str | None = None
+        self._profile: str | None = None
+        self.log = logging.getLogger(__name__)
+
+    @contextmanager
+    def time(self, phase: str, **labels: str) -> Iterator[None]:
+        """
+        Time a phase, also if it raises.
+        :param phase: Name of the phase, e.g. read_csv.
+        :param labels: Further labels, e.g. the engine.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, **labels)
+
+    def observe(self, phase: str, seconds: float, **labels: str) -> None:
+        """
+        Record the duration of a phase.
+        :param phase: Name of the phase.
+        :param seconds: Duration of the phase.
+        :param labels: Further labels.
+        """
+        key = _labels(phase=phase, **labels)
+        with self._lock:
+            stats = self._phases.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def add(self, counter: str, value: float = 1, **labels: str) -> None:
+        """
+        Increase a counter.
+        :param counter: Name of the counter without prefix, ending with _total.
+        :param value: Amount to add.
+        :param labels: Labels of the counter.
+        """
+        key = (counter, _labels(**labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register(self, name: str, kind: str, description: str, read: Callable[[], Reading]) -> None:
+        """
+        Register a value kept elsewhere, read on each render(). A later registration replaces an earlier one.
+        :param name: Name of the metric without prefix.
+        :param kind: Prometheus type, gauge or counter.
+        :param description: Help text of the metric.
+        :param read: Callable returning the current value or values per label set.
+        """
+        with self._lock:
+            self._readings[name] = (kind, description, read)
+
+    def render(self) -> str:
+        """
+        Format all metrics in the Prometheus text exposition format.
+        :return: Text ending with a newline.
+        """
+        with self._lock:
+            phases = dict(self._phases)
+            counters = dict(self._counters)
+            readings = dict(self._readings)
+        lines = []
+        name = f"{self.prefix}_phase_seconds"
+        lines += [f"# HELP {name} Duration of the phases of loading and serving files.", f"# TYPE {name} summary"]
+        for key, (count, total, _) in sorted(phases.items()):
+            lines += [f"{name}_count{_format(key)} {count:g}", f"{name}_sum{_format(key)} {total:.6f}"]
+        lines += [f"# HELP {name}_max Slowest call of each phase.", f"# TYPE {name}_max gauge"]
+        lines += [f"{name}_max{_format(key)} {stats[2]:.6f}" for key, stats in sorted(phases.items())]
+        for counter in sorted({counter for counter, _ in counters}):
+            lines.append(f"# TYPE {self.prefix}_{counter} counter")
+            lines += [
+                f"{self.prefix}_{counter}{_format(key)} {value:g}"
+                for (other, key), value in sorted(counters.items())
+                if other == counter
+            ]
+        for metric, (kind, description, read) in sorted(readings.items()):
+            try:
+                value = read()
+            except Exception:  # pylint: disable=broad-except
+                self.log.exception("Could not read metric %s", metric)
+                continue
+            lines += [f"# HELP {self.prefix}_{metric} {description}", f"# TYPE {self.prefix}_{metric} {kind}"]
+            values = value if isinstance(value, list) else [({}, value)]
+            lines += [f"{self.prefix}_{metric}{_format(_labels(**labels))} {number:g}" for labels, number in values]
+        return "\n".join(lines) + "\n"
+
+    def profile_next(self, pattern: str) -> None:
+        """
+        Arm the sampling profiler for the next request of a file.
+        :param pattern: fnmatch pattern of the file path, e.g. '*slow.csv'.
+        """
+        with self._lock:
+            self._profile_pattern = pattern
+        self.log.info("Profiling next request of a file matching %s", pattern)
+
+    @property
+    def last_profile(self) -> str | None:
+        """Stacks sampled by the last profile in the folded format of flamegraph.pl and speedscope."""
+        return self._profile
+
+    @contextmanager
+    def profile(self, file_path: str) -> Iterator[None]:
+        """
+        Sample the stacks of the current thread if the profiler is armed for the file, it is disarmed then.
+        :param file_path: Path of the file the request is for.
+        """
+        with self._lock:
+            armed = self._profile_pattern is not None and fnmatch.fnmatch(file_path, self._profile_pattern)
+            if armed:
+                self._profile_pattern = None
+        if not armed:
+            yield
+            return
+        sampler = _Sampler(threading.get_ident())
+        sampler.start()
+        try:
+            yield
+        finally:
+            self._profile = sampler.finish()
+            self.log.info("Profiled request of file %s: %d samples", file_path, sampler.samples)
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint next to the gRPC server.
+
+    GET /metrics returns the metrics in the Prometheus text format. POST /profile?file=<pattern> arms the
+    sampling profiler for the next request of a matching file and GET /profile returns its folded stacks.
+    """
+
+    def __init__(self, metrics: Metrics, host: str, port: int):
+        """
+        Initialize the MetricsServer class.
+        :param metrics: Metrics to serve.
+        :param host: Address to listen on, e.g. 127.0.0.1 to keep the endpoint local.
+        :param port: Port to listen on, 0 picks a free one.
+        """
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), _handler(metrics))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        self.log = logging.getLogger(__name__)
+
+    @property
+    def port(self) -> int:
+        return int(self._server.server_address[1])
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="pandascsv-metrics", daemon=True)
+        self._thread.start()
+        self.log.info("Serving metrics on http://%s:%d/metrics", *self._server.server_address[:2])
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+def _handler(metrics: Metrics) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            path = urlparse(self.path).path
+            if path == "/metrics":
+                self._reply(200, metrics.render(), "text/plain; version=0.0.4")
+            elif path == "/profile" and metrics.last_profile is not None:
+                self._reply(200, metrics.last_profile)
+            else:
+                self._reply(404, "not found\n")
+
+        def do_POST(self) -> None:  # pylint: disable=invalid-name
+            url = urlparse(self.path)
+            pattern = parse_qs(url.query).get("file", [""])[0]
+            if url.path != "/profile" or not pattern:
+                self._reply(400, "use POST /profile?file=<pattern>\n")
+                return
+            metrics.profile_next(pattern)
+            self._reply(202, f"profiling next request of a file matching {pattern}\n")
+
+        def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+            logging.getLogger(__name__).debug(format, *args)
+
+        def _reply(self, status: int, text: str, content_type: str = "text/plain") -> None:
+            body = text.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+class _Sampler(threading.Thread):
+    """Collects the stacks of a thread every SAMPLE_INTERVAL seconds."""
+
+    def __init__(self, thread_id: int):
+        super().__init__(name="pandascsv-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def finish(self) -> str:
+        self._done.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
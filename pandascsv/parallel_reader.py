@@ -0,0 +1,91 @@
+"""
+Parse a CSV file in chunks of rows on several threads.
+"""
+
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from .row_index import RowIndex, block_parameters
+
+# Chunks per worker, so workers finishing early pick up remaining chunks and fewer raw bytes are held at once.
+CHUNKS_PER_WORKER = 4
+
+
+def read_parallel(
+    read_csv: Callable[..., pd.DataFrame], row_index: RowIndex, columns: pd.Index, workers: int
+) -> pd.DataFrame:
+    """
+    Parse a file split at the row boundaries of its index on a thread pool.
+    The C engine releases the GIL while tokenizing and converting, so chunks are parsed concurrently.
+    Chunks are copied into preallocated columns one after another and dropped, so the result is not held twice.
+    Integers mixed with floats become floats. Columns whose chunks disagree otherwise are parsed again as
+    a whole, so the dtypes are the same as of a single pd.read_csv call.
+    :param read_csv: Callable parsing the file, the source can be replaced by passing it as first positional argument.
+    :param row_index: Index of the rows of the file.
+    :param columns: Names of the columns of the file.
+    :param workers: Number of threads.
+    :return: DataFrame containing the data from the file.
+    """
+    number_of_rows = row_index.number_of_rows
+    blocks = -(-number_of_rows // row_index.stride)
+    if blocks <= 1 or workers <= 1:
+        return read_csv()
+    chunk_count = min(blocks, workers * CHUNKS_PER_WORKER)
+    bounds = [min(int(block) * row_index.stride, number_of_rows) for block in np.linspace(0, blocks, chunk_count + 1)]
+
+    def read_chunk(start: int, stop: int) -> pd.DataFrame:
+        buffer, first_row = row_index.read(start, stop)
+        chunk = read_csv(io.BytesIO(buffer), **block_parameters(columns, stop - first_row))
+        if not isinstance(chunk.index, pd.RangeIndex):
+            # pandas takes surplus leading fields as index instead of failing like for the whole file
+            raise pd.errors.ParserError(f"Rows {start} to {stop} have more fields than columns.")
+        return chunk.iloc[start - first_row :]
+
+    log = logging.getLogger(__name__)
+    log.debug("Parsing %d rows in %d chunks on %d threads", number_of_rows, chunk_count, workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pandascsv-parse") as executor:
+        chunks = list(executor.map(read_chunk, bounds[:-1], bounds[1:]))
+
+    values: dict[int, np.ndarray | pd.api.extensions.ExtensionArray] = {}
+    for position, name in enumerate(columns):
+        dtype = common_dtype([chunk.dtypes.iloc[position] for chunk in chunks])
+        if dtype is not None:
+            values[position] = np.empty(number_of_rows, dtype=dtype)
+        else:
+            log.debug("Chunks of column '%s' have different dtypes, parsing it as a whole", name)
+    reparse = [position for position in range(len(columns)) if position not in values]
+
+    offset = 0
+    while chunks:
+        chunk = chunks.pop(0)
+        for position, column in values.items():
+            column[offset : offset + len(chunk)] = chunk.iloc[:, position].to_numpy()
+        offset += len(chunk)
+        del chunk
+    for position in reparse:
+        values[position] = read_csv(usecols=[position]).iloc[:, 0].array
+
+    df = pd.DataFrame({position: values[position] for position in range(len(columns))}, copy=False)
+    df.columns = columns
+    return df
+
+
+def common_dtype(dtypes: list) -> np.dtype | None:
+    """
+    Dtype holding the values of all chunks of a column without changing them.
+    :param dtypes: Dtypes of the column in the chunks.
+    :return: Common NumPy dtype, None if the chunks disagree in other ways than integers mixed with floats.
+    """
+    first = dtypes[0] if dtypes else None
+    if not isinstance(first, np.dtype) or not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+        return None
+    if all(dtype == first for dtype in dtypes):
+        return first
+    if all(dtype.kind in "if" for dtype in dtypes):
+        return np.result_type(*dtypes)
+    return None
@@ -0,0 +1,120 @@
+"""
+Min/max decimation pyramid of parsed files for plot previews.
+"""
+
+import logging
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+
+# Rows combined into a bucket of the finest level, and buckets combined into a bucket of the next level.
+LEVEL_FACTOR = 8
+# Rows reduced at once while building the finest level, a multiple of LEVEL_FACTOR.
+BUILD_ROWS = 1 << 20
+# Values kept per bucket, in the order of the channels of a level.
+STATISTICS = ("first", "min", "max", "last")
+
+_Buckets = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class Pyramid:
+    """
+    Decimated views of the numeric and date columns of a parsed file.
+
+    Level n splits the rows into buckets of LEVEL_FACTOR ** (n + 1) rows and keeps the first, smallest,
+    largest and last value of each bucket, so a plot drawn from a few thousand buckets shows the same
+    envelope as one drawn from all rows. Smallest and largest values ignore NaN.
+    Each level is a DataFrame with the channels '<column>_first', '<column>_min', '<column>_max' and
+    '<column>_last' per column and one row per bucket. Columns of other dtypes are left out.
+    """
+
+    def __init__(self, number_of_rows: int, levels: list[tuple[int, pd.DataFrame]]):
+        """
+        Initialize the Pyramid class. Use Pyramid.build to decimate a parsed file.
+        :param number_of_rows: Rows of the decimated file.
+        :param levels: Rows per bucket and decimated DataFrame of each level, finest level first.
+        """
+        self.number_of_rows = number_of_rows
+        self.levels = levels
+
+    @classmethod
+    def build(cls, frame: Any) -> "Pyramid":
+        """
+        Decimate a parsed file. The finest level is reduced from windows of BUILD_ROWS rows,
+        so frames parsing rows on demand are not loaded as a whole. Each coarser level is reduced
+        from the level before it.
+        :param frame: Parsed file, a DataFrame or one of the frames providing iloc[:, index].iloc[start:stop].
+        :return: Pyramid of the file.
+        """
+        number_of_rows = int(frame.shape[0])
+        positions = [position for position, dtype in enumerate(frame.dtypes) if dtype.kind in "biufM"]
+        parts: dict[int, list[_Buckets]] = {position: [] for position in positions}
+        for start in range(0, number_of_rows, BUILD_ROWS):
+            stop = min(start + BUILD_ROWS, number_of_rows)
+            for position in positions:
+                values = np.asarray(frame.iloc[:, position].iloc[start:stop].to_numpy())
+                parts[position].append(_reduce((values, values, values, values), LEVEL_FACTOR))
+
+        levels: list[tuple[int, pd.DataFrame]] = []
+        if number_of_rows == 0 or not positions:
+            return cls(number_of_rows, levels)
+        buckets = {
+            position: cast(_Buckets, tuple(np.concatenate(statistic) for statistic in zip(*parts.pop(position))))
+            for position in positions
+        }
+        bucket_rows = LEVEL_FACTOR
+        while True:
+            levels.append((bucket_rows, _level_frame(frame.columns, buckets)))
+            if len(buckets[positions[0]][0]) <= 1:
+                break
+            buckets = {position: _reduce(values, LEVEL_FACTOR) for position, values in buckets.items()}
+            bucket_rows *= LEVEL_FACTOR
+        pyramid = cls(number_of_rows, levels)
+        logging.getLogger(__name__).debug(
+            "Decimated %d rows of %d columns into %d levels of %d bytes",
+            number_of_rows,
+            len(positions),
+            len(levels),
+            pyramid.nbytes(),
+        )
+        return pyramid
+
+    def level(self, max_rows: int) -> tuple[int, pd.DataFrame]:
+        """
+        Select the finest level with at most `max_rows` buckets, the coarsest level if there is none.
+        :param max_rows: Maximal number of rows of the returned level.
+        :return: Rows per bucket and decimated DataFrame.
+        """
+        for bucket_rows, df in self.levels:
+            if df.shape[0] <= max_rows:
+                return bucket_rows, df
+        return self.levels[-1] if self.levels else (LEVEL_FACTOR, pd.DataFrame())
+
+    def nbytes(self) -> int:
+        """
+        Memory used by all levels.
+        :return: Size in bytes.
+        """
+        return sum(int(df.memory_usage(index=True, deep=False).sum()) for _, df in self.levels)
+
+    def release(self) -> None:
+        """Nothing to drop, the levels are the pyramid itself."""
+
+
+def _reduce(buckets: _Buckets, factor: int) -> _Buckets:
+    """Combine `factor` consecutive buckets, the last bucket may combine fewer."""
+    first, low, high, last = buckets
+    starts = np.arange(0, len(first), factor)
+    ends = np.minimum(starts + factor, len(first)) - 1
+    return first[starts], np.fmin.reduceat(low, starts), np.fmax.reduceat(high, starts), last[ends]
+
+
+def _level_frame(columns: pd.Index, buckets: dict[int, _Buckets]) -> pd.DataFrame:
+    values = {}
+    for position, statistics in buckets.items():
+        for statistic, array in zip(STATISTICS, statistics):
+            array = array.view()
+            array.flags.writeable = False
+            values[f"{columns[position]}_{statistic}"] = array
+    return pd.DataFrame(values, copy=False)
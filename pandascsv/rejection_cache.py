@@ -0,0 +1,120 @@
+"""
+Bounded store of files the plugin rejected, so they are not parsed again until they change.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .file_key import FileKey
+
+DATABASE_FILE = "rejected.sqlite3"
+
+
+class RejectionCache:
+    """
+    Files not_my_file() rejected, keyed by FileKey.
+
+    A rejected file is answered without parsing it again until its size, modification time or the parameters
+    change. Kept in a SQLite database, so decisions survive restarts and are shared by processes using the
+    same directory, or in memory if no directory is given. Least recently used entries beyond `max_entries`
+    are evicted. Hits and misses are counted to show the parsing saved.
+    """
+
+    def __init__(self, cache_dir: Path | None, max_entries: int):
+        """
+        Initialize the RejectionCache class. The database is opened on first use.
+        :param cache_dir: Directory for the database. None keeps the decisions in memory.
+        :param max_entries: Maximal number of rejected files kept. 0 disables the cache.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self.log = logging.getLogger(__name__)
+
+    def rejected(self, key: FileKey) -> str | None:
+        """
+        Look up a file and count the lookup as hit or miss.
+        :param key: Key of the file.
+        :return: Reason the file was rejected for, None if it was not rejected.
+        """
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute("SELECT reason FROM rejected WHERE key = ?", (_key(key),)).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE rejected SET used = ? WHERE key = ?", (time.time(), _key(key)))
+                    connection.commit()
+            except sqlite3.Error as e:
+                self.log.warning("Could not look up rejected file %s: %s", key.path, e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.log.debug("File %s was rejected before: %s (hits: %d)", key.path, row[0], self.hits)
+        return str(row[0])
+
+    def reject(self, key: FileKey, reason: str) -> None:
+        """
+        Remember a rejected file and evict least recently used entries beyond `max_entries`.
+        :param key: Key of the file.
+        :param reason: Why the file was rejected.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO rejected (key, reason, used) VALUES (?, ?, ?)",
+                    (_key(key), reason, time.time()),
+                )
+                connection.execute(
+                    "DELETE FROM rejected WHERE key IN "
+                    "(SELECT key FROM rejected ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                connection.commit()
+            except sqlite3.Error as e:
+                self.log.warning("Could not remember rejected file %s: %s", key.path, e)
+
+    def counts(self) -> dict[str, int]:
+        """
+        Lookups answered by the cache and lookups that had to check the file.
+        :return: Dictionary with the number of hits and misses.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the database, it is opened again on next use."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            database = ":memory:"
+            if self.cache_dir is not None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                database = str(self.cache_dir / DATABASE_FILE)
+            connection = sqlite3.connect(database, timeout=10, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS rejected (key TEXT PRIMARY KEY, reason TEXT, used REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS rejected_used ON rejected (used)")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+
+def _key(key: FileKey) -> str:
+    return json.dumps(list(key))
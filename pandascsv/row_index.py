@@ -0,0 +1,221 @@
+"""
+Byte offsets of the data rows of a CSV file, used to parse row windows without reading the whole file.
+"""
+
+import csv
+import gzip
+import logging
+import os
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from .compression import GzipIndex, compression_method
+
+# read_csv parameters changing which lines of the file are rows, not supported by the scan.
+UNSUPPORTED_PARAMETERS = ("skipfooter", "comment", "escapechar", "lineterminator")
+
+CHUNK_SIZE = 16 * 1024 * 1024
+# Bytes at the beginning of a file checked for line breaks the scan does not recognize.
+HEAD_SIZE = 64 * 1024
+_WHITESPACE = np.array([ord(" "), ord("\t"), ord("\r"), ord("\n")], dtype=np.uint8)
+
+
+class RowIndex:
+    """
+    Byte offsets of every `stride`-th data row of a CSV file.
+
+    The file is scanned once with vectorized NumPy operations over a memory map. Line breaks inside quoted
+    fields are ignored, blank lines and `skiprows` are skipped like pd.read_csv does. A window of rows is
+    then read by seeking to the closest indexed row, so at most `stride` rows more than requested are parsed.
+    Gzip files are scanned while decompressing, offsets then refer to the uncompressed content and windows
+    are decompressed starting at the closest checkpoint of a GzipIndex.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        offsets: np.ndarray,
+        number_of_rows: int,
+        stride: int,
+        file_size: int,
+        gzip_index: GzipIndex | None = None,
+    ):
+        """
+        Initialize the RowIndex class. Use RowIndex.build to scan a file.
+        :param file_path: Path of the CSV file.
+        :param offsets: Byte offsets of the data rows 0, stride, 2 * stride, ...
+        :param number_of_rows: Number of data rows in the file.
+        :param stride: Number of rows between two indexed rows.
+        :param file_size: Size of the (uncompressed) file at the time of the scan.
+        :param gzip_index: Checkpoints to read from if the file is gzip compressed.
+        """
+        self.file_path = file_path
+        self.offsets = offsets
+        self.number_of_rows = number_of_rows
+        self.stride = stride
+        self.file_size = file_size
+        self.gzip_index = gzip_index
+
+    @staticmethod
+    def supports(parameters: dict[str, Any], file_path: str = "") -> bool:
+        """
+        Check if files read with the given parameters can be indexed.
+        :param parameters: Parameters passed to pd.read_csv.
+        :param file_path: Path of the CSV file, its extension determines the inferred compression.
+            If the file exists, its beginning is checked for lines ending with a carriage return only.
+        :return: True if the rows of the file can be located by scanning, False otherwise.
+        """
+        if any(parameters.get(name) is not None for name in UNSUPPORTED_PARAMETERS):
+            return False
+        if not parameters.get("skip_blank_lines", True):
+            # blank lines would be rows of NaN, the scan skips them
+            return False
+        compression = compression_method(file_path, parameters)
+        if compression not in (None, "gzip"):
+            return False
+        if file_path and os.path.isfile(file_path) and _lone_carriage_return(file_path, compression == "gzip"):
+            return False
+        skiprows = parameters.get("skiprows")
+        if skiprows is not None and not isinstance(skiprows, int):
+            # skipped rows inside the data would end up in the blocks read
+            return False
+        encoding = str(parameters.get("encoding") or "utf-8").lower()
+        header = parameters.get("header", "infer")
+        return "16" not in encoding and "32" not in encoding and (header in ("infer", None) or isinstance(header, int))
+
+    @classmethod
+    def build(cls, file_path: str, parameters: dict[str, Any], stride: int) -> "RowIndex":
+        """
+        Scan a file and record the byte offset of every `stride`-th data row.
+        :param file_path: Path of the CSV file.
+        :param parameters: Parameters the file is read with.
+        :param stride: Number of rows between two indexed rows.
+        :return: Index of the file.
+        """
+        header = parameters.get("header", "infer")
+        if header is None or (header == "infer" and parameters.get("names") is not None):
+            header_rows = 0
+        else:
+            header_rows = 1 if header == "infer" else int(header) + 1
+        quotechar = None
+        if parameters.get("quoting", csv.QUOTE_MINIMAL) != csv.QUOTE_NONE:
+            quotechar = ord(parameters.get("quotechar") or '"')
+
+        skiprows = int(parameters.get("skiprows") or 0)
+        gzip_index = GzipIndex(file_path) if compression_method(file_path, parameters) == "gzip" else None
+        chunks = _file_chunks(file_path) if gzip_index is None else gzip_index.decompress()
+        offsets, row_count, file_size = _scan(chunks, quotechar, header_rows, stride, skiprows)
+        number_of_rows = max(row_count - header_rows, 0)
+        if parameters.get("nrows") is not None:
+            number_of_rows = min(number_of_rows, int(parameters["nrows"]))
+        logging.getLogger(__name__).debug(
+            "Indexed %d rows of file %s with stride %d", number_of_rows, file_path, stride
+        )
+        return cls(file_path, offsets, number_of_rows, stride, file_size, gzip_index)
+
+    def read(self, start: int, stop: int) -> tuple[bytes, int]:
+        """
+        Read the bytes containing the rows start to stop (exclusive).
+        :param start: First row to read.
+        :param stop: Row after the last row to read.
+        :return: Bytes beginning at a row boundary and the number of the first row contained.
+        """
+        first_block = start // self.stride
+        last_block = -(-stop // self.stride)
+        begin = int(self.offsets[first_block])
+        end = int(self.offsets[last_block]) if last_block < len(self.offsets) else self.file_size
+        if self.gzip_index is not None:
+            return self.gzip_index.read(begin, end), first_block * self.stride
+        with open(self.file_path, "rb") as file:
+            file.seek(begin)
+            return file.read(end - begin), first_block * self.stride
+
+
+def block_parameters(columns: list, nrows: int | None) -> dict[str, Any]:
+    """
+    Parameters overriding the ones of the file to parse a block of rows read through a RowIndex.
+    :param columns: Names of the columns of the file.
+    :param nrows: Number of rows in the block, None for all rows of the block.
+    :return: Parameters to pass to pd.read_csv in addition to the ones of the file.
+    """
+    return {"header": None, "names": list(columns), "skiprows": None, "nrows": nrows, "compression": None}
+
+
+def _lone_carriage_return(file_path: str, compressed: bool) -> bool:
+    """Check if lines at the beginning of a file end with a carriage return not followed by a line feed."""
+    try:
+        with gzip.open(file_path, "rb") if compressed else open(file_path, "rb") as file:
+            head = file.read(HEAD_SIZE)
+    except (OSError, EOFError):
+        return False
+    # a carriage return ending the head may be followed by a line feed
+    return b"\r" in head.replace(b"\r\n", b"").removesuffix(b"\r")
+
+
+def _file_chunks(file_path: str) -> Iterator[np.ndarray]:
+    """Content of an uncompressed file in chunks of a memory map."""
+    if os.path.getsize(file_path) == 0:
+        return
+    data = np.memmap(file_path, dtype=np.uint8, mode="r")
+    for base in range(0, len(data), CHUNK_SIZE):
+        yield data[base : base + CHUNK_SIZE]
+    del data
+
+
+def _scan(
+    chunks: Iterable[np.ndarray | bytes], quotechar: int | None, header_rows: int, stride: int, skiprows: int
+) -> tuple[np.ndarray, int, int]:
+    """
+    Locate the non-blank rows of a file.
+    Records are lines outside of quoted fields, the first `skiprows` records are skipped even if not blank.
+    :param chunks: Consecutive parts of the content of the file.
+    :return: Offsets of every stride-th data row, number of non-blank rows and size of the file.
+    """
+    offsets: list[np.ndarray] = []
+    record_count = 0
+    row_count = 0
+    in_quotes = False
+    pending_start = 0
+    pending_content = False
+
+    def keep(record_starts: np.ndarray, has_content: np.ndarray) -> None:
+        nonlocal record_count, row_count
+        records = np.arange(record_count, record_count + len(record_starts))
+        record_count += len(record_starts)
+        row_starts = record_starts[has_content & (records >= skiprows)]
+        data_rows = np.arange(row_count, row_count + len(row_starts)) - header_rows
+        offsets.append(row_starts[(data_rows >= 0) & (data_rows % stride == 0)])
+        row_count += len(row_starts)
+
+    file_size = 0
+    for part in chunks:
+        chunk = np.frombuffer(part, dtype=np.uint8) if isinstance(part, bytes) else part
+        base = file_size
+        file_size += len(chunk)
+        newlines = np.flatnonzero(chunk == ord("\n"))
+        if quotechar is not None:
+            quotes = np.flatnonzero(chunk == quotechar)
+            if len(quotes):
+                inside = (np.searchsorted(quotes, newlines) + in_quotes) % 2 == 1
+                newlines = newlines[~inside]
+                in_quotes = (len(quotes) + in_quotes) % 2 == 1
+        content = np.flatnonzero(~np.isin(chunk, _WHITESPACE))
+
+        if len(newlines) == 0:
+            pending_content = pending_content or len(content) > 0
+            continue
+
+        segment_starts = np.concatenate(([0], newlines[:-1] + 1))
+        has_content = np.searchsorted(content, segment_starts) < np.searchsorted(content, newlines)
+        has_content[0] |= pending_content
+        row_starts = np.concatenate(([pending_start], base + newlines[:-1] + 1)).astype(np.int64)
+        keep(row_starts, has_content)
+
+        pending_start = base + int(newlines[-1]) + 1
+        pending_content = bool(len(content)) and int(content[-1]) > int(newlines[-1])
+
+    if pending_start < file_size:
+        keep(np.array([pending_start], dtype=np.int64), np.array([pending_content]))
+
+    return np.concatenate(offsets) if offsets else np.zeros(0, dtype=np.int64), row_count, file_size
@@ -0,0 +1,291 @@
+"""
+Parsed files published in shared memory, so all worker processes of a host map them instead of parsing them again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from .disk_cache import DiskCache
+from .file_key import FileKey
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+META_FILE = "meta.json"
+# Locked shared by every process using an entry, exclusively by the process removing it.
+ATTACH_FILE = "attached"
+
+
+class SharedStore:
+    """
+    Directory in shared memory, e.g. below /dev/shm, holding parsed files of all plugin processes of a host.
+
+    Each entry is a directory with one .npy file per column and a meta.json, like the entries of DiskCache,
+    named after the FileKey of the file. Processes map the columns read-only instead of parsing the file again
+    and hold a shared flock on the `attached` file of the entry as long as they use it. The last process
+    releasing an entry removes it. Locks of crashed processes are dropped by the kernel, their entries are
+    removed by the next sweep. Columns stay mapped after their entry was removed, the memory is freed with
+    the last mapping. Only one process parses a file at a time, the others wait and map the published entry.
+    """
+
+    def __init__(self, store_dir: Path, max_bytes: int):
+        """
+        Initialize the SharedStore class.
+        :param store_dir: Directory on a memory file system like /dev/shm. Created if missing.
+        :param max_bytes: Upper limit for the total size of all entries. Files beyond it are not published.
+        """
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.log = logging.getLogger(__name__)
+
+    @staticmethod
+    def supported() -> bool:
+        """
+        Check if the platform provides the file locks used to count the processes of an entry.
+        :return: True on POSIX systems, False otherwise.
+        """
+        return fcntl is not None
+
+    def acquire(self, key: FileKey, load: Callable[[], pd.DataFrame]) -> "pd.DataFrame | SharedFrame":
+        """
+        Map the published entry of a file or load the file and publish it.
+        :param key: Key of the file.
+        :param load: Callable parsing the file if no process published it yet.
+        :return: SharedFrame mapping the entry, the loaded DataFrame itself if it could not be published.
+        """
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        name = _entry_name(key)
+        loading_path = self.store_dir / f".{name}.loading"
+        loading = _lock(loading_path, exclusive=True)
+        try:
+            frame = self._attach(name)
+            if frame is not None:
+                self.log.info("Mapped shared copy of file: %s", key.path)
+                return frame
+            df = load()
+            self.sweep()
+            return self._publish(name, key, df) or df
+        finally:
+            _remove_locked(loading_path, loading)
+
+    def sweep(self) -> int:
+        """
+        Remove entries no process uses anymore, e.g. left by crashed processes.
+        :return: Number of removed entries.
+        """
+        removed = 0
+        for path in self.store_dir.iterdir():
+            if path.name.startswith(".del-"):
+                # left by a process that crashed while removing it
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            if path.name.endswith(".loading"):
+                lock_path = path
+            elif path.is_dir():
+                lock_path = path / ATTACH_FILE
+            else:
+                continue
+            try:
+                fd = os.open(lock_path, os.O_RDONLY)
+            except OSError:
+                # a publisher that did not create its lock yet or an entry removed meanwhile
+                continue
+            if self._remove_unused(lock_path, fd):
+                removed += 1
+        if removed:
+            self.log.info("Removed %d unused shared entries from %s", removed, self.store_dir)
+        return removed
+
+    def nbytes(self) -> int:
+        """
+        Size of all published entries.
+        :return: Size in bytes.
+        """
+        total = 0
+        for entry_dir in self.store_dir.iterdir():
+            if entry_dir.name.startswith(".") or not entry_dir.is_dir():
+                continue
+            try:
+                total += sum(entry_file.stat().st_size for entry_file in entry_dir.iterdir())
+            except OSError:
+                # removed by another process meanwhile
+                continue
+        return total
+
+    def _attach(self, name: str) -> "SharedFrame | None":
+        entry_dir = self.store_dir / name
+        try:
+            fd = _lock(entry_dir / ATTACH_FILE, exclusive=False, create=False)
+        except FileNotFoundError:
+            return None
+        return self._map(entry_dir, fd)
+
+    def _publish(self, name: str, key: FileKey, df: pd.DataFrame) -> "SharedFrame | None":
+        if not DiskCache.storable(df):
+            self.log.debug("File %s can not be published in shared memory.", key.path)
+            return None
+        size = int(df.memory_usage(index=False, deep=False).sum())
+        if self.nbytes() + size > self.max_bytes:
+            self.log.info("Not publishing file %s, shared memory limit of %d bytes reached", key.path, self.max_bytes)
+            return None
+
+        temp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.store_dir))
+        fd = _lock(temp_dir / ATTACH_FILE, exclusive=False)
+        try:
+            for index, column in enumerate(df.columns):
+                np.save(temp_dir / f"{index}.npy", df[column].to_numpy(), allow_pickle=False)
+            with open(temp_dir / META_FILE, "w", encoding="utf-8") as meta_file:
+                json.dump({"file_path": key.path, "columns": df.columns.tolist()}, meta_file)
+            os.rename(temp_dir, self.store_dir / name)
+        except OSError as e:
+            self.log.warning("Could not publish file %s in shared memory: %s", key.path, e)
+            os.close(fd)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return None
+        self.log.info("Published file %s in shared memory (%d bytes)", key.path, size)
+        return self._map(self.store_dir / name, fd, published=True)
+
+    def _map(self, entry_dir: Path, fd: int, published: bool = False) -> "SharedFrame | None":
+        try:
+            with open(entry_dir / META_FILE, encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            columns = {
+                name: np.asarray(np.load(entry_dir / f"{index}.npy", mmap_mode="r", allow_pickle=False))
+                for index, name in enumerate(meta["columns"])
+            }
+        except (OSError, ValueError, KeyError) as e:
+            self.log.warning("Could not map shared entry %s: %s", entry_dir, e)
+            self._remove_unused(entry_dir / ATTACH_FILE, fd)
+            return None
+        df = pd.DataFrame(columns, columns=meta["columns"], copy=False)
+        return SharedFrame(df, lambda: self._remove_unused(entry_dir / ATTACH_FILE, fd), published)
+
+    def _remove_unused(self, lock_path: Path, fd: int) -> bool:
+        """Remove the entry or loading lock of `lock_path` unless another process holds its lock, close `fd`."""
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        try:
+            if not _same_file(lock_path, fd):
+                return False
+            if lock_path.name == ATTACH_FILE:
+                # renamed first, so no process maps the entry while its files are deleted
+                entry_dir = lock_path.parent
+                removed_dir = entry_dir.with_name(f".del-{entry_dir.name}-{os.getpid()}-{threading.get_ident()}")
+                os.rename(entry_dir, removed_dir)
+                shutil.rmtree(removed_dir, ignore_errors=True)
+                self.log.debug("Removed unused shared entry %s", entry_dir)
+            else:
+                lock_path.unlink()
+            return True
+        except OSError as e:
+            self.log.warning("Could not remove unused shared entry %s: %s", lock_path, e)
+            return False
+        finally:
+            os.close(fd)
+
+
+class SharedFrame:
+    """
+    Read-only DataFrame stand-in for the mapped columns of a SharedStore entry.
+    Only the members FileSimple relies on are provided: columns, dtypes, shape, empty and iloc.
+    release() detaches the process from the entry, which is removed if no other process uses it.
+    """
+
+    def __init__(self, df: pd.DataFrame, detach: Callable[[], Any], published: bool = False):
+        """
+        Initialize the SharedFrame class. Use SharedStore.acquire to map an entry.
+        :param df: DataFrame backed by the mapped columns.
+        :param detach: Callable releasing the lock of the entry.
+        :param published: True if this process parsed the file and published the entry.
+        """
+        self.published = published
+        self._df = df
+        self._detach: Callable[[], Any] | None = detach
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._df.columns
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return self._df.dtypes
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        rows, columns = self._df.shape
+        return int(rows), int(columns)
+
+    @property
+    def empty(self) -> bool:
+        return bool(self._df.empty)
+
+    @property
+    def iloc(self) -> Any:
+        return self._df.iloc
+
+    def nbytes(self) -> int:
+        """
+        Memory mapped by the columns, shared with the other processes using the entry.
+        :return: Size in bytes.
+        """
+        return int(self._df.memory_usage(index=True, deep=False).sum())
+
+    def release(self) -> None:
+        """Detach from the entry. The mapped columns stay readable as long as they are referenced."""
+        detach, self._detach = self._detach, None
+        if detach is not None:
+            detach()
+
+
+def _entry_name(key: FileKey) -> str:
+    return hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()[:32]
+
+
+def _lock(path: Path, exclusive: bool, create: bool = True) -> int:
+    """
+    Open and flock a file, retrying if it was removed or replaced while waiting for the lock.
+    :raises FileNotFoundError: If `create` is False and the file does not exist.
+    """
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT if create else os.O_RDONLY, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            if _same_file(path, fd):
+                return fd
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+        if not create:
+            raise FileNotFoundError(path)
+
+
+def _remove_locked(path: Path, fd: int) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _same_file(path: Path, fd: int) -> bool:
+    try:
+        return os.path.samestat(os.stat(path), os.fstat(fd))
+    except OSError:
+        return False
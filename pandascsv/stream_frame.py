@@ -0,0 +1,380 @@
+"""
+Read-only DataFrame stand-in serving row windows of a CSV file with a bounded number of rows in memory.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import NotMyFileError
+
+from .parallel_reader import common_dtype
+
+# read_csv parameters that can not be combined with parsing chunk by chunk.
+UNSUPPORTED_PARAMETERS = ("skipfooter", "iterator", "chunksize")
+
+
+@dataclass
+class _Chunk:
+    """Rows of a chunk and where its columns were spilled to."""
+
+    start: int
+    rows: int
+    # column position to byte offset and dtype in the scratch file
+    spilled: dict[int, tuple[int, np.dtype]] = field(default_factory=dict)
+
+
+@dataclass
+class _Cursor:
+    """Position of a running chunk iteration."""
+
+    reader: Any
+    start: int
+    chunk: pd.DataFrame
+
+
+class StreamFrame:
+    """
+    Streaming view on a CSV file for files larger than the available memory.
+
+    The file is parsed once with `chunksize` to determine the number of rows and the dtypes of all chunks.
+    Afterwards row windows are served by parsing chunks forward from the start of the file, continuing
+    where the previous window stopped. At most `max_rows` parsed rows are kept in memory.
+    Optionally numeric columns are spilled to a binary scratch file during the first pass, so their
+    windows are read back directly. The scratch file is removed on release.
+    Only the members FileSimple relies on are provided: columns, dtypes, shape, empty and iloc[:, index].
+    """
+
+    def __init__(
+        self,
+        read_csv: Callable[..., Any],
+        sample: pd.DataFrame,
+        dtypes: list,
+        chunks: list[_Chunk],
+        max_rows: int,
+        spill_path: str | None = None,
+    ):
+        """
+        Initialize the StreamFrame class. Use StreamFrame.scan to parse a file.
+        :param read_csv: Callable parsing the file, additional keyword arguments are passed to pd.read_csv.
+        :param sample: DataFrame containing the leading rows of the file.
+        :param dtypes: Dtypes of the columns combined over all chunks.
+        :param chunks: Chunks of the file in order.
+        :param max_rows: Number of rows parsed at once.
+        :param spill_path: Scratch file holding the spilled columns of the chunks.
+        """
+        self._read_csv = read_csv
+        self._sample = sample
+        self._dtypes = dtypes
+        self._chunks = chunks
+        self._max_rows = max_rows
+        self._spill_path = spill_path
+        self._spill_nbytes = 0 if spill_path is None else os.path.getsize(spill_path)
+        self._number_of_rows = sum(chunk.rows for chunk in chunks)
+        self._cursor: _Cursor | None = None
+        self._monotonic: tuple[bool, bool] | None = None
+        self._lock = threading.Lock()
+        self._remove_spill = weakref.finalize(self, _remove, spill_path)
+        self.log = logging.getLogger(__name__)
+
+    @staticmethod
+    def supports(parameters: dict[str, Any]) -> bool:
+        """
+        Check if files read with the given parameters can be parsed chunk by chunk.
+        :param parameters: Parameters passed to pd.read_csv.
+        :return: True if the file can be streamed, False otherwise.
+        """
+        return not any(parameters.get(name) is not None for name in UNSUPPORTED_PARAMETERS)
+
+    @classmethod
+    def scan(
+        cls, read_csv: Callable[..., Any], max_rows: int, spill_dir: Path | None = None
+    ) -> "pd.DataFrame | StreamFrame":
+        """
+        Parse a file chunk by chunk, keeping only the structure and optionally spilling numeric columns.
+        :param read_csv: Callable parsing the file, additional keyword arguments are passed to pd.read_csv.
+        :param max_rows: Number of rows parsed at once.
+        :param spill_dir: Directory for the scratch file. None disables spilling.
+        :return: The DataFrame itself if the file fits into a single chunk, a StreamFrame otherwise.
+        """
+        spill_file = None
+        if spill_dir is not None:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+            spill_file = tempfile.NamedTemporaryFile(prefix="pandascsv-", suffix=".spill", dir=spill_dir, delete=False)
+        chunks: list[_Chunk] = []
+        chunk_dtypes: list[list] = []
+        first: pd.DataFrame | None = None
+        monotonic, strict, last = True, True, None
+        try:
+            with read_csv(chunksize=max_rows) as reader:
+                for df in reader:
+                    if first is None:
+                        first = df
+                    chunk = _Chunk(chunks[-1].start + chunks[-1].rows if chunks else 0, len(df))
+                    chunks.append(chunk)
+                    chunk_dtypes.append(df.dtypes.tolist())
+                    if spill_file is not None:
+                        for position, dtype in enumerate(df.dtypes):
+                            if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+                                chunk.spilled[position] = (spill_file.tell(), dtype)
+                                spill_file.write(np.ascontiguousarray(df.iloc[:, position].to_numpy()).tobytes())
+                    if len(df) and df.shape[1] and monotonic:
+                        monotonic, strict, last = _monotonic(df.iloc[:, 0], monotonic, strict, last)
+        except BaseException as e:
+            if spill_file is not None:
+                spill_file.close()
+                _remove(spill_file.name)
+            if isinstance(e, pd.errors.ParserError):
+                raise NotMyFileError(str(e)) from e
+            raise
+        finally:
+            if spill_file is not None:
+                spill_file.close()
+
+        if len(chunks) <= 1:
+            if spill_file is not None:
+                _remove(spill_file.name)
+            return first if first is not None else read_csv(nrows=0)
+
+        # chunks disagreeing like numbers and strings give mixed values, like pd.read_csv with low_memory
+        dtypes = [common_dtype(list(column)) or np.dtype(object) for column in zip(*chunk_dtypes)]
+        if spill_file is not None:
+            # only columns numeric in all chunks are read back from the scratch file
+            for chunk in chunks:
+                chunk.spilled = {
+                    position: spilled
+                    for position, spilled in chunk.spilled.items()
+                    if dtypes[position].kind in "biuf"
+                }
+        sample = first.head(0) if first is not None else read_csv(nrows=0)
+        frame = cls(read_csv, sample, dtypes, chunks, max_rows, spill_file.name if spill_file is not None else None)
+        frame._monotonic = (monotonic, strict)
+        frame.log.info("Streaming %d rows in %d chunks", frame._number_of_rows, len(chunks))
+        return frame
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._sample.columns
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return pd.Series(self._dtypes, index=self.columns, dtype=object)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self._number_of_rows, len(self.columns))
+
+    @property
+    def empty(self) -> bool:
+        return self._number_of_rows == 0 or len(self.columns) == 0
+
+    @property
+    def iloc(self) -> "_StreamILoc":
+        return _StreamILoc(self)
+
+    def number_of_rows(self) -> int:
+        return self._number_of_rows
+
+    def window(self, index: int, start: int, stop: int) -> pd.Series:
+        """
+        Return rows start to stop (exclusive) of a column.
+        Spilled columns are read from the scratch file, all others by parsing the chunks containing the rows.
+        :param index: Zero based position of the column.
+        :param start: First row to return.
+        :param stop: Row after the last row to return.
+        :return: Series containing the values of the window.
+        """
+        if index < 0 or index >= len(self.columns):
+            raise IndexError(f"Column index {index} out of range!")
+        start, stop, _ = slice(start, stop).indices(self._number_of_rows)
+        stop = max(start, stop)
+        dtype = self._dtypes[index]
+        parts = []
+        if self._spill_path is not None and dtype.kind in "biuf":
+            for chunk in self._chunks:
+                if chunk.start + chunk.rows <= start or chunk.start >= stop:
+                    continue
+                offset, chunk_dtype = chunk.spilled[index]
+                mapped = np.memmap(self._spill_path, dtype=chunk_dtype, mode="r", offset=offset, shape=(chunk.rows,))
+                parts.append(mapped[max(start - chunk.start, 0) : stop - chunk.start].astype(dtype))
+        else:
+            with self._lock:
+                for chunk_start, df in self._stream(start, stop):
+                    values = df.iloc[max(start - chunk_start, 0) : stop - chunk_start, index].to_numpy()
+                    parts.append(values.astype(dtype))
+        values = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        return pd.Series(values, index=pd.RangeIndex(start, start + len(values)), name=self.columns[index])
+
+    def blocks(self, rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Parse the file once in blocks of rows with all columns, at most `max_rows` rows at once.
+        The chunk kept for the next window is not affected.
+        :param rows: Number of rows per block.
+        :return: Iterator over the blocks in the order of the file.
+        :raises NotMyFileError: If a block can not be parsed with the given parameters.
+        """
+        try:
+            with self._read_csv(chunksize=min(rows, self._max_rows)) as reader:
+                yield from reader
+        except pd.errors.ParserError as e:
+            raise NotMyFileError(str(e)) from e
+
+    def is_monotonic(self) -> tuple[bool, bool]:
+        """
+        Check if the first column is increasing, determined while scanning the file.
+        :return: Tuple of monotonic increasing and strictly increasing.
+        """
+        return self._monotonic if self._monotonic is not None else (False, False)
+
+    def nbytes(self) -> int:
+        """
+        Memory used by the chunk kept for the next window and the scratch file mapped by windows.
+        :return: Size in bytes.
+        """
+        cursor = self._cursor
+        chunk_nbytes = 0 if cursor is None else int(cursor.chunk.memory_usage(index=False, deep=False).sum())
+        return chunk_nbytes + self._spill_nbytes
+
+    def release(self) -> None:
+        """Drop the kept chunk and remove the scratch file."""
+        with self._lock:
+            self._close_cursor()
+        self._remove_spill()
+        self._spill_nbytes = 0
+
+    def _stream(self, start: int, stop: int) -> Iterator[tuple[int, pd.DataFrame]]:
+        """Yield the chunks containing rows start to stop, continuing the previous iteration if possible."""
+        cursor = self._cursor
+        if cursor is None or cursor.start > start:
+            self.log.debug("Streaming file from the beginning for rows %d to %d", start, stop)
+            self._close_cursor()
+            reader = self._read_csv(chunksize=self._max_rows)
+            try:
+                cursor = self._cursor = _Cursor(reader, 0, self._next(reader))
+            except BaseException:
+                reader.close()
+                raise
+        while cursor.start < stop:
+            if cursor.start + len(cursor.chunk) > start:
+                yield cursor.start, cursor.chunk
+            if cursor.start + len(cursor.chunk) >= stop:
+                break
+            cursor.start += len(cursor.chunk)
+            cursor.chunk = self._next(cursor.reader)
+
+    def _close_cursor(self) -> None:
+        if self._cursor is not None:
+            self._cursor.reader.close()
+            self._cursor = None
+
+    @staticmethod
+    def _next(reader: Iterator[pd.DataFrame]) -> pd.DataFrame:
+        try:
+            return next(reader)
+        except StopIteration as e:
+            raise NotMyFileError("File is shorter than when it was scanned.") from e
+        except pd.errors.ParserError as e:
+            raise NotMyFileError(str(e)) from e
+
+
+class _StreamILoc:
+    """Positional indexer of StreamFrame supporting iloc[:, column_index]."""
+
+    def __init__(self, frame: StreamFrame):
+        self._frame = frame
+
+    def __getitem__(self, key: Any) -> "StreamColumn":
+        if (
+            isinstance(key, tuple)
+            and len(key) == 2
+            and key[0] == slice(None)
+            and isinstance(key[1], (int, np.integer))
+        ):
+            return StreamColumn(self._frame, int(key[1]))
+        raise NotImplementedError(f"StreamFrame only supports iloc[:, column_index], got {key!r}.")
+
+
+class StreamColumn:
+    """
+    Column of a StreamFrame.
+    Slices taken with iloc are read through StreamFrame.window. Whether the first column is increasing is known
+    from the scan. All other members parse the whole column, which is logged as warning.
+    """
+
+    def __init__(self, frame: StreamFrame, index: int):
+        self._frame = frame
+        self._index = index
+
+    @property
+    def iloc(self) -> "_StreamColumnILoc":
+        return _StreamColumnILoc(self._frame, self._index)
+
+    @property
+    def is_monotonic_increasing(self) -> bool:
+        if self._index == 0:
+            return self._frame.is_monotonic()[0]
+        return bool(self._full().is_monotonic_increasing)
+
+    @property
+    def is_unique(self) -> bool:
+        if self._index == 0 and self._frame.is_monotonic()[0]:
+            return self._frame.is_monotonic()[1]
+        return bool(self._full().is_unique)
+
+    def __len__(self) -> int:
+        return self._frame.number_of_rows()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._full(), name)
+
+    def _full(self) -> pd.Series:
+        self._frame.log.warning("Reading all rows of streamed column %d at once.", self._index)
+        return self._frame.window(self._index, 0, self._frame.number_of_rows())
+
+
+class _StreamColumnILoc:
+    """Positional indexer of StreamColumn."""
+
+    def __init__(self, frame: StreamFrame, index: int):
+        self._frame = frame
+        self._index = index
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, slice) and key.step in (None, 1):
+            start = 0 if key.start is None else key.start
+            stop = self._frame.number_of_rows() if key.stop is None else key.stop
+            return self._frame.window(self._index, start, stop)
+        if isinstance(key, (int, np.integer)):
+            row = int(key) + self._frame.number_of_rows() if key < 0 else int(key)
+            return self._frame.window(self._index, row, row + 1).iloc[0]
+        raise NotImplementedError(f"StreamColumn only supports slices and positions, got {key!r}.")
+
+
+def _monotonic(series: pd.Series, monotonic: bool, strict: bool, last: Any) -> tuple[bool, bool, Any]:
+    """Continue checking a column for increasing values with the values of the next chunk."""
+    try:
+        monotonic = monotonic and bool(series.is_monotonic_increasing)
+        if monotonic and last is not None:
+            monotonic = bool(series.iloc[0] >= last)
+            strict = strict and bool(series.iloc[0] > last)
+        strict = strict and monotonic and bool(series.is_unique)
+    except TypeError:
+        # values of different types in different chunks
+        monotonic = False
+    return monotonic, strict and monotonic, series.iloc[-1]
+
+
+def _remove(path: str | None) -> None:
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,196 @@
+"""
+Keep the parsed content of an append-only CSV file up to date by parsing only appended rows.
+"""
+
+import io
+import logging
+import os
+from typing import Any, BinaryIO, Callable, cast
+
+import numpy as np
+import pandas as pd
+
+from .compression import compression_method
+from .row_index import block_parameters
+
+# read_csv parameters that can not be applied to the appended rows on their own.
+UNSUPPORTED_PARAMETERS = ("usecols", "index_col", "skipfooter", "nrows", "iterator", "chunksize")
+
+# Bytes before the parsed end of the file compared to detect a rewritten file.
+FINGERPRINT_SIZE = 4096
+_BLOCK_SIZE = 64 * 1024
+
+
+class TailReader:
+    """
+    Parsed content of a CSV file that is growing while it is read.
+
+    Only terminated lines are parsed. The byte offset after the last parsed line and a fingerprint of the
+    bytes before it are kept. If the size or modification time of the file changes, only the bytes appended
+    after that offset are parsed and appended to the existing columns. Columns are kept in buffers with spare
+    capacity, growing geometrically, so following a file does not copy all rows on each refresh. Returned
+    DataFrames are views on these buffers and stay unchanged by later refreshes. If the file became shorter or the
+    fingerprint does not match anymore, the file was rewritten and is parsed again as a whole.
+    Line breaks inside quoted fields of the last lines may delay rows until the next refresh.
+    """
+
+    def __init__(self, file_path: str, read_csv: Callable[..., pd.DataFrame]):
+        """
+        Initialize the TailReader class. The file is parsed by the first call of refresh().
+        :param file_path: Path of the CSV file.
+        :param read_csv: Callable parsing the file, the source can be replaced by passing it as first positional
+            argument. Additional keyword arguments are passed to pd.read_csv.
+        """
+        self.file_path = file_path
+        self.df: pd.DataFrame | None = None
+        self._read_csv = read_csv
+        self._end = 0
+        self._fingerprint = b""
+        self._stat: tuple[int, int] | None = None
+        # columns of self.df with spare capacity, None until rows are appended
+        self._buffers: list[np.ndarray] | None = None
+        self.log = logging.getLogger(__name__)
+
+    @staticmethod
+    def supports(parameters: dict[str, Any], file_path: str) -> bool:
+        """
+        Check if appended rows of files read with the given parameters can be parsed on their own.
+        :param parameters: Parameters passed to pd.read_csv.
+        :param file_path: Path of the CSV file, compressed files are not supported.
+        :return: True if the file can be read incrementally, False otherwise.
+        """
+        if any(parameters.get(name) is not None for name in UNSUPPORTED_PARAMETERS):
+            return False
+        return compression_method(file_path, parameters) is None
+
+    def refresh(self) -> pd.DataFrame:
+        """
+        Bring the parsed content up to date with the file.
+        :return: DataFrame containing all terminated rows of the file.
+        :raises pd.errors.ParserError: If the file can not be parsed as a whole.
+        """
+        stat = os.stat(self.file_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self.df is not None and key == self._stat:
+            return self.df
+
+        if self.df is None or not self._same_prefix(stat.st_size):
+            if self.df is not None:
+                self.log.info("File %s was truncated or rewritten, reading it again", self.file_path)
+            self._load(stat.st_size)
+        else:
+            try:
+                self._append(stat.st_size)
+            except (ValueError, pd.errors.ParserError) as e:
+                # e.g. a quoted field still being written, retried on the next refresh
+                self.log.warning("Could not parse rows appended to file %s: %s", self.file_path, e)
+                return self.df
+        self._stat = key
+        return self.df
+
+    def _load(self, size: int) -> None:
+        end = self._line_end(size)
+        self.log.info("Reading file %s up to byte %d", self.file_path, end)
+        with open(self.file_path, "rb") as file:
+            self.df = self._read_csv(io.BufferedReader(_Prefix(file, end)))
+        self._buffers = None
+        self._mark(end)
+
+    def _append(self, size: int) -> None:
+        end = self._line_end(size)
+        if end <= self._end:
+            return
+        with open(self.file_path, "rb") as file:
+            file.seek(self._end)
+            buffer = file.read(end - self._end)
+        df = cast(pd.DataFrame, self.df)
+        tail = self._read_csv(io.BytesIO(buffer), **block_parameters(df.columns, None))
+        if len(tail) == 0:
+            self._mark(end)
+            return
+        if all(isinstance(dtype, np.dtype) for dtype in (*df.dtypes, *tail.dtypes)):
+            appended = self._extend(df, tail)
+        else:
+            # extension dtypes are not kept in buffers
+            tail.index = pd.RangeIndex(len(df), len(df) + len(tail))
+            appended = pd.concat([df, tail])
+            self._buffers = None
+        for name, before, after in zip(df.columns, df.dtypes, appended.dtypes):
+            if before != after:
+                self.log.warning("Dtype of column '%s' changed from %s to %s by appended rows", name, before, after)
+        self.log.debug("Appended %d rows of file %s", len(tail), self.file_path)
+        self.df = appended
+        self._mark(end)
+
+    def _extend(self, df: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame:
+        """Append the parsed rows to the column buffers, growing them to at least twice their size if full."""
+        rows = len(df) + len(tail)
+        buffers = self._buffers
+        if buffers is None:
+            buffers = [df.iloc[:, position].to_numpy() for position in range(df.shape[1])]
+        capacity = len(buffers[0]) if buffers else 0
+        if capacity < rows:
+            capacity = max(rows, 2 * capacity)
+        extended = []
+        for position, buffer in enumerate(buffers):
+            dtype = _appended_dtype(df.iloc[:, position], tail.iloc[:, position])
+            if len(buffer) < capacity or buffer.dtype != dtype:
+                grown = np.empty(capacity, dtype=dtype)
+                grown[: len(df)] = buffer[: len(df)]
+                buffer = grown
+            buffer[len(df) : rows] = tail.iloc[:, position].to_numpy()
+            extended.append(buffer)
+        self._buffers = extended
+        appended = pd.DataFrame({position: buffer[:rows] for position, buffer in enumerate(extended)}, copy=False)
+        appended.columns = df.columns
+        return appended
+
+    def _mark(self, end: int) -> None:
+        self._end = end
+        self._fingerprint = self._read_fingerprint(end)
+
+    def _same_prefix(self, size: int) -> bool:
+        return size >= self._end and self._read_fingerprint(self._end) == self._fingerprint
+
+    def _read_fingerprint(self, end: int) -> bytes:
+        begin = max(end - FINGERPRINT_SIZE, 0)
+        with open(self.file_path, "rb") as file:
+            file.seek(begin)
+            return file.read(end - begin)
+
+    def _line_end(self, size: int) -> int:
+        """Offset after the last line break within the first `size` bytes of the file."""
+        with open(self.file_path, "rb") as file:
+            position = size
+            while position > 0:
+                begin = max(position - _BLOCK_SIZE, 0)
+                file.seek(begin)
+                found = file.read(position - begin).rfind(b"\n")
+                if found >= 0:
+                    return begin + found + 1
+                position = begin
+        return 0
+
+
+def _appended_dtype(parsed: pd.Series, tail: pd.Series) -> np.dtype:
+    """Dtype pd.concat gives a column extended by appended rows, e.g. float for integers followed by floats."""
+    dtype: np.dtype = tail.dtype if len(parsed) == 0 else pd.concat([parsed.iloc[:1], tail.iloc[:1]]).dtype
+    return dtype
+
+
+class _Prefix(io.RawIOBase):
+    """Leading bytes of a file, so lines appended while parsing are not seen."""
+
+    def __init__(self, file: BinaryIO, size: int):
+        self._file = file
+        self._remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self._remaining <= 0:
+            return 0
+        count: int = self._file.readinto(memoryview(buffer)[: self._remaining])  # type: ignore[attr-defined]
+        self._remaining -= count
+        return count
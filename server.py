@@ -0,0 +1,94 @@
+"""
+Entry point of the plugin binding the gRPC server before pandas is imported.
+
+external_file_data imports pandas, numpy and the helpers of the plugin, which takes longer than starting the
+gRPC server of ods_exd_api_box. It is imported on a background thread instead, while the server binds and
+answers health checks. Requests arriving meanwhile wait until the plugin is ready.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Any
+
+from ods_exd_api_box import serve_plugin
+
+# Name and patterns of external_file_data, repeated to register the plugin before the module is imported.
+FILE_TYPE_NAME = "PANDASCSV"
+FILE_PATTERNS = ["*.csv", "*.csv.gz", "*.csv.bz2", "*.csv.xz"]
+if importlib.util.find_spec("zstandard") is not None:
+    FILE_PATTERNS.append("*.csv.zst")
+
+
+class LazyPlugin:
+    """
+    Factory of the served files, importing the module of the plugin on a background thread.
+    """
+
+    def __init__(self, module_name: str = "external_file_data"):
+        """
+        Initialize the LazyPlugin class.
+        :param module_name: Module providing start() and ExternalFile.
+        """
+        self.module_name = module_name
+        self._module: ModuleType | None = None
+        self._error: BaseException | None = None
+        self._ready = threading.Event()
+        self.log = logging.getLogger(__name__)
+
+    def load(self) -> None:
+        """
+        Import the module and start the plugin with its configuration, called on the background thread.
+        Failures are kept and raised by create().
+        """
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(self.module_name)
+            module.start(module.ExternalFileData.config)
+            self._module = module
+            self.log.info("Plugin %s ready after %.2f s", self.module_name, time.perf_counter() - started)
+        except BaseException as e:  # pylint: disable=broad-except
+            self._error = e
+            self.log.exception("Could not load plugin %s", self.module_name)
+        finally:
+            self._ready.set()
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def create(self, file_path: str, parameters: str) -> Any:
+        """
+        Create the served file, waiting for the plugin to be loaded.
+        :param file_path: Path of the file.
+        :param parameters: Parameters of the EXD-API Open request.
+        :return: ExternalFile of the plugin.
+        :raises RuntimeError: If the plugin could not be loaded.
+        """
+        self._ready.wait()
+        if self._module is None:
+            raise RuntimeError(f"Plugin {self.module_name} could not be loaded") from self._error
+        return self._module.ExternalFile.create(file_path, parameters)
+
+
+def main() -> None:
+    """
+    Serve the plugin. A process whose plugin cannot be loaded exits, so the container is restarted.
+    """
+    plugin = LazyPlugin()
+
+    def load() -> None:
+        plugin.load()
+        if plugin.failed:
+            os._exit(1)  # pylint: disable=protected-access
+
+    threading.Thread(target=load, name="pandascsv-import", daemon=True).start()
+    serve_plugin(file_type_name=FILE_TYPE_NAME, file_type_factory=plugin.create, file_type_file_patterns=FILE_PATTERNS)
+
+
+if __name__ == "__main__":
+    main()
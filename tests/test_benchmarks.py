@@ -0,0 +1,70 @@
+import logging
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from ods_exd_api_box import FileHandlerRegistry
+
+from benchmarks.bench_reader import run_case
+from benchmarks.cold_start import COMMANDS, ROOT_DIR, measure
+from benchmarks.generator import SHAPES, generate
+from benchmarks.load_test import Session
+from benchmarks.load_test import run as run_load
+
+
+class TestBenchmarks(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+
+    def test_generated_files_are_reproducible(self):
+        for shape in SHAPES:
+            first = generate(shape, self.temp_dir / "first", 200, seed=3)
+            second = generate(shape, self.temp_dir / "second", 200, seed=3)
+            self.assertEqual(first.path.read_bytes(), second.path.read_bytes(), shape)
+            df = pd.read_csv(first.path, **first.parameters)
+            self.assertEqual(df.shape, (first.number_of_rows, first.number_of_columns), shape)
+        self.assertNotEqual(
+            generate("long", self.temp_dir, 200, seed=1).path.read_bytes(),
+            generate("long", self.temp_dir, 200, seed=2).path.read_bytes(),
+        )
+
+    def test_run_case(self):
+        with mock.patch.dict(FileHandlerRegistry._handlers):  # pylint: disable=protected-access
+            result = run_case(generate("semicolon", self.temp_dir, 100), repeat=2, window_rows=10, windows=3)
+            rejected = run_case(generate("text", self.temp_dir, 100), repeat=2)
+        self.assertEqual(result["number_of_rows"], 100)
+        self.assertEqual(set(result["operations"]), {"open", "structure", "values_full", "values_window"})
+        self.assertEqual(result["operations"]["structure"]["count"], 2)
+        self.assertEqual(result["operations"]["values_window"]["count"], 6)
+        self.assertGreater(result["operations"]["values_full"]["first_mb_per_s"], 0)
+        self.assertEqual(set(rejected["operations"]), {"reject"})
+
+    def test_cold_start(self):
+        result = measure(COMMANDS["server.py"], ROOT_DIR / "data" / "example.csv")
+        self.assertEqual(set(result), {"connect_s", "first_structure_s", "second_structure_s"})
+        self.assertGreater(result["connect_s"], 0)
+        self.assertGreaterEqual(result["first_structure_s"], result["connect_s"])
+
+    def test_load_test(self):
+        files = [generate(shape, self.temp_dir, 100) for shape in ("long", "semicolon")]
+        with mock.patch.dict(FileHandlerRegistry._handlers):  # pylint: disable=protected-access
+            result = run_load(files, [1, 3], 0.3, Session(windows=2, window_rows=10), max_workers=4, in_process=True)
+        self.assertEqual([level["clients"] for level in result["levels"]], [1, 3])
+        for level in result["levels"]:
+            self.assertEqual(level["errors"], {})
+            self.assertGreater(level["sessions"], 0)
+            self.assertEqual(set(level["operations"]), {"open", "structure", "values", "close"})
+            self.assertEqual(level["operations"]["values"]["count"], 2 * level["sessions"])
+            operation = level["operations"]["structure"]
+            self.assertLessEqual(operation["p50_s"], operation["p99_s"])
+            self.assertLessEqual(operation["p99_s"], operation["max_s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import logging
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import exd_api, ods
+
+from pandascsv import ColumnBuffer, ColumnBuffers, CompactFrame, flag_missing
+from pandascsv.column_buffers import ARRAYS, VALID_FLAGS
+
+# pylint: disable=no-member
+
+
+class TestColumnBuffers(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _fill(self, buffer: ColumnBuffer, data_type: int, start: int, stop: int) -> exd_api.ValuesResult.ChannelValues:
+        channel = exd_api.ValuesResult.ChannelValues(id=0)
+        channel.values.data_type = data_type
+        buffer.fill(channel, data_type, start, stop)
+        return channel
+
+    def _values(self, channel: exd_api.ValuesResult.ChannelValues) -> list:
+        return list(getattr(channel.values, ARRAYS[channel.values.data_type][0]).values)
+
+    def test_values_like_the_column(self):
+        columns = [
+            (pd.Series(np.arange(300, dtype=np.int64)), ods.DataTypeEnum.DT_LONGLONG),
+            (pd.Series(np.arange(300, dtype=np.int64) * 100), ods.DataTypeEnum.DT_LONGLONG),
+            (pd.Series(np.arange(300, dtype=np.int64) - 150), ods.DataTypeEnum.DT_LONGLONG),
+            (pd.Series(np.arange(300, dtype=np.int64) * 2**55), ods.DataTypeEnum.DT_LONGLONG),
+            (pd.Series((np.arange(300) % 100 - 50).astype(np.int8)), ods.DataTypeEnum.DT_SHORT),
+            (pd.Series(np.arange(300, dtype=np.int32) * -70000), ods.DataTypeEnum.DT_LONG),
+            (pd.Series(np.arange(300) / 3), ods.DataTypeEnum.DT_DOUBLE),
+            (pd.Series((np.arange(300) / 4).astype(np.float32)), ods.DataTypeEnum.DT_FLOAT),
+            (pd.Series(np.arange(300, dtype=np.uint64)), ods.DataTypeEnum.DT_DOUBLE),
+        ]
+        for column, data_type in columns:
+            buffer = ColumnBuffer.of(column, ARRAYS[data_type][1])
+            self.assertIsNone(buffer.valid)
+            for start, stop in ((0, 300), (10, 20), (299, 300), (5, 5)):
+                channel = self._fill(buffer, data_type, start, stop)
+                self.assertEqual(self._values(channel), column.iloc[start:stop].tolist(), (column.dtype, start))
+                self.assertEqual(len(channel.flags.values), 0)
+
+    def test_integers_encoded_like_protobuf(self):
+        for data_type, dtype in ((ods.DataTypeEnum.DT_LONGLONG, np.int64), (ods.DataTypeEnum.DT_LONG, np.int32)):
+            info = np.iinfo(dtype)
+            values = np.array([0, 1, -1, 127, 128, -128, 16384, info.min, info.max, info.min + 1, 2**31 - 1], dtype)
+            channel = self._fill(ColumnBuffer.of(pd.Series(values), np.dtype(dtype)), data_type, 0, len(values))
+            expected = exd_api.ValuesResult.ChannelValues(id=0)
+            expected.values.data_type = data_type
+            getattr(expected.values, ARRAYS[data_type][0]).values.extend(values.tolist())
+            self.assertEqual(channel.SerializeToString(), expected.SerializeToString(), dtype)
+
+    def test_numpy_columns_not_copied(self):
+        df = pd.DataFrame({"a": np.arange(10, dtype=np.int64), "b": np.arange(10) * 0.5})
+        buffers = ColumnBuffers(df)
+        self.assertTrue(np.shares_memory(buffers.column(1, ods.DataTypeEnum.DT_DOUBLE).values, df["b"].to_numpy()))
+        self.assertIs(buffers.column(1, ods.DataTypeEnum.DT_DOUBLE), buffers.column(1, ods.DataTypeEnum.DT_DOUBLE))
+        self.assertIsNone(buffers.column(0, ods.DataTypeEnum.DT_STRING))
+        self.assertEqual(buffers.nbytes(), 0)
+
+    def test_missing_values_flagged(self):
+        buffer = ColumnBuffer.of(pd.Series([1.5, np.nan, 3.5, 4.5]), np.dtype("<f8"))
+        channel = self._fill(buffer, ods.DataTypeEnum.DT_DOUBLE, 0, 4)
+        values = self._values(channel)
+        self.assertEqual(values[0], 1.5)
+        self.assertTrue(math.isnan(values[1]))
+        self.assertEqual(list(channel.flags.values), [VALID_FLAGS, 0, VALID_FLAGS, VALID_FLAGS])
+        # windows without missing values carry no flags
+        self.assertEqual(len(self._fill(buffer, ods.DataTypeEnum.DT_DOUBLE, 2, 4).flags.values), 0)
+
+    def test_missing_values_of_filled_channel_flagged(self):
+        channel = exd_api.ValuesResult.ChannelValues(id=0)
+        channel.values.data_type = ods.DataTypeEnum.DT_FLOAT
+        channel.values.float_array.values[:] = [np.nan, 2.5]
+        flag_missing(channel)
+        self.assertEqual(list(channel.flags.values), [0, VALID_FLAGS])
+
+        # channels without missing values and other data types carry no flags
+        channel.values.float_array.values[:] = [1.5, 2.5]
+        channel.ClearField("flags")
+        flag_missing(channel)
+        self.assertEqual(len(channel.flags.values), 0)
+        channel.values.data_type = ods.DataTypeEnum.DT_STRING
+        channel.values.string_array.values[:] = ["x"]
+        flag_missing(channel)
+        self.assertEqual(len(channel.flags.values), 0)
+
+    def test_nullable_column(self):
+        column = pd.Series([1, None, 3], dtype="Int64")
+        buffer = ColumnBuffer.of(column, np.dtype("<i8"))
+        self.assertEqual(buffer.values.dtype, np.int64)
+        self.assertGreater(buffer.nbytes(), 0)
+        channel = self._fill(buffer, ods.DataTypeEnum.DT_LONGLONG, 0, 3)
+        self.assertEqual(self._values(channel), [1, 0, 3])
+        self.assertEqual(list(channel.flags.values), [VALID_FLAGS, 0, VALID_FLAGS])
+
+    def test_compact_frame_widened_into_buffer(self):
+        df = pd.DataFrame({"counter": np.arange(1000) * 100, "half": np.arange(1000) * 0.5})
+        frame = CompactFrame.compact(df, floats=True)
+        self.assertIsInstance(frame, CompactFrame)
+        buffers = ColumnBuffers(frame)
+        counter = buffers.column(0, ods.DataTypeEnum.DT_LONGLONG)
+        self.assertEqual(counter.values.dtype, np.int64)
+        self.assertEqual(buffers.nbytes(), counter.values.nbytes)
+        self.assertEqual(
+            self._values(self._fill(counter, ods.DataTypeEnum.DT_LONGLONG, 990, 1000)), df["counter"][990:].tolist()
+        )
+        half = buffers.column(1, ods.DataTypeEnum.DT_DOUBLE)
+        self.assertEqual(half.values.dtype, np.float64)
+        self.assertEqual(self._values(self._fill(half, ods.DataTypeEnum.DT_DOUBLE, 0, 5)), df["half"][:5].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import ColumnStatistics, CompactFrame, LazyFrame, StreamFrame
+
+
+class TestColumnStatistics(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def test_compute(self):
+        df = pd.DataFrame(
+            {
+                "count": np.arange(100) - 10,
+                "value": [np.nan if i % 10 == 0 else i * 0.5 for i in range(100)],
+                "flag": np.arange(100) % 3 == 0,
+                "text": [None if i % 25 == 0 else f"x{i}" for i in range(100)],
+                "empty": np.full(100, np.nan),
+            }
+        )
+        with mock.patch("pandascsv.column_statistics.WINDOW_ROWS", 32):
+            statistics = ColumnStatistics.compute(df)
+        self.assertEqual(
+            statistics.columns,
+            [
+                {"null_count": 0, "minimum": -10, "maximum": 89, "average": 39.5},
+                {"null_count": 10, "minimum": 0.5, "maximum": 49.5, "average": df["value"].mean()},
+                {"null_count": 0, "minimum": 0, "maximum": 1, "average": 34 / 100},
+                {"null_count": 4},
+                {"null_count": 100},
+            ],
+        )
+        self.assertIsInstance(statistics.columns[0]["minimum"], int)
+        self.assertGreater(statistics.nbytes(), 0)
+
+    def test_compact_frame(self):
+        df = pd.DataFrame({"a": np.arange(1000), "b": np.arange(1000) * 0.25})
+        frame = CompactFrame.compact(df, floats=True)
+        self.assertIsInstance(frame, CompactFrame)
+        self.assertEqual(ColumnStatistics.compute(frame).columns, ColumnStatistics.compute(df).columns)
+
+    def test_frames_parsing_on_demand(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(f"{i},{i * 0.5},x{i}\n" for i in range(100)))
+        self.addCleanup(os.remove, temp_file.name)
+        read_csv = mock.Mock(side_effect=lambda source=None, **overrides: pd.read_csv(temp_file.name, **overrides))
+        expected = ColumnStatistics.compute(pd.read_csv(temp_file.name)).columns
+
+        for frame in (LazyFrame(read_csv, pd.read_csv(temp_file.name, nrows=10)), StreamFrame.scan(read_csv, 30)):
+            read_csv.reset_mock()
+            with mock.patch("pandascsv.column_statistics.WINDOW_ROWS", 32):
+                self.assertEqual(ColumnStatistics.compute(frame).columns, expected)
+            # all columns are reduced in a single pass over the file
+            read_csv.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
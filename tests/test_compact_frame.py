@@ -0,0 +1,56 @@
+import logging
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import CompactFrame
+
+
+class TestCompactFrame(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "flag": np.arange(1000) % 2,
+                "counter": np.arange(1000) * 100,
+                "signed": np.arange(1000) - 500,
+                "large": np.arange(1000) * 2**40,
+                "half": np.arange(1000) * 0.5,
+                "third": np.arange(1000) / 3,
+                "text": [f"x{i}" for i in range(1000)],
+            }
+        )
+
+    def test_compact(self):
+        df = self._frame()
+        frame = CompactFrame.compact(df)
+        self.assertIsInstance(frame, CompactFrame)
+        self.assertEqual(
+            frame._df.dtypes.tolist(), [np.int8, np.int32, np.int16, np.int64, np.float64, np.float64, object]
+        )
+        self.assertLess(frame.nbytes(), int(df.memory_usage(index=True).sum()))
+        pd.testing.assert_series_equal(frame.dtypes, df.dtypes)
+        self.assertEqual(frame.shape, df.shape)
+
+        for index in range(df.shape[1]):
+            pd.testing.assert_series_equal(frame.iloc[:, index].iloc[10:20], df.iloc[10:20, index])
+            self.assertEqual(frame.iloc[:, index].iloc[5], df.iloc[5, index])
+        self.assertTrue(frame.iloc[:, 1].is_monotonic_increasing and frame.iloc[:, 1].is_unique)
+        self.assertFalse(frame.iloc[:, 0].is_unique)
+        np.testing.assert_array_equal(frame.iloc[:, 2].to_numpy(), df["signed"].to_numpy())
+
+    def test_compact_floats(self):
+        frame = CompactFrame.compact(self._frame(), floats=True)
+        self.assertEqual(frame._df.dtypes["half"], np.float32)
+        self.assertEqual(frame._df.dtypes["third"], np.float64)
+        self.assertEqual(frame.iloc[:, 4].iloc[0:3].dtype, np.float64)
+
+    def test_nothing_to_compact(self):
+        df = pd.DataFrame({"a": [2**40, 2**41], "b": ["x", "y"]})
+        self.assertIs(CompactFrame.compact(df, floats=True), df)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import gzip
+import logging
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from pandascsv import GzipIndex, compression_method
+
+
+class TestCompression(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def test_compression_method(self):
+        self.assertIsNone(compression_method("data.csv", {}))
+        self.assertEqual(compression_method("DATA.CSV.GZ", {}), "gzip")
+        self.assertEqual(compression_method("data.csv.zst", {}), "zstd")
+        self.assertEqual(compression_method("data.csv", {"compression": "bz2"}), "bz2")
+        self.assertEqual(compression_method("data.csv", {"compression": {"method": "xz"}}), "xz")
+        self.assertIsNone(compression_method("data.csv.gz", {"compression": None}))
+
+    def test_gzip_index(self):
+        content = "".join(f"{i},{random.random()}\n" for i in range(20000)).encode()
+        with tempfile.NamedTemporaryFile(suffix=".csv.gz", delete=False) as temp_file:
+            temp_file.write(gzip.compress(content[:1000]) + gzip.compress(content[1000:]) + b"\0" * 8)
+        self.addCleanup(os.remove, temp_file.name)
+
+        # checkpoints are taken between reads
+        with mock.patch("pandascsv.compression.READ_SIZE", 1024):
+            index = GzipIndex(temp_file.name, spacing=10000)
+            self.assertEqual(b"".join(index.decompress()), content)
+            self.assertEqual(index.size, len(content))
+            self.assertGreater(len(index.checkpoints), 10)
+            for begin in (0, 999, 1000, 12345, len(content) - 10, *random.sample(range(len(content)), 20)):
+                end = min(begin + random.randint(1, 50000), len(content))
+                self.assertEqual(index.read(begin, end), content[begin:end], begin)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from pandascsv import DirectoryWatcher
+from pandascsv.directory_watcher import _Inotify
+
+
+def _inotify_available() -> bool:
+    try:
+        _Inotify([]).close()
+        return True
+    except OSError:
+        return False
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = pathlib.Path(temp_dir.name)
+        (self.root / "old.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        self.prepared: list[str] = []
+        self.changed = threading.Condition()
+
+    def _prepare(self, path: str) -> None:
+        with self.changed:
+            self.prepared.append(path)
+            self.changed.notify_all()
+
+    def _watcher(self, **kwargs) -> DirectoryWatcher:
+        kwargs = {"prepare": self._prepare, "settle": 0.05, "poll_interval": 0.02, **kwargs}
+        watcher = DirectoryWatcher([str(self.root)], ["*.csv"], **kwargs)
+        watcher.start()
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def _wait_prepared(self, count: int) -> list[str]:
+        with self.changed:
+            self.assertTrue(self.changed.wait_for(lambda: len(self.prepared) >= count, timeout=10))
+            return sorted(self.prepared)
+
+    def _new_files(self) -> list[str]:
+        (self.root / "new.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        (self.root / "notes.txt").write_text("a,b\n1,2\n", encoding="utf-8")
+        (self.root / "sub").mkdir()
+        (self.root / "sub" / "nested.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        return sorted([str(self.root / "new.csv"), str(self.root / "sub" / "nested.csv")])
+
+    @unittest.skipUnless(_inotify_available(), "inotify is not available")
+    def test_inotify(self):
+        self._watcher()
+        expected = self._new_files()
+        self.assertEqual(self._wait_prepared(2), expected)
+        time.sleep(0.2)
+        self.assertEqual(sorted(self.prepared), expected)
+
+    def test_polling(self):
+        watcher = self._watcher(polling=True)
+        expected = self._new_files()
+        self.assertEqual(self._wait_prepared(2), expected)
+
+        time.sleep(0.1)
+        with open(self.root / "new.csv", "a", encoding="utf-8") as file:
+            file.write("3,4\n")
+        self.assertEqual(self._wait_prepared(3)[-1], str(self.root / "sub" / "nested.csv"))
+        self.assertEqual(watcher.prepared, 3)
+
+    def test_settle(self):
+        self._watcher(polling=True, settle=0.3)
+        path = self.root / "growing.csv"
+        with open(path, "w", encoding="utf-8") as file:
+            for row in range(5):
+                file.write(f"{row},{row}\n")
+                file.flush()
+                time.sleep(0.05)
+            written = time.monotonic()
+        self._wait_prepared(1)
+        self.assertGreaterEqual(time.monotonic() - written, 0.2)
+        self.assertEqual(self.prepared, [str(path)])
+
+    def test_backpressure(self):
+        release = threading.Event()
+
+        def prepare(path: str) -> None:
+            release.wait(10)
+            self._prepare(path)
+
+        watcher = self._watcher(prepare=prepare, polling=True, queue_size=1)
+        for index in range(4):
+            (self.root / f"{index}.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        time.sleep(0.3)
+        # one file is being prepared, one is queued and the others wait as candidates
+        self.assertEqual(watcher._queue.qsize(), 1)
+        self.assertEqual(len(watcher._candidates), 2)
+        release.set()
+        self.assertEqual(len(self._wait_prepared(4)), 4)
+
+    def test_defer_while_busy(self):
+        busy = threading.Event()
+        busy.set()
+        with mock.patch("pandascsv.directory_watcher.MAX_DEFER", 10):
+            self._watcher(polling=True, busy=busy.is_set)
+            (self.root / "new.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+            time.sleep(0.3)
+            self.assertEqual(self.prepared, [])
+            busy.clear()
+            self.assertEqual(self._wait_prepared(1), [str(self.root / "new.csv")])
+
+    def test_failing_prepare(self):
+        def prepare(path: str) -> None:
+            self._prepare(path)
+            if os.path.basename(path) == "bad.csv":
+                raise ValueError("bad file")
+
+        self._watcher(prepare=prepare, polling=True)
+        with self.assertLogs("pandascsv.directory_watcher", level="ERROR"):
+            (self.root / "bad.csv").write_text("x", encoding="utf-8")
+            self._wait_prepared(1)
+            time.sleep(0.5)
+        (self.root / "good.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        self.assertEqual(len(self._wait_prepared(2)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
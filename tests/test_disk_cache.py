@@ -0,0 +1,108 @@
+import logging
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+        self.cache = DiskCache(self.temp_dir / "cache", 1024 * 1024)
+
+    def _write_csv(self, name: str, content: str) -> str:
+        file_path = self.temp_dir / name
+        file_path.write_text(content, encoding="utf-8")
+        return str(file_path)
+
+    def test_round_trip(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,2.5\n2,3.5\n")
+        df = pd.read_csv(file_path)
+        self.assertIsNone(self.cache.load(file_path, {}))
+        self.assertTrue(self.cache.store(file_path, {}, df))
+
+        cached = self.cache.load(file_path, {})
+        self.assertIsNotNone(cached)
+        pd.testing.assert_frame_equal(cached, df)
+        self.assertFalse(cached["a"].to_numpy().flags.writeable)
+        self.assertIsNone(self.cache.load(file_path, {"sep": ","}))
+
+    def test_no_header_columns(self):
+        file_path = self._write_csv("a.csv", "1,2.5\n2,3.5\n")
+        df = pd.read_csv(file_path, header=None)
+        self.assertTrue(self.cache.store(file_path, {"header": None}, df))
+        pd.testing.assert_frame_equal(self.cache.load(file_path, {"header": None}), df)
+
+    def test_invalidated_on_change(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,2.5\n2,3.5\n")
+        self.cache.store(file_path, {}, pd.read_csv(file_path))
+        self._write_csv("a.csv", "a,b\n1,2.5\n2,3.5\n3,4.5\n")
+        os.utime(file_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        self.assertIsNone(self.cache.load(file_path, {}))
+
+        self.cache.store(file_path, {}, pd.read_csv(file_path))
+        self.assertEqual(len(list((self.temp_dir / "cache").iterdir())), 1)
+
+    def test_other_parameters_kept(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,2.5\n2,3.5\n")
+        self.cache.store(file_path, {}, pd.read_csv(file_path))
+        self.cache.store_statistics(file_path, {}, [{"minimum": 1}])
+        self.cache.store(file_path, {"sep": ","}, pd.read_csv(file_path, sep=","))
+        self.assertIsNotNone(self.cache.load(file_path, {}))
+        self.assertEqual(self.cache.load_statistics(file_path, {}), [{"minimum": 1}])
+        self.assertIsNotNone(self.cache.load(file_path, {"sep": ","}))
+
+        self._write_csv("a.csv", "a,b\n1,2.5\n")
+        os.utime(file_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        self.cache.store(file_path, {}, pd.read_csv(file_path))
+        # entries of the previous version are removed for all parameters
+        self.assertEqual(len(list((self.temp_dir / "cache").iterdir())), 1)
+
+    def test_object_columns_not_stored(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,x\n2,y\n")
+        self.assertFalse(self.cache.store(file_path, {}, pd.read_csv(file_path)))
+        self.assertIsNone(self.cache.load(file_path, {}))
+
+    def test_evict_least_recently_used(self):
+        df = pd.DataFrame({"a": np.arange(1000), "b": np.arange(1000.0)})
+        first = self._write_csv("first.csv", "a,b\n")
+        second = self._write_csv("second.csv", "a,b\n")
+        cache = DiskCache(self.temp_dir / "cache", 20000)
+        cache.store(first, {}, df)
+        entry_dir = next((self.temp_dir / "cache").iterdir())
+        os.utime(entry_dir, (time.time() - 60, time.time() - 60))
+        cache.store(second, {}, df)
+        self.assertIsNone(cache.load(first, {}))
+        self.assertIsNotNone(cache.load(second, {}))
+
+    def test_statistics(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,x\n")
+        statistics = [{"null_count": 0, "minimum": 1, "maximum": 1, "average": 1.0}, {"null_count": 0}]
+        self.assertIsNone(self.cache.load_statistics(file_path, {}))
+        self.assertTrue(self.cache.store_statistics(file_path, {}, statistics))
+        self.assertEqual(self.cache.load_statistics(file_path, {}), statistics)
+        self.assertIsNone(self.cache.load(file_path, {}))
+
+        time.sleep(0.01)
+        self._write_csv("a.csv", "a,b\n1,x\n2,y\n")
+        self.assertIsNone(self.cache.load_statistics(file_path, {}))
+
+    def test_store_after_statistics(self):
+        file_path = self._write_csv("a.csv", "a,b\n1,2.5\n2,3.5\n")
+        statistics = [{"null_count": 0}, {"null_count": 0}]
+        self.assertTrue(self.cache.store_statistics(file_path, {}, statistics))
+        df = pd.read_csv(file_path)
+        self.assertTrue(self.cache.store(file_path, {}, df))
+        pd.testing.assert_frame_equal(self.cache.load(file_path, {}), df)
+        self.assertEqual(self.cache.load_statistics(file_path, {}), statistics)
+        self.assertEqual(len(list((self.temp_dir / "cache").iterdir())), 1)
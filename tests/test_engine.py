@@ -0,0 +1,62 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from pandascsv import PluginConfig, choose_engine, deduplicate_columns, engine, python_fallback_reason
+
+
+class TestEngine(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def test_python_fallback_reason(self):
+        self.assertIsNone(python_fallback_reason({}))
+        self.assertIsNone(python_fallback_reason({"sep": ";", "quotechar": "'"}))
+        self.assertIsNone(python_fallback_reason({"sep": r"\s+"}))
+        self.assertIsNotNone(python_fallback_reason({"sep": ";+"}))
+        self.assertIsNotNone(python_fallback_reason({"delimiter": "||"}))
+        self.assertIsNotNone(python_fallback_reason({"sep": None}))
+        self.assertIsNotNone(python_fallback_reason({"skipfooter": 1}))
+        self.assertIsNotNone(python_fallback_reason({"quotechar": "»"}))
+
+    def test_choose_engine(self):
+        with mock.patch.object(engine, "pyarrow_available", return_value=True):
+            self.assertEqual(choose_engine({}, 100, "auto", 1000), "c")
+            self.assertEqual(choose_engine({}, 1000, "auto", 1000), "pyarrow")
+            self.assertEqual(choose_engine({"sep": ";", "header": 0}, 1000, "auto", 1000), "pyarrow")
+            self.assertEqual(choose_engine({}, 100, "pyarrow", 1000), "pyarrow")
+            self.assertEqual(choose_engine({}, 1000, "c", 1000), "c")
+            self.assertEqual(choose_engine({"engine": "c"}, 1000, "pyarrow"), "c")
+            # not supported by pyarrow
+            self.assertEqual(choose_engine({"skiprows": 2}, 1000, "pyarrow"), "c")
+            self.assertEqual(choose_engine({"header": 2}, 1000, "pyarrow"), "c")
+            self.assertEqual(choose_engine({"nrows": 10}, 1000, "pyarrow"), "c")
+            # C engine can not be used
+            self.assertEqual(choose_engine({"sep": ";+"}, 1000, "pyarrow"), "python")
+            self.assertEqual(choose_engine({"sep": ";+"}, 1000, "c"), "python")
+
+        with mock.patch.object(engine, "pyarrow_available", return_value=False):
+            self.assertEqual(choose_engine({}, 1000, "pyarrow"), "c")
+
+    def test_deduplicate_columns(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,a,b,a.1,b\n1,2,3,4,5\n")
+        self.addCleanup(os.remove, temp_file.name)
+        columns = pd.read_csv(temp_file.name).columns.tolist()
+        self.assertEqual(columns, ["a", "a.2", "b", "a.1", "b.1"])
+        self.assertEqual(deduplicate_columns(["a", "a", "b", "a.1", "b"]), columns)
+        self.assertEqual(deduplicate_columns([0, 1, 2]), [0, 1, 2])
+
+    def test_engine_from_env(self):
+        config = PluginConfig.from_env({"ODS_EXD_API_PANDASCSV_ENGINE": "pyarrow"})
+        self.assertEqual(config.engine, "pyarrow")
+        with self.assertLogs(level="WARNING"):
+            config = PluginConfig.from_env({"ODS_EXD_API_PANDASCSV_ENGINE": "arrow"})
+        self.assertEqual(config.engine, "auto")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,23 @@
 import base64
+import gzip
 import logging
+import os
 import pathlib
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from unittest import mock
 
 import grpc
-from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api, ods
+import pandas as pd
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, NotMyFileError, exd_api, ods
 
 from ods_exd_api_box.simple.file_simple import FileSimple, FileSimpleRegistry
-from external_file_data import ExternalFileData
+from external_file_data import ExternalFile, ExternalFileData, start_metrics
+from pandascsv import FrameRegistry, Metrics
 from tests.mock_servicer_context import MockServicerContext
 
 # pylint: disable=no-member
@@ -298,3 +308,473 @@ class TestExdApiEtc(unittest.TestCase):
             self.assertEqual(context.code(), grpc.StatusCode.FAILED_PRECONDITION)
         finally:
             service.Close(handle, context)
+
+    def test_not_my_file_ragged_after_probe(self):
+        rows = "".join(f"{i},{i * 0.5},{i * 2}\n" for i in range(ExternalFileData.config.probe_rows + 10))
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + rows + "1,2,3,4\n")
+        self.addCleanup(os.remove, temp_file.name)
+
+        context = MockServicerContext()
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters='{"sep":","}'), context
+        )
+        try:
+            with self.assertRaises(grpc.RpcError) as _:
+                service.GetStructure(exd_api.StructureRequest(handle=handle), context)
+            self.assertEqual(context.code(), grpc.StatusCode.FAILED_PRECONDITION)
+        finally:
+            service.Close(handle, context)
+
+    def test_lazy_columns(self):
+        rows = ExternalFileData.config.probe_rows * 2
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(f"{i},{i * 0.5},{i * 2}\n" for i in range(rows)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, lazy_columns=True)):
+            handle = service.Open(
+                exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=None), self.context
+            )
+            try:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                self.assertEqual(structure.groups[0].number_of_rows, rows)
+                self.assertEqual(len(structure.groups[0].channels), 3)
+                self.assertEqual(structure.groups[0].channels[0].data_type, ods.DataTypeEnum.DT_LONGLONG)
+                self.assertEqual(structure.groups[0].channels[1].data_type, ods.DataTypeEnum.DT_DOUBLE)
+                self.assertEqual(
+                    structure.groups[0].channels[0].attributes.variables.get("independent").long_array.values[0], 1
+                )
+
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[2], start=10, limit=3), self.context
+                )
+                self.assertEqual(values.channels[0].values.data_type, ods.DataTypeEnum.DT_LONGLONG)
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, [20, 22, 24])
+            finally:
+                service.Close(handle, self.context)
+
+    def test_parallel_requests_parse_once(self):
+        rows = 50
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(f"{i},{i * 0.5},{i * 2}\n" for i in range(rows)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        parse_count = 0
+        count_lock = threading.Lock()
+        read_csv = pd.read_csv
+
+        def slow_read_csv(*args, **kwargs):
+            nonlocal parse_count
+            if "nrows" not in kwargs:
+                with count_lock:
+                    parse_count += 1
+                time.sleep(0.2)
+            return read_csv(*args, **kwargs)
+
+        service = ExternalDataReader()
+        url = pathlib.Path(temp_file.name).as_uri()
+        # different parameter strings result in separate handlers of the same file and parameters
+        handles = [
+            service.Open(exd_api.Identifier(url=url, parameters=parameters), self.context)
+            for parameters in ("", "{}", self._b64_param("{}"))
+        ]
+
+        def request(index: int):
+            handle = handles[index % len(handles)]
+            context = MockServicerContext()
+            if index % 2 == 0:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), context)
+                return structure.groups[0].number_of_rows
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0], start=0, limit=rows), context
+            )
+            return len(values.channels[0].values.longlong_array.values)
+
+        config = replace(ExternalFileData.config, probe_rows=5)
+        try:
+            with mock.patch.object(ExternalFileData, "config", config), mock.patch("pandas.read_csv", slow_read_csv):
+                with ThreadPoolExecutor(max_workers=16) as executor:
+                    results = list(executor.map(request, range(64)))
+        finally:
+            for handle in handles:
+                service.Close(handle, self.context)
+
+        self.assertEqual(results, [rows] * 64)
+        self.assertEqual(parse_count, 1)
+
+    def test_row_index_windows(self):
+        rows = ExternalFileData.config.probe_rows * 3
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a;b;c\n" + "".join(f"{i};{i * 0.5};{i * 2}\n" for i in range(rows)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        config = replace(ExternalFileData.config, lazy_columns=True, row_index_stride=100)
+        with mock.patch.object(ExternalFileData, "config", config):
+            handle = service.Open(
+                exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters='{"sep":";"}'), self.context
+            )
+            try:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                self.assertEqual(structure.groups[0].number_of_rows, rows)
+
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1, 2], start=rows - 2, limit=10),
+                    self.context,
+                )
+                self.assertEqual(values.channels[0].values.data_type, ods.DataTypeEnum.DT_DOUBLE)
+                self.assertSequenceEqual(
+                    values.channels[0].values.double_array.values, [(rows - 2) * 0.5, (rows - 1) * 0.5]
+                )
+                self.assertEqual(values.channels[1].values.data_type, ods.DataTypeEnum.DT_LONGLONG)
+                self.assertSequenceEqual(
+                    values.channels[1].values.longlong_array.values, [(rows - 2) * 2, (rows - 1) * 2]
+                )
+            finally:
+                service.Close(handle, self.context)
+
+    def test_row_index_windows_keep_reported_dtype(self):
+        rows = ExternalFileData.config.probe_rows * 3
+        lines = [f"{i},{i * 0.5},{i * 2}\n" for i in range(rows)]
+        # beyond the probe and between the sampled blocks
+        lines[1500] = "1500,750.0,3000.5\n"
+        lines[1510] = "1510,755,3020.0\n"
+        lines[1520] = "1520,760.0,\n"
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(lines))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        config = replace(ExternalFileData.config, lazy_columns=True, row_index_stride=100)
+        with mock.patch.object(ExternalFileData, "config", config), mock.patch(
+            "pandas.read_csv", wraps=pd.read_csv
+        ) as read_csv:
+            handle = service.Open(
+                exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+            )
+            try:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                channels = structure.groups[0].channels
+                self.assertEqual(channels[0].attributes.variables.get("independent").long_array.values[0], 1)
+                self.assertEqual(channels[2].data_type, ods.DataTypeEnum.DT_LONGLONG)
+                # the probe is parsed once and no whole column is parsed for the structure
+                self.assertEqual(sum(call.kwargs.get("nrows") == config.probe_rows for call in read_csv.mock_calls), 1)
+                self.assertTrue(all(call.args or "nrows" in call.kwargs for call in read_csv.call_args_list))
+
+                # values converted without changing them are served in the reported dtype
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1, 2], start=1509, limit=3),
+                    self.context,
+                )
+                self.assertEqual(values.channels[0].values.data_type, ods.DataTypeEnum.DT_DOUBLE)
+                self.assertSequenceEqual(values.channels[0].values.double_array.values, [754.5, 755.0, 755.5])
+                self.assertEqual(values.channels[1].values.data_type, ods.DataTypeEnum.DT_LONGLONG)
+                self.assertSequenceEqual(values.channels[1].values.longlong_array.values, [3018, 3020, 3022])
+
+                # others are not truncated or zero-filled to fit the reported dtype
+                for start in (1499, 1519):
+                    with self.assertRaises(NotMyFileError):
+                        service.GetValues(
+                            exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[2], start=start, limit=3),
+                            self.context,
+                        )
+            finally:
+                service.Close(handle, self.context)
+
+    def test_gzip_windows(self):
+        rows = ExternalFileData.config.probe_rows * 3
+        with tempfile.NamedTemporaryFile(suffix=".csv.gz", delete=False) as temp_file:
+            temp_file.write(gzip.compress(("a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(rows))).encode()))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        for config in (
+            ExternalFileData.config,
+            replace(ExternalFileData.config, lazy_columns=True, row_index_stride=100),
+        ):
+            with mock.patch.object(ExternalFileData, "config", config):
+                handle = service.Open(
+                    exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+                )
+                try:
+                    structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                    self.assertEqual(structure.groups[0].number_of_rows, rows)
+
+                    values = service.GetValues(
+                        exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1], start=rows - 2, limit=10),
+                        self.context,
+                    )
+                    self.assertSequenceEqual(
+                        values.channels[0].values.double_array.values, [(rows - 2) * 0.5, (rows - 1) * 0.5]
+                    )
+                finally:
+                    service.Close(handle, self.context)
+
+    def test_stream_windows(self):
+        rows = 1000
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(f"{i},{i * 0.5},x{i}\n" for i in range(rows)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        with tempfile.TemporaryDirectory() as spill_dir:
+            config = replace(ExternalFileData.config, stream_max_rows=64, stream_spill_dir=pathlib.Path(spill_dir))
+            with mock.patch.object(ExternalFileData, "config", config):
+                handle = service.Open(
+                    exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+                )
+                try:
+                    structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                    self.assertEqual(structure.groups[0].number_of_rows, rows)
+                    channel = structure.groups[0].channels[0]
+                    self.assertEqual(channel.attributes.variables.get("independent").long_array.values[0], 1)
+
+                    values = service.GetValues(
+                        exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1, 2], start=60, limit=10),
+                        self.context,
+                    )
+                    self.assertSequenceEqual(
+                        values.channels[0].values.double_array.values, [i * 0.5 for i in range(60, 70)]
+                    )
+                    self.assertSequenceEqual(
+                        values.channels[1].values.string_array.values, [f"x{i}" for i in range(60, 70)]
+                    )
+                    self.assertEqual(len(os.listdir(spill_dir)), 1)
+                finally:
+                    service.Close(handle, self.context)
+                self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_stream_spill_removed(self):
+        rows = 1000
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(rows)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        with tempfile.TemporaryDirectory() as spill_dir:
+            config = replace(ExternalFileData.config, stream_max_rows=64, stream_spill_dir=pathlib.Path(spill_dir))
+            with mock.patch.object(ExternalFileData, "config", config), mock.patch.object(
+                ExternalFileData, "frames", FrameRegistry(0)
+            ):
+                handle = service.Open(
+                    exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+                )
+                try:
+                    service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                    # only spilled columns are read, no chunk is kept in memory
+                    values = service.GetValues(
+                        exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 1], start=60, limit=10),
+                        self.context,
+                    )
+                    self.assertSequenceEqual(
+                        values.channels[1].values.double_array.values, [i * 0.5 for i in range(60, 70)]
+                    )
+                    self.assertEqual(len(os.listdir(spill_dir)), 1)
+                finally:
+                    service.Close(handle, self.context)
+                self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_compact_dtypes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b,c\n" + "".join(f"{i},{i % 2},{i * 0.5}\n" for i in range(100)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        config = replace(ExternalFileData.config, compact_dtypes=True, compact_floats=True)
+        with mock.patch.object(ExternalFileData, "config", config):
+            handle = service.Open(
+                exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+            )
+            try:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                channels = structure.groups[0].channels
+                self.assertEqual(
+                    [channel.data_type for channel in channels],
+                    [ods.DataTypeEnum.DT_LONGLONG, ods.DataTypeEnum.DT_LONGLONG, ods.DataTypeEnum.DT_DOUBLE],
+                )
+                self.assertEqual(channels[0].attributes.variables.get("independent").long_array.values[0], 1)
+
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1, 2], start=95, limit=10),
+                    self.context,
+                )
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, [1, 0, 1, 0, 1])
+                self.assertSequenceEqual(values.channels[1].values.double_array.values, [47.5, 48.0, 48.5, 49.0, 49.5])
+            finally:
+                service.Close(handle, self.context)
+
+    def test_incremental_append(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("a,b\n1,2\n3,")
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, incremental=True)):
+            handle = service.Open(
+                exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters=""), self.context
+            )
+            try:
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                self.assertEqual(structure.groups[0].number_of_rows, 1)
+
+                with open(temp_file.name, "a", encoding="utf-8") as file:
+                    file.write("4\n5,6\n")
+                structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                self.assertEqual(structure.groups[0].number_of_rows, 3)
+
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[1], start=0, limit=10),
+                    self.context,
+                )
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, [2, 4, 6])
+            finally:
+                service.Close(handle, self.context)
+
+    def test_preview_rows(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write("time,value,name\n" + "".join(f"{i},{(i * 37) % 101},n{i}\n" for i in range(10000)))
+        self.addCleanup(os.remove, temp_file.name)
+
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(temp_file.name).as_uri(), parameters='{"preview_rows": 200}'),
+            self.context,
+        )
+        try:
+            structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+            group = structure.groups[0]
+            self.assertEqual(group.number_of_rows, 157)
+            self.assertEqual(group.attributes.variables.get("preview_bucket_rows").long_array.values[0], 64)
+            self.assertEqual(group.attributes.variables.get("preview_source_rows").long_array.values[0], 10000)
+            self.assertEqual(
+                [channel.name for channel in group.channels],
+                [f"{name}_{statistic}" for name in ("time", "value") for statistic in ("first", "min", "max", "last")],
+            )
+            self.assertEqual(group.channels[0].attributes.variables.get("independent").long_array.values[0], 1)
+
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 3, 5, 6], start=155, limit=10),
+                self.context,
+            )
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, [9920, 9984])
+            self.assertSequenceEqual(values.channels[1].values.longlong_array.values, [9983, 9999])
+            self.assertSequenceEqual(values.channels[2].values.longlong_array.values, [1, 0])
+            self.assertSequenceEqual(values.channels[3].values.longlong_array.values, [100, 98])
+        finally:
+            service.Close(handle, self.context)
+
+    def test_column_statistics(self):
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalFile)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        file_path = pathlib.Path(temp_dir.name) / "data.csv"
+        file_path.write_text("a,b,c\n1,0.5,\n2,,\n3,1.5,\n", encoding="utf-8")
+
+        service = ExternalDataReader()
+        config = replace(
+            ExternalFileData.config,
+            column_statistics=True,
+            cache_dir=pathlib.Path(temp_dir.name) / "cache",
+            # files covered by the probe are not cached
+            probe_rows=2,
+        )
+        with mock.patch.object(ExternalFileData, "config", config):
+            for parse in (True, False):
+                # the second handle reads the parsed file and its statistics from the disk cache
+                with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+                    handle = service.Open(exd_api.Identifier(url=file_path.as_uri(), parameters=""), self.context)
+                    try:
+                        structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                    finally:
+                        service.Close(handle, self.context)
+                self.assertEqual(read_csv.called, parse)
+
+                variables = [channel.attributes.variables for channel in structure.groups[0].channels]
+                self.assertEqual(variables[0].get("independent").long_array.values[0], 1)
+                self.assertEqual(variables[0].get("minimum").long_array.values[0], 1)
+                self.assertEqual(variables[0].get("maximum").long_array.values[0], 3)
+                self.assertEqual(variables[0].get("average").double_array.values[0], 2.0)
+                self.assertEqual(variables[1].get("null_count").long_array.values[0], 1)
+                self.assertEqual(variables[1].get("average").double_array.values[0], 1.0)
+                self.assertEqual(variables[2].get("null_count").long_array.values[0], 3)
+                self.assertNotIn("minimum", variables[2])
+
+    def test_metrics(self):
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalFile)
+        self.assertIsNone(start_metrics(ExternalFileData.config))
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        file_path = pathlib.Path(temp_dir.name) / "data.csv"
+        file_path.write_text("a,b,c\n1,0.5,2\n2,1.5,3\n3,2.5,4\n4,3.5,5\n5,4.5,6\n", encoding="utf-8")
+        metrics = Metrics()
+        # files covered by the probe are not loaded as frames
+        config = replace(ExternalFileData.config, metrics_port=1, probe_rows=2)
+        with mock.patch.object(ExternalFileData, "metrics", metrics), mock.patch.object(
+            ExternalFileData, "config", config
+        ), mock.patch("external_file_data.MetricsServer") as server:
+            self.assertIs(start_metrics(config), server.return_value)
+            server.assert_called_once_with(metrics, "127.0.0.1", 1)
+            server.return_value.start.assert_called_once()
+
+            service = ExternalDataReader()
+            handle = service.Open(exd_api.Identifier(url=file_path.as_uri(), parameters=""), self.context)
+            try:
+                service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+                service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 1], start=0, limit=2),
+                    self.context,
+                )
+                text = metrics.render()
+            finally:
+                service.Close(handle, self.context)
+
+        self.assertIn('pandascsv_phase_seconds_count{phase="structure"} 1', text)
+        self.assertIn('pandascsv_phase_seconds_count{phase="values"} 1', text)
+        self.assertIn('pandascsv_phase_seconds_count{phase="load"} 1', text)
+        self.assertIn("pandascsv_parsed_file_bytes_total", text)
+        # the probe and the whole file
+        self.assertIn("pandascsv_parsed_rows_total 7", text)
+        self.assertIn("pandascsv_served_values_total 4", text)
+        self.assertIn('pandascsv_frame_requests_total{result="misses"}', text)
+        self.assertRegex(text, r'pandascsv_frame_bytes\{handles="1",path="[^"]*data.csv"\} \d+')
+
+    def test_values_from_column_buffers(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        file_path = pathlib.Path(temp_dir.name) / "data.csv"
+        file_path.write_text("a,b,c,d\n1,0.5,x,-3\n2,,y,70000\n3,2.5,z,5\n", encoding="utf-8")
+        request = exd_api.ValuesRequest(group_id=0, channel_ids=[2, 0, 1, 3, 0], start=1, limit=5)
+
+        results = []
+        lazy = replace(ExternalFileData.config, lazy_columns=True, probe_rows=1)
+        for factory, config in ((FileSimple, None), (ExternalFile, None), (ExternalFile, lazy)):
+            FileHandlerRegistry.register(file_type_name="test", factory=factory)
+            service = ExternalDataReader()
+            with mock.patch.object(ExternalFileData, "config", config or ExternalFileData.config):
+                handle = service.Open(exd_api.Identifier(url=file_path.as_uri(), parameters=""), self.context)
+                try:
+                    request.handle.CopyFrom(handle)
+                    results.append(service.GetValues(request, self.context))
+                finally:
+                    service.Close(handle, self.context)
+
+        simple, buffered, unbuffered = results
+        # frames parsed on demand are not buffered but report missing values the same way
+        self.assertEqual(unbuffered, buffered)
+        self.assertEqual([channel.id for channel in buffered.channels], [2, 0, 1, 3, 0])
+        self.assertEqual(buffered.channels[0].values.string_array.values, ["y", "z"])
+        self.assertEqual(buffered.channels[1].values.longlong_array.values, [2, 3])
+        self.assertEqual(buffered.channels[3].values.longlong_array.values, [70000, 5])
+        self.assertTrue(pd.isna(buffered.channels[2].values.double_array.values[0]))
+        self.assertEqual(buffered.channels[2].values.double_array.values[1], 2.5)
+        # missing values are flagged, the other channels are served like FileSimple does
+        self.assertEqual(buffered.channels[2].flags.values, [0, 15])
+        buffered.channels[2].ClearField("flags")
+        self.assertEqual(
+            buffered.channels[2].values.SerializeToString(), simple.channels[2].values.SerializeToString()
+        )
+        for position in (0, 1, 3, 4):
+            self.assertEqual(buffered.channels[position], simple.channels[position])
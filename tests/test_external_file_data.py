@@ -0,0 +1,403 @@
+import importlib.util
+import logging
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+from unittest import mock
+
+import pandas as pd
+from ods_exd_api_box import NotMyFileError
+from ods_exd_api_box.simple.file_simple import FileSimpleRegistry
+
+from external_file_data import FILE_PATTERNS, ExternalFileData, prime_parser, start_watcher
+from pandascsv import (
+    DiskCache,
+    FrameRegistry,
+    HandleReaper,
+    LazyFrame,
+    Metrics,
+    PluginConfig,
+    RejectionCache,
+    SharedFrame,
+    SharedStore,
+    read_parallel,
+)
+from pandascsv.engine import pyarrow_available
+
+
+class TestExternalFileData(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _write_csv(self, content: str) -> str:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write(content)
+        self.addCleanup(os.remove, temp_file.name)
+        return temp_file.name
+
+    def _rows(self, count: int) -> str:
+        return "".join(f"{i},{i * 0.5},{i * 2}\n" for i in range(count))
+
+    def test_not_my_file_probes_leading_rows(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(ExternalFileData.config.probe_rows * 3))
+        edf = ExternalFileData(file_path, {})
+        try:
+            self.assertFalse(edf.not_my_file())
+            self.assertIsNone(edf.df)
+            self.assertEqual(edf.data().shape, (ExternalFileData.config.probe_rows * 3, 3))
+        finally:
+            edf.close()
+
+    def test_not_my_file_keeps_complete_probe(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(10))
+        edf = ExternalFileData(file_path, {})
+        try:
+            self.assertFalse(edf.not_my_file())
+            self.assertIsNotNone(edf.df)
+            self.assertEqual(edf.data().shape, (10, 3))
+        finally:
+            edf.close()
+
+    def test_ragged_row_after_probe(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(ExternalFileData.config.probe_rows + 10) + "1,2,3,4\n")
+        edf = ExternalFileData(file_path, {})
+        try:
+            self.assertFalse(edf.not_my_file())
+            with self.assertRaises(NotMyFileError):
+                edf.data()
+            self.assertTrue(edf.not_my_file())
+        finally:
+            edf.close()
+
+    def test_ragged_row_of_streamed_file(self):
+        rows = ExternalFileData.config.probe_rows
+        file_path = self._write_csv("a,b,c\n" + self._rows(rows + 10) + "1,2,3,4\n")
+        rejections = RejectionCache(None, 10)
+        self.addCleanup(rejections.close)
+        config = replace(ExternalFileData.config, stream_max_rows=rows // 4)
+        with mock.patch.object(ExternalFileData, "config", config), mock.patch.object(
+            ExternalFileData, "rejections", rejections
+        ):
+            edf = ExternalFileData(file_path, {})
+            try:
+                with self.assertRaises(NotMyFileError):
+                    edf.data()
+                self.assertIsNotNone(edf.parse_error)
+                self.assertTrue(edf.not_my_file())
+            finally:
+                edf.close()
+            with mock.patch("pandas.read_csv") as read_csv:
+                self.assertTrue(ExternalFileData(file_path, {}).not_my_file())
+                read_csv.assert_not_called()
+
+    def test_string_columns(self):
+        file_path = self._write_csv("a,b,c\n" + "x,y,z\n" * 10)
+        edf = ExternalFileData(file_path, {})
+        try:
+            self.assertTrue(edf.not_my_file())
+        finally:
+            edf.close()
+
+    def test_rejected_files_not_parsed_again(self):
+        string_file = self._write_csv("a,b,c\n" + "x,y,z\n" * 10)
+        ragged_file = self._write_csv("a,b,c\n" + self._rows(ExternalFileData.config.probe_rows + 10) + "1,2,3,4\n")
+        rejections = RejectionCache(None, 10)
+        self.addCleanup(rejections.close)
+        with mock.patch.object(ExternalFileData, "rejections", rejections):
+            edf = ExternalFileData(ragged_file, {})
+            with self.assertRaises(NotMyFileError):
+                edf.data()
+            edf.close()
+            self.assertTrue(ExternalFileData(string_file, {}).not_my_file())
+
+            with mock.patch("pandas.read_csv") as read_csv:
+                self.assertTrue(ExternalFileData(string_file, {}).not_my_file())
+                self.assertTrue(ExternalFileData(ragged_file, {}).not_my_file())
+                read_csv.assert_not_called()
+
+            semicolon_file = self._write_csv("a;b\n1;2\n")
+            self.assertTrue(ExternalFileData(semicolon_file, {}).not_my_file())
+            self.assertFalse(ExternalFileData(semicolon_file, {"sep": ";"}).not_my_file())
+        self.assertEqual(rejections.counts(), {"hits": 2, "misses": 3})
+
+    def test_missing_compression_package(self):
+        file_path = self._write_csv("a,b\n1,2\n")
+        rejections = RejectionCache(None, 10)
+        self.addCleanup(rejections.close)
+        with mock.patch.object(ExternalFileData, "rejections", rejections):
+            edf = ExternalFileData(file_path, {"compression": "zstd"})
+            with mock.patch("pandas.read_csv", side_effect=ImportError("Missing optional dependency 'zstandard'.")):
+                with self.assertLogs("external_file_data", level="WARNING"):
+                    self.assertTrue(edf.not_my_file())
+            # accepted once the package is installed, the rejection was not remembered
+            with mock.patch("pandas.read_csv", return_value=pd.DataFrame({"a": [1], "b": [2]})):
+                self.assertFalse(ExternalFileData(file_path, {"compression": "zstd"}).not_my_file())
+        self.assertEqual("*.csv.zst" in FILE_PATTERNS, importlib.util.find_spec("zstandard") is not None)
+
+    def test_lazy_columns(self):
+        rows = ExternalFileData.config.probe_rows * 2
+        file_path = self._write_csv("a,b,c\n" + self._rows(rows))
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, lazy_columns=True)):
+            edf = ExternalFileData(file_path, {})
+            try:
+                self.assertFalse(edf.not_my_file())
+                df = edf.data()
+                self.assertIsInstance(df, LazyFrame)
+                self.assertEqual(df.columns.tolist(), ["a", "b", "c"])
+                self.assertEqual(df.dtypes.tolist(), ["int64", "float64", "int64"])
+                self.assertEqual(df.shape, (rows, 3))
+                self.assertEqual(df.iloc[:, 1].iloc[4], 2.0)
+                # the row count comes from the scan, only the requested column was parsed
+                self.assertEqual(sorted(df._columns), [1])
+            finally:
+                edf.close()
+
+    def test_lazy_columns_widened_dtype(self):
+        rows = ExternalFileData.config.probe_rows * 2
+        file_path = self._write_csv("a,b,c\n" + self._rows(rows) + "1.5,2,3\n")
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, lazy_columns=True)):
+            edf = ExternalFileData(file_path, {})
+            try:
+                with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+                    df = edf.data()
+                    self.assertEqual(df.shape, (rows + 1, 3))
+                    self.assertEqual(df.dtypes.tolist(), ["float64", "float64", "int64"])
+                    # structure without parsing a whole column
+                    self.assertTrue(all(call.args or "nrows" in call.kwargs for call in read_csv.call_args_list))
+                # sampled blocks are not parsed from far before their first row
+                config = ExternalFileData.config
+                self.assertLessEqual(df._row_index.stride, config.probe_rows // config.sample_blocks)
+                self.assertEqual(df.iloc[:, 0].iloc[-1], 1.5)
+            finally:
+                edf.close()
+
+    def test_lazy_columns_without_sample_blocks(self):
+        rows = ExternalFileData.config.probe_rows * 2
+        file_path = self._write_csv("a,b,c\n" + self._rows(rows))
+        config = PluginConfig.from_env({"ODS_EXD_API_PANDASCSV_SAMPLE_BLOCKS": "0"})
+        self.assertEqual(config.sample_blocks, 0)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(PluginConfig.from_env({"ODS_EXD_API_PANDASCSV_SAMPLE_BLOCKS": "-1"}).sample_blocks, 8)
+        with mock.patch.object(ExternalFileData, "config", replace(config, lazy_columns=True)):
+            edf = ExternalFileData(file_path, {})
+            try:
+                df = edf.data()
+                self.assertIsInstance(df, LazyFrame)
+                self.assertEqual(df.dtypes.tolist(), ["int64", "float64", "int64"])
+                self.assertEqual(df.shape, (rows, 3))
+            finally:
+                edf.close()
+
+    def test_lazy_columns_keep_sampled_dtype(self):
+        rows = ExternalFileData.config.probe_rows * 2
+        config = replace(ExternalFileData.config, lazy_columns=True)
+        # comments are not supported by the row index, so whole columns are parsed
+        file_path = self._write_csv("a,b,c\n" + self._rows(rows) + "7.0,2,3.5\n")
+        with mock.patch.object(ExternalFileData, "config", config):
+            edf = ExternalFileData(file_path, {"comment": "#"})
+            try:
+                df = edf.data()
+                self.assertIsInstance(df, LazyFrame)
+                self.assertEqual(df.dtypes.tolist(), ["int64", "float64", "int64"])
+                # integral floats are converted, other values reject the file instead of being truncated
+                self.assertEqual(df.iloc[:, 0].dtype, "int64")
+                self.assertEqual(df.iloc[:, 0].iloc[-1], 7)
+                self.assertEqual(df.iloc[:, 1].iloc[-1], 2.0)
+                with self.assertRaises(NotMyFileError):
+                    df.iloc[:, 2]
+                self.assertEqual(df.dtypes.tolist(), ["int64", "float64", "int64"])
+            finally:
+                edf.close()
+
+    def test_lazy_columns_skiprows(self):
+        rows = self._rows(ExternalFileData.config.probe_rows * 2)
+        file_path = self._write_csv("measurement\n\nexport\na,b,c\n" + rows)
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, lazy_columns=True)):
+            edf = ExternalFileData(file_path, {"skiprows": 3})
+            try:
+                df = edf.data()
+                self.assertEqual(df.shape, pd.read_csv(file_path, skiprows=3).shape)
+            finally:
+                edf.close()
+
+    def test_lazy_columns_unsupported_parameters(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(ExternalFileData.config.probe_rows * 2))
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, lazy_columns=True)):
+            edf = ExternalFileData(file_path, {"index_col": 0})
+            try:
+                self.assertNotIsInstance(edf.data(), LazyFrame)
+            finally:
+                edf.close()
+
+    @unittest.skipUnless(pyarrow_available(), "pyarrow is not installed")
+    def test_pyarrow_engine(self):
+        content = "a,b,c,d,a\n" + "".join(f"{i},{i * 0.5},2020-01-0{i % 9 + 1},x{i},True\n" for i in range(100))
+        file_path = self._write_csv(content)
+        with mock.patch.object(ExternalFileData, "config", replace(ExternalFileData.config, engine="pyarrow")):
+            edf = ExternalFileData(file_path, {})
+            try:
+                df = edf.data()
+                # same names, dtypes and values as the C engine, dates stay strings
+                pd.testing.assert_frame_equal(df, pd.read_csv(file_path, engine="c"))
+                self.assertEqual(df.columns[-1], "a.1")
+            finally:
+                edf.close()
+
+    def test_python_engine_fallback(self):
+        file_path = self._write_csv("a;;b;;c\n" + self._rows(10).replace(",", ";;"))
+        edf = ExternalFileData(file_path, {"sep": ";;"})
+        try:
+            with self.assertLogs("external_file_data", level="WARNING") as logs:
+                self.assertEqual(edf.data().shape, (10, 3))
+            self.assertIn("python engine", logs.output[0])
+        finally:
+            edf.close()
+
+    def test_parallel(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(1000) + "1.5,2,3\n")
+        config = replace(ExternalFileData.config, parse_workers=4, parallel_min_mb=0)
+        with mock.patch.object(ExternalFileData, "config", config), mock.patch(
+            "external_file_data.STRUCTURE_INDEX_STRIDE", 100
+        ), mock.patch("external_file_data.read_parallel", wraps=read_parallel) as parallel:
+            edf = ExternalFileData(file_path, {})
+            try:
+                pd.testing.assert_frame_equal(edf.data(), pd.read_csv(file_path))
+                parallel.assert_called_once()
+            finally:
+                edf.close()
+
+    def test_parallel_blank_and_carriage_return_lines(self):
+        rows = self._rows(1000)
+        files = [
+            (self._write_csv("a,b,c\n" + rows.replace("0\n", "0\n\n")), {"skip_blank_lines": False}),
+            (self._write_csv("a,b,c\r" + rows.replace("\n", "\r")), {}),
+        ]
+        config = replace(ExternalFileData.config, parse_workers=4, parallel_min_mb=0)
+        for file_path, parameters in files:
+            with mock.patch.object(ExternalFileData, "config", config), mock.patch(
+                "external_file_data.STRUCTURE_INDEX_STRIDE", 100
+            ), mock.patch("external_file_data.read_parallel", wraps=read_parallel) as parallel:
+                edf = ExternalFileData(file_path, parameters)
+                try:
+                    pd.testing.assert_frame_equal(edf.data(), pd.read_csv(file_path, **parameters))
+                    parallel.assert_not_called()
+                finally:
+                    edf.close()
+
+    def test_disk_cache(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(10))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            config = replace(ExternalFileData.config, cache_dir=pathlib.Path(cache_dir))
+            with mock.patch.object(ExternalFileData, "config", config):
+                edf = ExternalFileData(file_path, {})
+                expected = edf.data()
+                edf.close()
+
+                edf = ExternalFileData(file_path, {})
+                with mock.patch("pandas.read_csv") as read_csv:
+                    pd.testing.assert_frame_equal(edf.data(), expected)
+                    read_csv.assert_not_called()
+                edf.close()
+
+    def test_shared_between_handles(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(10))
+        first = ExternalFileData(file_path, {"sep": ","})
+        second = ExternalFileData(file_path, {"sep": ","})
+        try:
+            with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+                self.assertIs(first.data(), second.data())
+                read_csv.assert_called_once()
+        finally:
+            first.close()
+            second.close()
+
+    def test_idle_handles_unloaded(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(10))
+        frames = FrameRegistry(0)
+        reaper = HandleReaper(60, 0, frames.nbytes)
+        self.addCleanup(reaper.stop)
+        with mock.patch.object(ExternalFileData, "frames", frames), mock.patch.object(
+            ExternalFileData, "reaper", reaper
+        ):
+            idle = ExternalFileData(file_path, {})
+            used = ExternalFileData(file_path, {"sep": ","})
+            try:
+                expected = idle.data().copy()
+                used.data()
+                used.last_used += 60
+                self.assertEqual(reaper.reap(now=used.last_used), 1)
+                self.assertIsNone(idle.df)
+                self.assertIsNotNone(used.df)
+                # unloaded handles load the file again on next use
+                pd.testing.assert_frame_equal(idle.data(), expected)
+            finally:
+                idle.close()
+                used.close()
+            self.assertEqual(frames.nbytes(), 0)
+
+    def test_watcher_prepares_new_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            watch_dir = pathlib.Path(temp_dir) / "incoming"
+            watch_dir.mkdir()
+            config = replace(
+                ExternalFileData.config,
+                cache_dir=pathlib.Path(temp_dir) / "cache",
+                probe_rows=10,
+                watch_dirs=str(watch_dir),
+                watch_settle_s=0.05,
+            )
+            self.assertIsNone(start_watcher(replace(config, watch_dirs="")))
+            FileSimpleRegistry.register(ExternalFileData.create)
+            rejections = RejectionCache(None, 10)
+            self.addCleanup(rejections.close)
+            with mock.patch.object(ExternalFileData, "config", config), mock.patch.object(
+                ExternalFileData, "rejections", rejections
+            ):
+                watcher = start_watcher(config)
+                assert watcher is not None
+                try:
+                    file_path = watch_dir / "new.csv"
+                    file_path.write_text("a,b,c\n" + self._rows(100), encoding="utf-8")
+                    deadline = time.monotonic() + 10
+                    while watcher.prepared == 0 and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                finally:
+                    watcher.stop()
+                self.assertEqual(watcher.prepared, 1)
+                cache = DiskCache(config.cache_dir, config.cache_max_mb * 1024 * 1024)
+                self.assertTrue(cache.contains(str(file_path), {}))
+
+    @unittest.skipUnless(SharedStore.supported(), "file locks are not available")
+    def test_shared_store_between_processes(self):
+        file_path = self._write_csv("a,b,c\n" + self._rows(10))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store_dir = pathlib.Path(temp_dir)
+            config = replace(ExternalFileData.config, shared_store_dir=store_dir)
+            handles = []
+            with mock.patch.object(ExternalFileData, "config", config), mock.patch(
+                "pandas.read_csv", wraps=pd.read_csv
+            ) as read_csv:
+                for _ in range(2):
+                    handle = ExternalFileData(file_path, {})
+                    # each registry stands for the frames of another process
+                    handle.frames = FrameRegistry(0)
+                    handles.append(handle)
+                    self.assertIsInstance(handle.data(), SharedFrame)
+                read_csv.assert_called_once()
+            pd.testing.assert_series_equal(handles[0].df.iloc[:, 2], handles[1].df.iloc[:, 2])
+            self.assertEqual(handles[1].df.iloc[:, 1].iloc[3], 1.5)
+            for handle in handles:
+                handle.close()
+            self.assertEqual([path for path in store_dir.iterdir() if not path.name.startswith(".")], [])
+
+    def test_prime_parser(self):
+        metrics = Metrics()
+        with mock.patch.object(ExternalFileData, "metrics", metrics):
+            prime_parser(replace(ExternalFileData.config, engine="c"))
+            self.assertIn('pandascsv_phase_seconds_count{engine="c",phase="prime"} 1', metrics.render())
+            self.assertNotIn('engine="pyarrow"', metrics.render())
+            if pyarrow_available():
+                prime_parser(replace(ExternalFileData.config, engine="auto"))
+                self.assertIn('pandascsv_phase_seconds_count{engine="pyarrow",phase="prime"} 1', metrics.render())
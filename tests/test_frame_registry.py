@@ -0,0 +1,100 @@
+import logging
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import FileKey, FrameRegistry
+
+
+class TestFrameRegistry(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _key(self, name: str) -> FileKey:
+        return FileKey(name, 0, 0, "{}")
+
+    def _frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"a": np.arange(100), "b": np.arange(100.0)})
+
+    def test_shared(self):
+        registry = FrameRegistry(0)
+        load = mock.Mock(side_effect=self._frame)
+        first = registry.acquire(self._key("a.csv"), load)
+        second = registry.acquire(self._key("a.csv"), load)
+        self.assertIs(first, second)
+        load.assert_called_once()
+
+        with self.assertRaises(ValueError):
+            first.iloc[0, 0] = 5
+
+    def test_released_by_last_user(self):
+        registry = FrameRegistry(0)
+        registry.acquire(self._key("a.csv"), self._frame)
+        registry.acquire(self._key("a.csv"), self._frame)
+        registry.release(self._key("a.csv"))
+        self.assertGreater(registry.nbytes(), 0)
+        registry.release(self._key("a.csv"))
+        self.assertEqual(registry.nbytes(), 0)
+
+    def test_usage_and_counts(self):
+        registry = FrameRegistry(0)
+        registry.acquire(self._key("a.csv"), self._frame)
+        registry.acquire(self._key("a.csv"), self._frame)
+        registry.acquire(self._key("b.csv"), self._frame)
+        self.assertEqual(registry.counts(), {"hits": 1, "misses": 2})
+        frame_nbytes = int(self._frame().memory_usage(index=True).sum())
+        self.assertEqual(
+            registry.usage(), [(self._key("a.csv"), frame_nbytes, 2), (self._key("b.csv"), frame_nbytes, 1)]
+        )
+
+    def test_budget_keeps_unreferenced(self):
+        frame_nbytes = int(self._frame().memory_usage(index=True).sum())
+        registry = FrameRegistry(frame_nbytes * 2)
+        for name in ("a.csv", "b.csv", "c.csv"):
+            registry.acquire(self._key(name), self._frame)
+            registry.release(self._key(name))
+
+        load = mock.Mock(side_effect=self._frame)
+        registry.acquire(self._key("c.csv"), load)
+        registry.acquire(self._key("b.csv"), load)
+        load.assert_not_called()
+        registry.acquire(self._key("a.csv"), load)
+        load.assert_called_once()
+
+    def test_trim(self):
+        frame_nbytes = int(self._frame().memory_usage(index=True).sum())
+        registry = FrameRegistry(frame_nbytes * 10)
+        for name in ("a.csv", "b.csv", "c.csv"):
+            registry.acquire(self._key(name), self._frame)
+        registry.release(self._key("a.csv"))
+        registry.release(self._key("b.csv"))
+        self.assertEqual(registry.nbytes(), frame_nbytes * 3)
+
+        self.assertEqual(registry.trim(frame_nbytes * 2), frame_nbytes)
+        # the least recently used unreferenced frame is dropped
+        self.assertEqual([key.path for key, _, _ in registry.usage()], ["b.csv", "c.csv"])
+        self.assertEqual(registry.trim(0), frame_nbytes)
+        self.assertEqual([key.path for key, _, _ in registry.usage()], ["c.csv"])
+
+    def test_failed_load_shared_with_waiters(self):
+        registry = FrameRegistry(0)
+        started = threading.Event()
+        proceed = threading.Event()
+
+        def failing_load():
+            started.set()
+            proceed.wait(5)
+            raise pd.errors.ParserError("ragged")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(registry.acquire, self._key("a.csv"), failing_load)
+            started.wait(5)
+            second = executor.submit(registry.acquire, self._key("a.csv"), failing_load)
+            proceed.set()
+            self.assertRaises(pd.errors.ParserError, first.result)
+            self.assertRaises(pd.errors.ParserError, second.result)
+
+        self.assertIsNotNone(registry.acquire(self._key("a.csv"), self._frame))
@@ -0,0 +1,103 @@
+import gc
+import logging
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import FileKey, FrameRegistry, HandleReaper
+
+
+class _Handle:
+    def __init__(self, last_used: float, size: int, memory: dict):
+        self.last_used = last_used
+        self.size = size
+        self.memory = memory
+        self.busy = False
+        memory[id(self)] = size
+
+    def unload(self) -> bool:
+        if self.busy or id(self) not in self.memory:
+            return False
+        del self.memory[id(self)]
+        return True
+
+
+class TestHandleReaper(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _reaper(self, idle_ttl: float, high_watermark: int, memory: dict, interval: float = 3600) -> HandleReaper:
+        reaper = HandleReaper(idle_ttl, high_watermark, lambda: sum(memory.values()), interval)
+        self.addCleanup(reaper.stop)
+        return reaper
+
+    def test_idle_ttl(self):
+        memory: dict = {}
+        reaper = self._reaper(60, 0, memory)
+        handles = [_Handle(0, 100, memory), _Handle(50, 100, memory), _Handle(0, 100, memory)]
+        handles[2].busy = True
+        for handle in handles:
+            reaper.register(handle)
+        with self.assertLogs("pandascsv.handle_reaper", level="INFO") as logs:
+            self.assertEqual(reaper.reap(now=100), 1)
+        self.assertIn("reclaimed 100 bytes", logs.output[0])
+        self.assertEqual(sorted(memory), sorted([id(handles[1]), id(handles[2])]))
+        self.assertEqual(reaper.reap(now=100), 0)
+
+    def test_high_watermark(self):
+        memory: dict = {}
+        reaper = self._reaper(0, 250, memory)
+        handles = [_Handle(last_used, 100, memory) for last_used in (30, 10, 20, 40)]
+        for handle in handles:
+            reaper.register(handle)
+        self.assertEqual(reaper.reap(now=50), 2)
+        self.assertEqual(sorted(memory), sorted([id(handles[0]), id(handles[3])]))
+
+    def test_high_watermark_trims_registry(self):
+        frame_nbytes = int(pd.DataFrame({"a": np.arange(100)}).memory_usage(index=True).sum())
+        registry = FrameRegistry(frame_nbytes * 10)
+        reaper = HandleReaper(0, frame_nbytes * 2, registry.nbytes, trim=registry.trim)
+        self.addCleanup(reaper.stop)
+        keys = [FileKey(f"{name}.csv", 0, 0, "{}") for name in "abcd"]
+        handles = []
+        for last_used, key in enumerate(keys):
+            registry.acquire(key, lambda: pd.DataFrame({"a": np.arange(100)}))
+            handle = _Handle(last_used, 0, {})
+            handle.unload = lambda key=key: registry.release(key) is None  # type: ignore[method-assign]
+            handles.append(handle)
+            reaper.register(handle)
+        # a frame no handle uses is dropped before any handle is unloaded
+        registry.acquire(keys[3], lambda: pd.DataFrame({"a": np.arange(100)}))
+        registry.release(keys[3])
+        handles[3].unload()
+        with self.assertLogs("pandascsv.handle_reaper", level="INFO") as logs:
+            self.assertEqual(reaper.reap(now=10), 1)
+        self.assertIn(f"reclaimed {frame_nbytes * 2} bytes", logs.output[0])
+        self.assertEqual([key.path for key, _, _ in registry.usage()], ["b.csv", "c.csv"])
+        self.assertEqual(reaper.reap(now=10), 0)
+
+    def test_background_thread(self):
+        memory: dict = {}
+        reaper = self._reaper(0.01, 0, memory, interval=0.01)
+        unloaded = threading.Event()
+        handle = _Handle(0, 100, memory)
+        handle.unload = unloaded.set  # type: ignore[method-assign]
+        reaper.register(handle)
+        self.assertTrue(unloaded.wait(5))
+
+    def test_collected_handles(self):
+        memory: dict = {}
+        reaper = self._reaper(60, 0, memory)
+        reaper.register(_Handle(0, 100, memory))
+        gc.collect()
+        self.assertEqual(reaper.reap(now=100), 0)
+
+    def test_disabled(self):
+        reaper = self._reaper(0, 0, {})
+        reaper.register(_Handle(0, 100, {}))
+        self.assertIsNone(reaper._thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import logging
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from pandascsv import Metrics, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def test_render(self):
+        metrics = Metrics()
+        with metrics.time("read_csv", engine="c"):
+            pass
+        metrics.observe("read_csv", 0.5, engine="c")
+        metrics.add("parsed_rows_total", 10)
+        metrics.add("parsed_rows_total", 5)
+        metrics.add("cache_requests_total", cache="disk", result="hit")
+        metrics.register("frame_bytes", "gauge", "Memory.", lambda: [({"path": 'a "b".csv'}, 128)])
+        metrics.register("open_files", "gauge", "Files.", lambda: 3)
+        metrics.register("broken", "gauge", "Fails.", lambda: 1 / 0)
+
+        with self.assertLogs("pandascsv.metrics", level="ERROR"):
+            lines = metrics.render().splitlines()
+        self.assertIn("# TYPE pandascsv_phase_seconds summary", lines)
+        self.assertIn('pandascsv_phase_seconds_count{engine="c",phase="read_csv"} 2', lines)
+        self.assertIn('pandascsv_phase_seconds_max{engine="c",phase="read_csv"} 0.500000', lines)
+        self.assertIn("pandascsv_parsed_rows_total 15", lines)
+        self.assertIn('pandascsv_cache_requests_total{cache="disk",result="hit"} 1', lines)
+        self.assertIn('pandascsv_frame_bytes{path="a \\"b\\".csv"} 128', lines)
+        self.assertIn("pandascsv_open_files 3", lines)
+        self.assertFalse(any("broken" in line for line in lines))
+
+    def test_profile_next_request(self):
+        metrics = Metrics()
+        with metrics.profile("/data/slow.csv"):
+            pass
+        self.assertIsNone(metrics.last_profile)
+
+        metrics.profile_next("*slow.csv")
+        with metrics.profile("/data/fast.csv"):
+            pass
+        self.assertIsNone(metrics.last_profile)
+        with metrics.profile("/data/slow.csv"):
+            _busy(0.1)
+        self.assertIn("_busy", metrics.last_profile)
+        self.assertRegex(metrics.last_profile.splitlines()[0], r"test_metrics.py:_busy \d+$")
+
+        # disarmed after the profiled request
+        previous = metrics.last_profile
+        with metrics.profile("/data/slow.csv"):
+            pass
+        self.assertIs(metrics.last_profile, previous)
+
+    def test_server(self):
+        metrics = Metrics()
+        metrics.add("parsed_rows_total", 7)
+        server = MetricsServer(metrics, "127.0.0.1", 0)
+        server.start()
+        self.addCleanup(server.stop)
+        url = f"http://127.0.0.1:{server.port}"
+
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            self.assertIn("pandascsv_parsed_rows_total 7", response.read().decode("utf-8"))
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(f"{url}/profile", timeout=5)
+        self.assertEqual(context.exception.code, 404)
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/profile", method="POST"), timeout=5)
+        self.assertEqual(context.exception.code, 400)
+
+        request = urllib.request.Request(f"{url}/profile?file=*.csv", method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            self.assertEqual(response.status, 202)
+        with metrics.profile("/data/a.csv"):
+            _busy(0.05)
+        with urllib.request.urlopen(f"{url}/profile", timeout=5) as response:
+            self.assertIn("_busy", response.read().decode("utf-8"))
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
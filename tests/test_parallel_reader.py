@@ -0,0 +1,46 @@
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import RowIndex, read_parallel
+
+
+class TestParallelReader(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _read(self, content: str, parameters: dict | None = None, stride: int = 10) -> pd.DataFrame:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write(content)
+        self.addCleanup(os.remove, temp_file.name)
+        parameters = parameters or {}
+
+        def read_csv(source=None, **overrides):
+            return pd.read_csv(temp_file.name if source is None else source, **{**parameters, **overrides})
+
+        row_index = RowIndex.build(temp_file.name, parameters, stride)
+        df = read_parallel(read_csv, row_index, read_csv(nrows=5).columns, 3)
+        pd.testing.assert_frame_equal(df, read_csv())
+        return df
+
+    def test_same_as_single_read(self):
+        self._read("a,b,c\n" + "".join(f"{i},{i * 0.5},x{i}\n" for i in range(95)))
+        self._read('a,b\n1,"x\ny"\n\n2,z\n' * 40, stride=7)
+        self._read("x\nx\na;b\n" + "1;2\n" * 50, {"sep": ";", "skiprows": 2, "nrows": 33})
+
+    def test_dtypes_unified(self):
+        rows = [f"{i},{i},{i},{i % 2 == 0}\n" for i in range(100)]
+        rows[95] = "1.5,x,,\n"
+        df = self._read("a,b,c,d\n" + "".join(rows))
+        self.assertEqual(df.dtypes.tolist(), [np.float64, object, np.float64, object])
+
+    def test_ragged_row(self):
+        with self.assertRaises(pd.errors.ParserError):
+            self._read("a,b\n" + "1,2\n" * 30 + "1,2,3\n" + "1,2\n" * 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import logging
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from pandascsv import CompactFrame, Pyramid
+
+
+class TestPyramid(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _frame(self, rows: int) -> pd.DataFrame:
+        rng = np.random.default_rng(1)
+        values = rng.normal(size=rows)
+        values[::7] = np.nan
+        return pd.DataFrame(
+            {
+                "time": np.arange(rows) * 0.01,
+                "value": values,
+                "count": rng.integers(-1000, 1000, size=rows),
+                "text": [f"x{i}" for i in range(rows)],
+            }
+        )
+
+    def _expected(self, df: pd.DataFrame, bucket_rows: int) -> pd.DataFrame:
+        groups = df.drop(columns="text").groupby(np.arange(len(df)) // bucket_rows)
+        expected = {}
+        for name in ["time", "value", "count"]:
+            expected[f"{name}_first"] = groups[name].nth(0).to_numpy()
+            expected[f"{name}_min"] = groups[name].min().to_numpy()
+            expected[f"{name}_max"] = groups[name].max().to_numpy()
+            expected[f"{name}_last"] = groups[name].nth(-1).to_numpy()
+        return pd.DataFrame(expected)
+
+    def test_levels(self):
+        df = self._frame(5000)
+        # windows of the finest level end within the file
+        with mock.patch("pandascsv.pyramid.BUILD_ROWS", 640):
+            pyramid = Pyramid.build(df)
+        self.assertEqual(pyramid.number_of_rows, 5000)
+        self.assertEqual([bucket_rows for bucket_rows, _ in pyramid.levels], [8, 64, 512, 4096, 32768])
+        for bucket_rows, level in pyramid.levels:
+            pd.testing.assert_frame_equal(level, self._expected(df, bucket_rows))
+        self.assertEqual(pyramid.levels[-1][1].shape[0], 1)
+        self.assertGreater(pyramid.nbytes(), 0)
+
+        bucket_rows, level = pyramid.level(100)
+        self.assertEqual((bucket_rows, level.shape), (64, (79, 12)))
+        self.assertEqual(pyramid.level(10**6)[0], 8)
+        self.assertEqual(pyramid.level(0)[0], 32768)
+        self.assertFalse(level.iloc[:, 0].to_numpy().flags.writeable)
+
+    def test_compact_frame(self):
+        df = self._frame(1000).drop(columns="value")
+        frame = CompactFrame.compact(df)
+        self.assertIsInstance(frame, CompactFrame)
+        pd.testing.assert_frame_equal(Pyramid.build(frame).level(20)[1], Pyramid.build(df).level(20)[1])
+
+    def test_no_numeric_columns(self):
+        pyramid = Pyramid.build(pd.DataFrame({"text": ["a", "b"]}))
+        self.assertEqual(pyramid.levels, [])
+        self.assertTrue(pyramid.level(10)[1].empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import logging
+import pathlib
+import tempfile
+import time
+import unittest
+
+from pandascsv import FileKey, RejectionCache
+
+
+class TestRejectionCache(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+
+    def _file(self, name: str, content: str = "a\nx\n") -> pathlib.Path:
+        file_path = self.temp_dir / name
+        file_path.write_text(content, encoding="utf-8")
+        return file_path
+
+    def _cache(self, max_entries: int = 10, persistent: bool = True) -> RejectionCache:
+        cache = RejectionCache(self.temp_dir / "cache" if persistent else None, max_entries)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_rejected_until_changed(self):
+        file_path = self._file("a.csv")
+        cache = self._cache(persistent=False)
+        self.assertIsNone(cache.rejected(FileKey.of(str(file_path), {})))
+        cache.reject(FileKey.of(str(file_path), {}), "single column")
+        self.assertEqual(cache.rejected(FileKey.of(str(file_path), {})), "single column")
+        self.assertIsNone(cache.rejected(FileKey.of(str(file_path), {"sep": ";"})))
+
+        time.sleep(0.01)
+        self._file("a.csv", "a;b\n1;2\n")
+        self.assertIsNone(cache.rejected(FileKey.of(str(file_path), {})))
+        self.assertEqual(cache.counts(), {"hits": 1, "misses": 3})
+
+    def test_persistent(self):
+        key = FileKey.of(str(self._file("a.csv")), {})
+        self._cache().reject(key, "single column")
+        self.assertEqual(self._cache().rejected(key), "single column")
+        self.assertTrue((self.temp_dir / "cache" / "rejected.sqlite3").is_file())
+
+    def test_evict_least_recently_used(self):
+        cache = self._cache(max_entries=2)
+        keys = [FileKey.of(str(self._file(f"{index}.csv")), {}) for index in range(3)]
+        cache.reject(keys[0], "0")
+        cache.reject(keys[1], "1")
+        cache.rejected(keys[0])
+        cache.reject(keys[2], "2")
+        self.assertEqual([cache.rejected(key) for key in keys], ["0", None, "2"])
+
+    def test_disabled(self):
+        key = FileKey.of(str(self._file("a.csv")), {})
+        cache = self._cache(max_entries=0)
+        cache.reject(key, "single column")
+        self.assertIsNone(cache.rejected(key))
+        self.assertFalse((self.temp_dir / "cache").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
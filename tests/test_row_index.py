@@ -0,0 +1,114 @@
+import gzip
+import io
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from pandascsv import LazyFrame, RowIndex
+
+
+class TestRowIndex(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _write_csv(self, content: str) -> str:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as temp_file:
+            temp_file.write(content)
+        self.addCleanup(os.remove, temp_file.name)
+        return temp_file.name
+
+    def _assert_rows(self, content: str, parameters: dict, stride: int = 3, file_path: str | None = None):
+        file_path = file_path or self._write_csv(content)
+        expected = pd.read_csv(file_path, **parameters)
+        # small chunks to cover rows and quoted fields spanning chunk boundaries
+        for chunk_size in (7, 64, 1 << 20):
+            with mock.patch("pandascsv.row_index.CHUNK_SIZE", chunk_size):
+                row_index = RowIndex.build(file_path, parameters, stride)
+            self.assertEqual(row_index.number_of_rows, len(expected), chunk_size)
+            for start in range(len(expected)):
+                buffer, first_row = row_index.read(start, start + 1)
+                overrides = {"header": None, "names": expected.columns, "skiprows": None}
+                window = pd.read_csv(io.BytesIO(buffer), **{**parameters, **overrides, "nrows": 1 + start - first_row})
+                self.assertEqual(window.iloc[-1].tolist(), expected.iloc[start].tolist(), (chunk_size, start))
+
+    def test_header(self):
+        self._assert_rows("a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(20)), {})
+
+    def test_no_trailing_newline(self):
+        self._assert_rows("a,b\n1,2\n3,4\n5,6", {})
+
+    def test_no_header(self):
+        self._assert_rows("".join(f"{i},{i * 0.5}\n" for i in range(10)), {"header": None})
+
+    def test_names(self):
+        self._assert_rows("".join(f"{i},{i * 0.5}\n" for i in range(10)), {"names": ["x", "y"]})
+
+    def test_blank_lines(self):
+        self._assert_rows("\n\na,b\r\n1,2\r\n\r\n  \t \n3,4\n\n5,6\n \n", {})
+
+    def test_blank_lines_kept_not_supported(self):
+        file_path = self._write_csv("a,b\n1,2\n\n3,4\n\n5,6\n")
+        self.assertEqual(len(pd.read_csv(file_path, skip_blank_lines=False)), 5)
+        self.assertFalse(RowIndex.supports({"skip_blank_lines": False}, file_path))
+        self.assertTrue(RowIndex.supports({"skip_blank_lines": True}, file_path))
+
+    def test_carriage_return_lines_not_supported(self):
+        file_path = self._write_csv("a,b\r1,2\r3,4\r")
+        self.assertEqual(len(pd.read_csv(file_path)), 2)
+        self.assertFalse(RowIndex.supports({}, file_path))
+        gzip_path = file_path + ".gz"
+        with gzip.open(gzip_path, "wb") as file:
+            file.write(b"a,b\r1,2\r3,4\r")
+        self.addCleanup(os.remove, gzip_path)
+        self.assertFalse(RowIndex.supports({}, gzip_path))
+        self.assertTrue(RowIndex.supports({}, self._write_csv("a,b\r\n1,2\r\n3,4\r\n")))
+
+    def test_quoted_line_breaks(self):
+        self._assert_rows('a,b\n1,"x\n\ny"\n2,"say ""hi""\n"\n3,z\n4,"\n,\n"\n', {})
+
+    def test_header_row(self):
+        self._assert_rows("title\nsubtitle\na,b\n1,2\n3,4\n", {"header": 2})
+
+    def test_skiprows(self):
+        self._assert_rows('\ntitle\n"multi\nline"\n\na,b\n1,2\n\n3,4\n', {"skiprows": 4})
+
+    def test_gzip(self):
+        content = "a,b\n" + "".join(f'{i},"x\n{i}"\n' for i in range(50))
+        with tempfile.NamedTemporaryFile(suffix=".csv.gz", delete=False) as temp_file:
+            # two members, like files written by appending
+            temp_file.write(gzip.compress(content[:100].encode()) + gzip.compress(content[100:].encode()))
+        self.addCleanup(os.remove, temp_file.name)
+        with mock.patch("pandascsv.compression.CHECKPOINT_SPACING", 50), mock.patch(
+            "pandascsv.compression.READ_SIZE", 16
+        ):
+            self._assert_rows(content, {}, file_path=temp_file.name)
+            self.assertGreater(len(RowIndex.build(temp_file.name, {}, 3).gzip_index.checkpoints), 5)
+
+    def test_supports(self):
+        self.assertTrue(RowIndex.supports({"sep": ";", "header": None}))
+        self.assertTrue(RowIndex.supports({"skiprows": 2}))
+        self.assertFalse(RowIndex.supports({"skiprows": [2]}))
+        self.assertTrue(RowIndex.supports({}, "data.csv.gz"))
+        self.assertFalse(RowIndex.supports({}, "data.csv.zst"))
+        self.assertFalse(RowIndex.supports({"compression": "bz2"}, "data.csv"))
+        self.assertFalse(RowIndex.supports({"comment": "#"}))
+        self.assertFalse(RowIndex.supports({"encoding": "utf-16"}))
+
+    def test_lazy_frame_window(self):
+        file_path = self._write_csv("a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(100)))
+        parameters: dict = {}
+        row_index = RowIndex.build(file_path, parameters, 8)
+        read_csv = mock.Mock(side_effect=lambda source=None, **kwargs: pd.read_csv(source or file_path, **kwargs))
+        frame = LazyFrame(read_csv, pd.read_csv(file_path, nrows=10), parameters, row_index)
+
+        self.assertEqual(frame.shape, (100, 2))
+        window = frame.iloc[:, 1].iloc[45:50]
+        self.assertEqual(window.tolist(), [22.5, 23.0, 23.5, 24.0, 24.5])
+        self.assertEqual(window.dtype, "float64")
+        self.assertEqual(frame.iloc[:, 0].iloc[98:120].tolist(), [98, 99])
+        self.assertEqual(frame.nbytes(), int(frame._sample.memory_usage(index=False).sum()))
+        # only windows were parsed, never the whole file
+        self.assertTrue(all(call.args for call in read_csv.call_args_list))
@@ -0,0 +1,58 @@
+import logging
+import sys
+import threading
+import types
+import unittest
+from unittest import mock
+
+import external_file_data
+import server
+
+
+class TestServer(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def test_registered_like_external_file_data(self):
+        self.assertEqual(server.FILE_TYPE_NAME, external_file_data.FILE_TYPE_NAME)
+        self.assertEqual(server.FILE_PATTERNS, external_file_data.FILE_PATTERNS)
+
+    def test_create_waits_for_plugin(self):
+        started = threading.Event()
+        release = threading.Event()
+        module = types.ModuleType("lazy_plugin_test")
+
+        def start(config):
+            started.set()
+            release.wait()
+
+        module.start = start
+        module.ExternalFileData = types.SimpleNamespace(config=None)
+        module.ExternalFile = types.SimpleNamespace(create=lambda file_path, parameters: (file_path, parameters))
+        plugin = server.LazyPlugin("lazy_plugin_test")
+        created = []
+        with mock.patch.dict(sys.modules, {"lazy_plugin_test": module}):
+            loader = threading.Thread(target=plugin.load)
+            loader.start()
+            started.wait()
+            request = threading.Thread(target=lambda: created.append(plugin.create("a.csv", "{}")))
+            request.start()
+            request.join(0.1)
+            self.assertTrue(request.is_alive())
+            release.set()
+            request.join()
+            loader.join()
+        self.assertEqual(created, [("a.csv", "{}")])
+        self.assertFalse(plugin.failed)
+
+    def test_create_fails_if_plugin_not_loaded(self):
+        plugin = server.LazyPlugin("lazy_plugin_missing")
+        with self.assertLogs("server", "ERROR"):
+            plugin.load()
+        self.assertTrue(plugin.failed)
+        with self.assertRaises(RuntimeError) as context:
+            plugin.create("a.csv", "")
+        self.assertIsInstance(context.exception.__cause__, ImportError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import logging
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from pandascsv import FileKey, SharedFrame, SharedStore
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent
+
+
+@unittest.skipUnless(SharedStore.supported(), "file locks are not available")
+class TestSharedStore(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+        self.store_dir = self.temp_dir / "shm"
+        self.file_path = self.temp_dir / "a.csv"
+        self.file_path.write_text("a,b\n1,2.5\n2,3.5\n", encoding="utf-8")
+        self.key = FileKey.of(str(self.file_path), {})
+
+    def _store(self, max_bytes: int = 1024 * 1024) -> SharedStore:
+        # every store opens its own locks, like another process would
+        return SharedStore(self.store_dir, max_bytes)
+
+    def _entries(self) -> list[str]:
+        return [path.name for path in self.store_dir.iterdir() if not path.name.startswith(".")]
+
+    def test_published_once_and_mapped(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            return pd.read_csv(self.file_path)
+
+        first = self._store().acquire(self.key, load)
+        second = self._store().acquire(self.key, load)
+        self.assertIsInstance(first, SharedFrame)
+        self.assertIsInstance(second, SharedFrame)
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(first.published)
+        self.assertFalse(second.published)
+        self.assertEqual(second.shape, (2, 2))
+        self.assertEqual(second.columns.tolist(), ["a", "b"])
+        self.assertEqual(second.iloc[:, 1].iloc[1], 3.5)
+        self.assertFalse(second.iloc[:, 0].to_numpy().flags.writeable)
+        self.assertGreater(second.nbytes(), 0)
+
+        first.release()
+        self.assertEqual(len(self._entries()), 1)
+        second.release()
+        second.release()
+        self.assertEqual(self._entries(), [])
+        # the mapped columns stay readable after the entry was removed
+        self.assertEqual(first.iloc[:, 0].tolist(), [1, 2])
+
+    def test_concurrent_loads_parse_once(self):
+        loads = []
+        frames = []
+
+        def load():
+            loads.append(1)
+            time.sleep(0.2)
+            return pd.read_csv(self.file_path)
+
+        threads = [
+            threading.Thread(target=lambda: frames.append(self._store().acquire(self.key, load))) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(all(isinstance(frame, SharedFrame) for frame in frames))
+        for frame in frames:
+            frame.release()
+        self.assertEqual(self._entries(), [])
+
+    def test_entry_of_crashed_process_removed(self):
+        code = (
+            "import os, pathlib, sys\n"
+            "import pandas as pd\n"
+            "from pandascsv import FileKey, SharedStore\n"
+            "store = SharedStore(pathlib.Path(sys.argv[1]), 1 << 20)\n"
+            "store.acquire(FileKey.of(sys.argv[2], {}), lambda: pd.read_csv(sys.argv[2]))\n"
+            "os._exit(0)\n"
+        )
+        arguments = [str(self.store_dir), str(self.file_path)]
+        subprocess.run([sys.executable, "-c", code, *arguments], cwd=ROOT_DIR, check=True)
+        self.assertEqual(len(self._entries()), 1)
+        self.assertEqual(self._store().sweep(), 1)
+        self.assertEqual(self._entries(), [])
+
+    def test_sweep_keeps_used_entries(self):
+        frame = self._store().acquire(self.key, lambda: pd.read_csv(self.file_path))
+        self.assertEqual(self._store().sweep(), 0)
+        self.assertEqual(len(self._entries()), 1)
+        frame.release()
+
+    def test_not_published_beyond_limit(self):
+        frame = self._store(max_bytes=8).acquire(self.key, lambda: pd.read_csv(self.file_path))
+        self.assertIsInstance(frame, pd.DataFrame)
+        self.assertEqual(self._entries(), [])
+
+    def test_object_columns_not_published(self):
+        frame = self._store().acquire(self.key, lambda: pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        self.assertIsInstance(frame, pd.DataFrame)
+        self.assertEqual(self._entries(), [])
+        self.assertEqual(os.listdir(self.store_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
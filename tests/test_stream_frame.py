@@ -0,0 +1,87 @@
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from ods_exd_api_box import NotMyFileError
+
+from pandascsv import StreamFrame
+
+
+class TestStreamFrame(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def _scan(self, content: str, max_rows: int = 10, spill_dir: pathlib.Path | None = None):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            temp_file.write(content)
+        self.addCleanup(os.remove, temp_file.name)
+
+        def read_csv(source=None, **overrides):
+            return pd.read_csv(temp_file.name if source is None else source, **overrides)
+
+        frame = StreamFrame.scan(read_csv, max_rows, spill_dir)
+        if isinstance(frame, StreamFrame):
+            self.addCleanup(frame.release)
+        return frame, pd.read_csv(temp_file.name)
+
+    def _assert_windows(self, frame: StreamFrame, expected: pd.DataFrame):
+        self.assertEqual(frame.shape, expected.shape)
+        self.assertEqual(frame.columns.tolist(), expected.columns.tolist())
+        for index in range(expected.shape[1]):
+            for start, stop in ((0, 3), (5, 25), (24, 26), (40, 1000), (2, 8)):
+                window = frame.iloc[:, index].iloc[start:stop]
+                np.testing.assert_array_equal(window.to_numpy(), expected.iloc[start:stop, index].to_numpy())
+                self.assertEqual(window.index[0] if len(window) else start, start)
+
+    def test_windows(self):
+        frame, expected = self._scan("a,b,c\n" + "".join(f"{i},{i * 0.5},x{i}\n" for i in range(45)))
+        self.assertIsInstance(frame, StreamFrame)
+        self.assertEqual(frame.dtypes.tolist(), expected.dtypes.tolist())
+        self._assert_windows(frame, expected)
+        # at most one chunk is kept
+        self.assertLessEqual(len(frame._cursor.chunk), 10)
+
+    def test_dtypes_unified(self):
+        rows = [f"{i},{i}\n" for i in range(45)]
+        rows[30] = "1.5,\n"
+        frame, expected = self._scan("a,b\n" + "".join(rows))
+        self.assertEqual(frame.dtypes.tolist(), [np.float64, np.float64])
+        self._assert_windows(frame, expected)
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            frame, expected = self._scan(
+                "a,b,c\n" + "".join(f"{i},{i * 0.5},x{i}\n" for i in range(45)), spill_dir=pathlib.Path(spill_dir)
+            )
+            self.assertEqual(len(os.listdir(spill_dir)), 1)
+            self._assert_windows(frame, expected)
+            frame.release()
+            self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_ragged_row_removes_spill(self):
+        rows = [f"{i},{i * 0.5}\n" for i in range(45)]
+        rows[25] = "1,2,3\n"
+        with tempfile.TemporaryDirectory() as spill_dir:
+            with self.assertRaises(NotMyFileError):
+                self._scan("a,b\n" + "".join(rows), spill_dir=pathlib.Path(spill_dir))
+            self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_monotonic(self):
+        frame, _ = self._scan("a,b\n" + "".join(f"{i},{i}\n" for i in range(45)))
+        self.assertTrue(frame.iloc[:, 0].is_monotonic_increasing and frame.iloc[:, 0].is_unique)
+        frame, _ = self._scan("a,b\n" + "".join(f"{i // 2},{i}\n" for i in range(45)))
+        self.assertTrue(frame.iloc[:, 0].is_monotonic_increasing)
+        self.assertFalse(frame.iloc[:, 0].is_unique)
+        frame, _ = self._scan("a,b\n" + "".join(f"{i % 20},{i}\n" for i in range(45)))
+        self.assertFalse(frame.iloc[:, 0].is_monotonic_increasing)
+
+    def test_single_chunk(self):
+        frame, expected = self._scan("a,b\n1,2\n3,4\n")
+        pd.testing.assert_frame_equal(frame, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
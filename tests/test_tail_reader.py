@@ -0,0 +1,86 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from pandascsv import TailReader
+
+
+class TestTailReader(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as temp_file:
+            self.file_path = temp_file.name
+        self.addCleanup(os.remove, self.file_path)
+
+    def _write(self, content: str, mode: str = "a"):
+        with open(self.file_path, mode, encoding="utf-8", newline="") as file:
+            file.write(content)
+
+    def _reader(self, parameters: dict | None = None) -> TailReader:
+        parameters = parameters or {}
+
+        def read_csv(source=None, **overrides):
+            return pd.read_csv(self.file_path if source is None else source, **{**parameters, **overrides})
+
+        return TailReader(self.file_path, read_csv)
+
+    def test_append(self):
+        self._write("a;b\n1;2.5\n3;4", "w")
+        reader = self._reader({"sep": ";"})
+        # the unterminated line is still being written
+        pd.testing.assert_frame_equal(reader.refresh(), pd.DataFrame({"a": [1], "b": [2.5]}))
+
+        self._write("5\n5;6\n\n7;8\n")
+        with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+            df = reader.refresh()
+            # only the appended bytes were parsed
+            self.assertLess(len(read_csv.call_args.args[0].getvalue()), 20)
+        pd.testing.assert_frame_equal(df, pd.DataFrame({"a": [1, 3, 5, 7], "b": [2.5, 45.0, 6.0, 8.0]}))
+        self.assertIs(reader.refresh(), df)
+
+    def test_widened_dtype(self):
+        self._write("a,b\n1,2\n", "w")
+        reader = self._reader()
+        reader.refresh()
+        self._write("1.5,x\n")
+        with self.assertLogs("pandascsv.tail_reader", level="WARNING"):
+            df = reader.refresh()
+        self.assertEqual(df.dtypes.tolist(), ["float64", "object"])
+        self.assertEqual(df["b"].tolist(), [2, "x"])
+
+    def test_buffers_grow_geometrically(self):
+        self._write("a,b\n0,0.5\n", "w")
+        reader = self._reader()
+        frames = [reader.refresh()]
+        allocations = set()
+        for i in range(1, 100):
+            self._write(f"{i},{i}.5\n")
+            frames.append(reader.refresh())
+            allocations.add(id(reader._buffers[0]))
+        pd.testing.assert_frame_equal(frames[-1], pd.DataFrame({"a": range(100), "b": [i + 0.5 for i in range(100)]}))
+        # earlier results are not changed by appended rows
+        self.assertEqual(frames[10]["a"].tolist(), list(range(11)))
+        self.assertLessEqual(len(allocations), 8)
+
+    def test_rewritten(self):
+        self._write("a,b\n1,2\n3,4\n", "w")
+        reader = self._reader()
+        reader.refresh()
+        self._write("a,b\n9,9\n", "w")
+        pd.testing.assert_frame_equal(reader.refresh(), pd.DataFrame({"a": [9], "b": [9]}))
+        self._write("a,b\n8,8\n7,7\n", "w")
+        pd.testing.assert_frame_equal(reader.refresh(), pd.DataFrame({"a": [8, 7], "b": [8, 7]}))
+
+    def test_supports(self):
+        self.assertTrue(TailReader.supports({"sep": ";", "skiprows": 2}, "data.csv"))
+        self.assertFalse(TailReader.supports({"usecols": [0]}, "data.csv"))
+        self.assertFalse(TailReader.supports({}, "data.csv.gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
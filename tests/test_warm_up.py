@@ -0,0 +1,83 @@
+import contextlib
+import io
+import logging
+import pathlib
+import tempfile
+import unittest
+from dataclasses import replace
+from unittest import mock
+
+import warm_up
+from external_file_data import ExternalFileData
+from pandascsv import RejectionCache
+
+
+class TestWarmUp(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+        self.data_dir = self.temp_dir / "data"
+        (self.data_dir / "sub").mkdir(parents=True)
+        (self.data_dir / "good.csv").write_text(
+            "a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(100)), encoding="utf-8"
+        )
+        (self.data_dir / "strings.csv").write_text("a,b\n" + "x,y\n" * 10, encoding="utf-8")
+        (self.data_dir / "sub" / "nested.csv").write_text("a;b\n1;2\n", encoding="utf-8")
+        (self.data_dir / "notes.txt").write_text("a,b\n1,2\n", encoding="utf-8")
+
+    def _patch_caches(self):
+        stack = contextlib.ExitStack()
+        config = replace(ExternalFileData.config, cache_dir=self.temp_dir / "cache", probe_rows=10)
+        rejections = RejectionCache(config.cache_dir, 100)
+        stack.callback(rejections.close)
+        stack.enter_context(mock.patch.object(ExternalFileData, "config", config))
+        stack.enter_context(mock.patch.object(ExternalFileData, "rejections", rejections))
+        self.addCleanup(stack.close)
+
+    def test_find_files(self):
+        data_dir = str(self.data_dir)
+        self.assertEqual(
+            warm_up.find_files([data_dir]), [str(self.data_dir / "good.csv"), str(self.data_dir / "strings.csv")]
+        )
+        self.assertEqual(len(warm_up.find_files([data_dir], recursive=True)), 3)
+        self.assertEqual(warm_up.find_files([f"{data_dir}/*.txt"]), [str(self.data_dir / "notes.txt")])
+
+    def test_later_requests_hit_caches(self):
+        self._patch_caches()
+        file_paths = warm_up.find_files([str(self.data_dir)], recursive=True)
+        results = {pathlib.Path(result.file_path).name: result for result in warm_up.warm_up(file_paths, workers=1)}
+        self.assertEqual((results["good.csv"].number_of_rows, results["good.csv"].number_of_channels), (100, 2))
+        self.assertFalse(results["strings.csv"].accepted)
+        self.assertFalse(results["nested.csv"].accepted)
+
+        with mock.patch("pandas.read_csv") as read_csv:
+            for name, rejected in (("good.csv", False), ("strings.csv", True), ("sub/nested.csv", True)):
+                edf = ExternalFileData(str(self.data_dir / name), {})
+                try:
+                    self.assertEqual(edf.not_my_file(), rejected)
+                finally:
+                    edf.close()
+            read_csv.assert_not_called()
+
+    def test_worker_processes(self):
+        file_paths = warm_up.find_files([str(self.data_dir)], recursive=True)
+        results = warm_up.warm_up(file_paths, '{"sep": ";"}', workers=2)
+        self.assertEqual([result.file_path for result in results], file_paths)
+        self.assertEqual([result.accepted for result in results], [False, False, True])
+        self.assertEqual(results[2].number_of_rows, 1)
+
+    def test_main(self):
+        stdout = io.StringIO()
+        missing = str(self.temp_dir / "missing.csv")
+        with mock.patch("warm_up.find_files", return_value=[str(self.data_dir / "good.csv"), missing]):
+            with contextlib.redirect_stdout(stdout), self.assertLogs("warm_up", level="INFO"):
+                self.assertEqual(warm_up.main([str(self.data_dir), "--workers", "1"]), 1)
+        self.assertIn("good.csv: 100 rows, 2 channels", stdout.getvalue())
+        self.assertIn("missing.csv: failed", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Pre-compute the structures of many CSV files in worker processes, so later EXD-API requests hit the caches.
+"""
+
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from ods_exd_api_box import NotMyFileError
+from ods_exd_api_box.simple.file_simple import FileSimpleRegistry
+
+from external_file_data import FILE_PATTERNS, ExternalFile, ExternalFileData
+
+
+@dataclass(frozen=True)
+class WarmUpResult:
+    """Outcome of extracting the structure of a file."""
+
+    file_path: str
+    # False if the file is not meant for this plugin or could not be read
+    accepted: bool
+    number_of_rows: int = 0
+    number_of_channels: int = 0
+    reason: str = ""
+    seconds: float = 0.0
+    # True if the file could not be read at all, e.g. because it vanished
+    failed: bool = False
+
+
+def find_files(sources: list[str], recursive: bool = False) -> list[str]:
+    """
+    Collect the files to warm up.
+    :param sources: Directories, searched for FILE_PATTERNS, or glob patterns of files.
+    :param recursive: Also search subdirectories of directories.
+    :return: Paths of the files, largest first so long running files start early.
+    """
+    file_paths: set[str] = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in FILE_PATTERNS:
+                file_paths.update(glob.glob(os.path.join(source, "**" if recursive else "", pattern), recursive=True))
+        else:
+            file_paths.update(glob.glob(source, recursive=recursive))
+    return sorted((path for path in file_paths if os.path.isfile(path)), key=os.path.getsize, reverse=True)
+
+
+def warm_up(file_paths: list[str], parameters: str = "", workers: int | None = None) -> list[WarmUpResult]:
+    """
+    Extract the structures of files in parallel worker processes, like GetStructure does.
+    Parsed files and column statistics are stored in `config.cache_dir` and rejected files in its
+    rejection database, so the plugin answers later requests for them from the caches.
+    :param file_paths: Paths of the files.
+    :param parameters: Parameters of the files, formatted like the parameters of an EXD-API Open request.
+    :param workers: Number of worker processes, defaults to the number of CPUs. 1 runs in this process.
+    :return: Results in the order of the files.
+    """
+    log = logging.getLogger(__name__)
+    if ExternalFileData.config.cache_dir is None:
+        log.warning("No cache directory configured, the plugin will parse the files again")
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(file_paths) <= 1:
+        _init_worker()
+        results = [_warm_up_file(file_path, parameters) for file_path in file_paths]
+    else:
+        # workers read the configuration from the environment like the plugin, fork is unsafe with threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+            results = list(executor.map(_warm_up_file, file_paths, [parameters] * len(file_paths)))
+    accepted = sum(result.accepted for result in results)
+    log.info(
+        "Warmed up %d files in %.1f s of work on %d workers: %d accepted, %d rejected",
+        len(results),
+        sum(result.seconds for result in results),
+        workers,
+        accepted,
+        len(results) - accepted,
+    )
+    return results
+
+
+def _init_worker() -> None:
+    FileSimpleRegistry.register(ExternalFileData.create)
+
+
+def _warm_up_file(file_path: str, parameters: str) -> WarmUpResult:
+    start = time.perf_counter()
+    try:
+        group = ExternalFile.prepare(file_path, parameters).groups[0]
+        return WarmUpResult(
+            file_path, True, group.number_of_rows, len(group.channels), seconds=time.perf_counter() - start
+        )
+    except NotMyFileError as e:
+        return WarmUpResult(file_path, False, reason=str(e) or "not my file", seconds=time.perf_counter() - start)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).warning("Could not warm up file %s: %s", file_path, e)
+        return WarmUpResult(file_path, False, reason=str(e), seconds=time.perf_counter() - start, failed=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point, prints one line per file.
+    :param argv: Command line arguments, defaults to sys.argv.
+    :return: Exit code, 1 if a file could not be read.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sources", nargs="+", help="directories or glob patterns of CSV files")
+    parser.add_argument("--parameters", default="", help="parameters of the files, like in an EXD-API Open request")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the number of CPUs")
+    parser.add_argument("--recursive", action="store_true", help="also search subdirectories")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    results = warm_up(find_files(args.sources, args.recursive), args.parameters, args.workers)
+    for result in results:
+        if result.accepted:
+            print(f"{result.file_path}: {result.number_of_rows} rows, {result.number_of_channels} channels")
+        else:
+            print(f"{result.file_path}: {'failed' if result.failed else 'rejected'}, {result.reason}")
+    return 1 if any(result.failed for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())